@@ -0,0 +1,158 @@
+# admission.py
+
+"""
+Kontrol penerimaan (admission) murah untuk payload perhitungan, dijalankan
+sebelum solver mana pun.
+
+Langkah:
+  1. Normalisasi: entri ahli waris duplikat (id, penghalang, status sama)
+     dibuang, entri pertama dipertahankan — engine memang hanya membaca entri
+     pertama per id. Ribuan entri duplikat menyusut menjadi ≤ 25 per status.
+  2. Batas ukuran: jumlah entri unik per daftar, jumlah per ahli waris
+     (quantity), dan jumlah masalah gharqa → 413/422 bila dilanggar.
+  3. Estimasi biaya dalam "unit" (1 unit ≈ satu perhitungan dasar yang wajar):
+     banyaknya skenario solver × ukuran daftar × panjang bit jumlah (tashīḥ
+     mengalikan AM dengan faktor dari jumlah kepala). Di atas MAX_COST → 413;
+     /calculate/ di atas INLINE_COST_MAX dialihkan ke pool proses berat yang
+     antreannya dibatasi (executor.HEAVY_QUEUE_MAX → 503 bila penuh).
+"""
+
+import os
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+from pydantic import BaseModel
+
+import schemas
+
+MAX_HEIR_ENTRIES = int(os.getenv("MAX_HEIR_ENTRIES", "64"))         # entri unik per daftar ahli waris
+MAX_HEIR_QUANTITY = int(os.getenv("MAX_HEIR_QUANTITY", "1000"))
+MAX_GHARQA_PROBLEMS = int(os.getenv("MAX_GHARQA_PROBLEMS", "64"))
+INLINE_COST_MAX = float(os.getenv("INLINE_COST_MAX", "4"))          # di atas ini → pool berat
+MAX_COST = float(os.getenv("MAX_COST", "256"))                      # di atas ini → ditolak
+
+# Ukuran daftar & panjang bit jumlah yang masih dihitung 1 unit
+_BASE_ENTRIES = 25
+_BASE_BITS = 64
+
+ROUTE_INLINE = "inline"
+ROUTE_HEAVY = "heavy"
+
+# Banyaknya perhitungan dasar per jenis (gharqa: satu per masalah)
+SCENARIOS: Dict[str, int] = {
+    "calculate": 1,
+    "trace": 1,
+    "mafqud": 2,
+    "khuntsa": 2,
+    "haml": 6,
+    "munasakhot": 2,
+}
+
+
+class AdmissionRejected(ValueError):
+    """Payload ditolak sebelum dihitung; `status_code` untuk respons HTTP."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class Admission:
+    """Hasil penerimaan: payload yang sudah dinormalisasi, estimasi biaya, dan rutenya."""
+    __slots__ = ("payload", "cost", "route")
+
+    def __init__(self, payload: BaseModel, cost: float, route: str):
+        self.payload = payload
+        self.cost = cost
+        self.route = route
+
+
+# =========================
+# Normalisasi & batas
+# =========================
+def normalize_heirs(heirs: Sequence[schemas.HeirInput]) -> List[schemas.HeirInput]:
+    """Buang entri duplikat (id, penghalang, status) lalu periksa batas ukuran."""
+    seen = set()
+    unique = []
+    for h in heirs:
+        key = (h.id, h.penghalang, h.status)
+        if key not in seen:
+            seen.add(key)
+            unique.append(h)
+    check_heirs(unique)
+    return unique if len(unique) != len(heirs) else list(heirs)
+
+
+def check_heirs(heirs: Sequence[schemas.HeirInput]) -> None:
+    if len(heirs) > MAX_HEIR_ENTRIES:
+        raise AdmissionRejected(413, f"Terlalu banyak ahli waris berbeda ({len(heirs)} > {MAX_HEIR_ENTRIES}).")
+    for h in heirs:
+        if h.quantity < 0:
+            raise AdmissionRejected(422, f"Jumlah ahli waris ID {h.id} tidak boleh negatif.")
+        if h.quantity > MAX_HEIR_QUANTITY:
+            raise AdmissionRejected(
+                422, f"Jumlah ahli waris ID {h.id} terlalu besar ({h.quantity} > {MAX_HEIR_QUANTITY}).")
+
+
+def heirs_cost(heirs: Sequence[schemas.HeirInput]) -> float:
+    """Estimasi biaya satu perhitungan dasar untuk daftar ini (unit)."""
+    bits = sum(h.quantity.bit_length() for h in heirs)
+    return max(1.0, len(heirs) / _BASE_ENTRIES) * max(1.0, bits / _BASE_BITS)
+
+
+def _normalized(kind: str, payload: BaseModel) -> Tuple[BaseModel, float]:
+    """Payload dengan semua daftar ahli waris dinormalisasi + estimasi biayanya."""
+    if kind == "gharqa":
+        if len(payload.problems) > MAX_GHARQA_PROBLEMS:
+            raise AdmissionRejected(
+                413, f"Terlalu banyak masalah gharqa ({len(payload.problems)} > {MAX_GHARQA_PROBLEMS}).")
+        problems = [p.model_copy(update={"heirs": normalize_heirs(p.heirs)}) for p in payload.problems]
+        return payload.model_copy(update={"problems": problems}), sum(heirs_cost(p.heirs) for p in problems)
+    if kind == "munasakhot":
+        ula = payload.masalah_ula.model_copy(update={"heirs": normalize_heirs(payload.masalah_ula.heirs)})
+        tsaniyah = normalize_heirs(payload.masalah_tsaniyah_heirs)
+        cost = heirs_cost(ula.heirs) + heirs_cost(tsaniyah)
+        return payload.model_copy(update={"masalah_ula": ula, "masalah_tsaniyah_heirs": tsaniyah}), cost
+    heirs = normalize_heirs(payload.heirs)
+    return payload.model_copy(update={"heirs": heirs}), SCENARIOS[kind] * heirs_cost(heirs)
+
+
+# =========================
+# Statistik
+# =========================
+class AdmissionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"inline": 0, "heavy": 0, "rejected": 0, "deduplicated": 0}
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+admission_stats = AdmissionStats()
+
+
+def admit(kind: str, payload: BaseModel) -> Admission:
+    """
+    Normalisasi, batas, dan estimasi biaya untuk payload jenis `kind`
+    (nama di executor.HEAVY_JOBS atau "calculate"). AdmissionRejected bila ditolak.
+    """
+    try:
+        normalized, cost = _normalized(kind, payload)
+        if cost > MAX_COST:
+            raise AdmissionRejected(413, f"Perhitungan terlalu berat (estimasi {cost:.1f} > {MAX_COST:g} unit).")
+    except AdmissionRejected:
+        admission_stats.record("rejected")
+        raise
+    if normalized != payload:
+        admission_stats.record("deduplicated")
+    # Selain /calculate/, semua jenis memang sudah dijalankan di pool berat
+    route = ROUTE_INLINE if kind == "calculate" and cost <= INLINE_COST_MAX else ROUTE_HEAVY
+    admission_stats.record(route)
+    return Admission(normalized, cost, route)
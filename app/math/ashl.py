@@ -2,7 +2,6 @@
 
 from typing import List
 import math
-from fractions import Fraction
 
 from schemas import ComparisonItem, AshlInfo
 
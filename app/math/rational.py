@@ -0,0 +1,192 @@
+# app/math/rational.py
+
+from math import gcd
+from typing import Iterable, Union
+
+Number = Union[int, "Rational"]
+
+
+class Rational:
+    """
+    Bilangan rasional bulat yang selalu ternormalisasi (penyebut > 0,
+    pembilang & penyebut koprima). Dipakai untuk membandingkan porsi/saham
+    tanpa bolak-balik ke float dan tanpa overhead `fractions.Fraction`
+    (yang menerima str/float/Decimal dan memeriksa tipe di setiap operasi).
+
+    Hanya berinteraksi dengan int dan Rational; float/Fraction harus
+    dikonversi eksplisit lewat `from_float` / `of`. `str()` mengikuti format Fraction
+    ("2/5", atau "3" bila penyebutnya 1) sehingga catatan/trace tidak berubah.
+    """
+
+    __slots__ = ("numerator", "denominator")
+
+    def __init__(self, numerator: int, denominator: int = 1):
+        if denominator == 0:
+            raise ZeroDivisionError(f"Rational({numerator}, 0)")
+        if denominator < 0:
+            numerator, denominator = -numerator, -denominator
+        g = gcd(numerator, denominator)
+        if g > 1:
+            numerator //= g
+            denominator //= g
+        self.numerator = numerator
+        self.denominator = denominator
+
+    @classmethod
+    def _raw(cls, numerator: int, denominator: int) -> "Rational":
+        """Bangun tanpa normalisasi — hanya untuk pasangan yang sudah koprima."""
+        r = object.__new__(cls)
+        r.numerator = numerator
+        r.denominator = denominator
+        return r
+
+    @classmethod
+    def from_float(cls, value: float, max_denominator: int = 1000) -> "Rational":
+        """
+        Pendekatan rasional terbaik untuk `value` dengan penyebut <= max_denominator
+        (setara `Fraction(value).limit_denominator(max_denominator)`), dihitung
+        dengan pecahan berlanjut atas rasio bulat eksak dari float.
+        """
+        n, d = value.as_integer_ratio()
+        if d <= max_denominator:
+            return cls._raw(n, d)
+        p0, q0, p1, q1 = 0, 1, 1, 0
+        while True:
+            a = n // d
+            q2 = q0 + a * q1
+            if q2 > max_denominator:
+                break
+            p0, q0, p1, q1 = p1, q1, p0 + a * p1, q2
+            n, d = d, n - a * d
+        k = (max_denominator - q0) // q1
+        # Dua kandidat: konvergen terakhir & semi-konvergen terbaik
+        b1 = cls(p0 + k * p1, q0 + k * q1)
+        b2 = cls._raw(p1, q1)
+        exact = cls(*value.as_integer_ratio())
+        return b2 if abs(b2 - exact) <= abs(b1 - exact) else b1
+
+    @classmethod
+    def of(cls, value) -> "Rational":
+        """int/Rational apa adanya; float lewat `from_float`; Fraction lewat pembilang/penyebutnya."""
+        if isinstance(value, Rational):
+            return value
+        if isinstance(value, int):
+            return cls._raw(value, 1)
+        if isinstance(value, float):
+            return cls.from_float(value)
+        return cls(value.numerator, value.denominator)
+
+    # ---------- aritmetika ----------
+    def __add__(self, other: Number) -> "Rational":
+        if isinstance(other, int):
+            return Rational._raw(self.numerator + other * self.denominator, self.denominator)
+        if isinstance(other, Rational):
+            return Rational(self.numerator * other.denominator + other.numerator * self.denominator,
+                            self.denominator * other.denominator)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __neg__(self) -> "Rational":
+        return Rational._raw(-self.numerator, self.denominator)
+
+    def __sub__(self, other: Number) -> "Rational":
+        if isinstance(other, (int, Rational)):
+            return self + (-other)
+        return NotImplemented
+
+    def __rsub__(self, other: Number) -> "Rational":
+        if isinstance(other, int):
+            return Rational._raw(other * self.denominator - self.numerator, self.denominator)
+        return NotImplemented
+
+    def __mul__(self, other: Number) -> "Rational":
+        if isinstance(other, int):
+            return Rational(self.numerator * other, self.denominator)
+        if isinstance(other, Rational):
+            return Rational(self.numerator * other.numerator, self.denominator * other.denominator)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Number) -> "Rational":
+        if isinstance(other, int):
+            return Rational(self.numerator, self.denominator * other)
+        if isinstance(other, Rational):
+            return Rational(self.numerator * other.denominator, self.denominator * other.numerator)
+        return NotImplemented
+
+    def __rtruediv__(self, other: Number) -> "Rational":
+        if isinstance(other, int):
+            return Rational(other * self.denominator, self.numerator)
+        return NotImplemented
+
+    def __abs__(self) -> "Rational":
+        return Rational._raw(abs(self.numerator), self.denominator)
+
+    # ---------- perbandingan (perkalian silang, tanpa pembagian) ----------
+    def _cross(self, other) -> tuple:
+        if isinstance(other, int):
+            return self.numerator, other * self.denominator
+        if isinstance(other, Rational):
+            return self.numerator * other.denominator, other.numerator * self.denominator
+        return None
+
+    def __eq__(self, other) -> bool:
+        pair = self._cross(other)
+        return NotImplemented if pair is None else pair[0] == pair[1]
+
+    def __lt__(self, other) -> bool:
+        pair = self._cross(other)
+        return NotImplemented if pair is None else pair[0] < pair[1]
+
+    def __le__(self, other) -> bool:
+        pair = self._cross(other)
+        return NotImplemented if pair is None else pair[0] <= pair[1]
+
+    def __gt__(self, other) -> bool:
+        pair = self._cross(other)
+        return NotImplemented if pair is None else pair[0] > pair[1]
+
+    def __ge__(self, other) -> bool:
+        pair = self._cross(other)
+        return NotImplemented if pair is None else pair[0] >= pair[1]
+
+    def __hash__(self) -> int:
+        # Konsisten dengan int: Rational(3) == 3 → hash sama
+        if self.denominator == 1:
+            return hash(self.numerator)
+        return hash((self.numerator, self.denominator))
+
+    # ---------- konversi ----------
+    def is_integer(self) -> bool:
+        return self.denominator == 1
+
+    def __bool__(self) -> bool:
+        return self.numerator != 0
+
+    def __int__(self) -> int:
+        # Pemotongan ke arah nol, seperti int(Fraction)
+        if self.numerator < 0:
+            return -(-self.numerator // self.denominator)
+        return self.numerator // self.denominator
+
+    def __float__(self) -> float:
+        return self.numerator / self.denominator
+
+    def __str__(self) -> str:
+        if self.denominator == 1:
+            return str(self.numerator)
+        return f"{self.numerator}/{self.denominator}"
+
+    def __repr__(self) -> str:
+        return f"Rational({self.numerator}, {self.denominator})"
+
+
+def lcm_denominators(values: Iterable[Rational]) -> int:
+    """KPK penyebut — pengali terkecil yang membuat semua nilai menjadi bulat."""
+    result = 1
+    for value in values:
+        d = value.denominator
+        result = result * d // gcd(result, d)
+    return result
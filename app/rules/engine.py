@@ -1,10 +1,12 @@
 # app/rules/engine.py
 
 from __future__ import annotations
-from typing import List
-from sqlalchemy.orm import Session
+from typing import TYPE_CHECKING, List
 from schemas import FurudhItem, Heir
 
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
 # =========================
 # Util kuantitas & eksistensi
 # =========================
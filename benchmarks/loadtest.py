@@ -0,0 +1,336 @@
+# benchmarks/loadtest.py
+
+"""
+Generator beban untuk aplikasi FastAPI (main.app), tanpa deploy.
+
+Sejumlah `--concurrency` klien async mengirim request terus-menerus selama
+`--duration` detik, memilih endpoint secara acak berbobot (`--mix`) dari kasus
+di benchmarks/serialization.py (calculate, munasakhot, mafqud, khuntsa, haml,
+gharqa). Target:
+
+    inproc   aplikasi dipanggil langsung lewat httpx.ASGITransport (lifespan
+             dijalankan; pool berat tetap proses sungguhan)
+    socket   server serve.py (pre-fork uvicorn) dijalankan di port lokal bebas,
+             atau server yang sudah jalan lewat --url
+
+    python benchmarks/loadtest.py [--target inproc|socket] [--url URL]
+                                  [--concurrency 16] [--duration 10] [--warmup 1]
+                                  [--mix calculate=6,munasakhot=1,haml=1] [--workers 2]
+                                  [--seed 1] [--json] [--workload beban.ndjson]
+
+Dengan --workload, request diambil acak dari file NDJSON buatan
+benchmarks/workload.py (sebaran keluarga realistis) sebagai ganti --mix.
+
+Laporan: throughput, persentil latensi (total & per endpoint), error rate per
+kode status, dan waktu CPU per proses (dari /proc) selama pengukuran. Pada
+target inproc, CPU proses utama mencakup klien beban itu sendiri.
+Tidak butuh database: server berjalan dalam mode tanpa database.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+os.environ["DATABASE_URL"] = ""   # sebelum modul proyek di-import: mode tanpa database
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx
+
+from serialization import CASES
+
+DEFAULT_MIX = "calculate=6,munasakhot=1,mafqud=1,khuntsa=1,haml=1,gharqa=1"
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in filter(None, text.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in CASES:
+            raise SystemExit(f"endpoint tidak dikenal di --mix: {name} (pilihan: {', '.join(CASES)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise SystemExit("--mix kosong")
+    return mix
+
+
+# =========================
+# CPU per proses (/proc)
+# =========================
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _stat(pid: int) -> Optional[List[str]]:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Nama proses (field 2) bisa berisi spasi; ambil setelah ')' terakhir
+            return f.read().rpartition(")")[2].split()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+
+def process_tree(root: int) -> List[int]:
+    """`root` beserta semua keturunannya (worker uvicorn, pool proses berat)."""
+    parents = {}
+    for entry in os.listdir("/proc") if os.path.isdir("/proc") else ():
+        if entry.isdigit():
+            fields = _stat(int(entry))
+            if fields:
+                parents[int(entry)] = int(fields[1])
+    tree, frontier = [root], [root]
+    while frontier:
+        frontier = [pid for pid, ppid in parents.items() if ppid in frontier]
+        tree.extend(frontier)
+    return tree
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    fields = _stat(pid)
+    if not fields:
+        return None
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS   # utime + stime
+
+
+def cpu_snapshot(root: int) -> Dict[int, float]:
+    return {pid: cpu for pid in process_tree(root) if (cpu := cpu_seconds(pid)) is not None}
+
+
+# =========================
+# Generator beban
+# =========================
+Request = Tuple[str, str, Any]   # (nama endpoint, path, payload)
+
+
+class Workload:
+    """Daftar request beserta bobotnya (None = seragam)."""
+
+    def __init__(self, requests: List[Request], weights: Optional[List[float]] = None):
+        self.requests = requests
+        self.weights = weights
+
+    @classmethod
+    def from_mix(cls, mix: Dict[str, float]) -> "Workload":
+        return cls([(name, CASES[name][0], CASES[name][2]) for name in mix], list(mix.values()))
+
+    @classmethod
+    def from_file(cls, path: str, limit: int) -> "Workload":
+        requests = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if len(requests) >= limit:
+                    break
+                record = json.loads(line)
+                requests.append((record["kind"], record["path"], record["payload"]))
+        if not requests:
+            raise SystemExit(f"workload kosong: {path}")
+        return cls(requests)
+
+    def pick(self, rnd: random.Random) -> Request:
+        if self.weights is None:
+            return self.requests[rnd.randrange(len(self.requests))]
+        return rnd.choices(self.requests, self.weights)[0]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def add(self, name: str, status: str, seconds: float) -> None:
+        self.latencies.setdefault(name, []).append(seconds)
+        statuses = self.statuses.setdefault(name, {})
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def _client_loop(client: httpx.AsyncClient, rnd: random.Random, workload: Workload,
+                       stop_at: float, recorder: Optional[Recorder]) -> None:
+    while time.monotonic() < stop_at:
+        name, path, payload = workload.pick(rnd)
+        started = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if recorder is not None:
+            recorder.add(name, status, time.perf_counter() - started)
+
+
+async def drive(client: httpx.AsyncClient, workload: Workload, concurrency: int,
+                duration: float, warmup: float, seed: int, cpu_root: int) -> dict:
+    rnd = random.Random(seed)
+    if warmup > 0:
+        stop_at = time.monotonic() + warmup
+        await asyncio.gather(*(_client_loop(client, random.Random(rnd.random()), workload, stop_at, None)
+                               for _ in range(concurrency)))
+    recorder = Recorder()
+    cpu_before = cpu_snapshot(cpu_root)
+    started = time.monotonic()
+    stop_at = started + duration
+    await asyncio.gather(*(_client_loop(client, random.Random(rnd.random()), workload, stop_at, recorder)
+                           for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    cpu_after = cpu_snapshot(cpu_root)
+    cpu = {pid: round(after - cpu_before.get(pid, 0.0), 3) for pid, after in cpu_after.items()}
+    return summarize(recorder, elapsed, cpu, cpu_root)
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))] if ordered else 0.0
+
+
+def _latency(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {f"p{int(p * 100)}_ms": round(percentile(ordered, p) * 1000, 3) for p in (0.5, 0.9, 0.99)} | \
+        {"max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0}
+
+
+def summarize(recorder: Recorder, elapsed: float, cpu: Dict[int, float], cpu_root: int) -> dict:
+    endpoints = {}
+    all_latencies, errors, total = [], 0, 0
+    for name, samples in sorted(recorder.latencies.items()):
+        if not samples:
+            continue
+        statuses = recorder.statuses[name]
+        failed = sum(n for status, n in statuses.items() if not status.startswith("2"))
+        endpoints[name] = {"requests": len(samples), "errors": failed, "statuses": statuses,
+                           **_latency(samples)}
+        all_latencies.extend(samples)
+        errors += failed
+        total += len(samples)
+    return {
+        "duration_seconds": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "latency": _latency(all_latencies),
+        "endpoints": endpoints,
+        "cpu": {
+            "root_pid": cpu_root,
+            "per_process_seconds": cpu,
+            "total_seconds": round(sum(cpu.values()), 3),
+            "utilization": round(sum(cpu.values()) / elapsed, 2) if elapsed else 0.0,   # 1.0 = satu core penuh
+        },
+    }
+
+
+# =========================
+# Target
+# =========================
+@asynccontextmanager
+async def inproc_client(timeout: float):
+    """Klien httpx yang memanggil main.app langsung, dengan lifespan aplikasi berjalan."""
+    import main
+
+    app = main.app
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest",
+                                     timeout=timeout) as client:
+            yield client
+
+
+async def run_inproc(args, workload) -> dict:
+    async with inproc_client(args.timeout) as client:
+        return await drive(client, workload, args.concurrency, args.duration, args.warmup,
+                           args.seed, os.getpid())
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int) -> (subprocess.Popen, str):
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "serve.py"), "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--report-interval", "0", "--log-level", "warning"],
+        cwd=ROOT, env={**os.environ, "DATABASE_URL": ""},
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"serve.py berhenti saat start (kode {server.returncode})")
+        try:
+            if httpx.get(url + "/", timeout=1).status_code < 500:
+                return server, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("serve.py tidak siap dalam 60 detik")
+
+
+def socket_client(url: str, concurrency: int, timeout: float) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+
+
+async def run_socket(args, workload, url: str, cpu_root: int) -> dict:
+    async with socket_client(url, args.concurrency, args.timeout) as client:
+        return await drive(client, workload, args.concurrency, args.duration, args.warmup, args.seed, cpu_root)
+
+
+def report(result: dict) -> None:
+    print(f"durasi {result['duration_seconds']} s, {result['requests']} request, "
+          f"{result['throughput_rps']} req/s, error rate {result['error_rate']:.2%}")
+    lat = result["latency"]
+    print(f"latensi total: p50 {lat['p50_ms']} ms, p90 {lat['p90_ms']} ms, "
+          f"p99 {lat['p99_ms']} ms, max {lat['max_ms']} ms\n")
+    print(f"{'endpoint':<12} {'req':>7} {'err':>5} {'p50_ms':>9} {'p90_ms':>9} {'p99_ms':>9} {'max_ms':>9}  status")
+    for name, e in result["endpoints"].items():
+        statuses = " ".join(f"{s}×{n}" for s, n in sorted(e["statuses"].items()))
+        print(f"{name:<12} {e['requests']:>7} {e['errors']:>5} {e['p50_ms']:>9} {e['p90_ms']:>9} "
+              f"{e['p99_ms']:>9} {e['max_ms']:>9}  {statuses}")
+    cpu = result["cpu"]
+    print(f"\nCPU: {cpu['total_seconds']} s total, utilisasi {cpu['utilization']} core")
+    for pid, seconds in sorted(cpu["per_process_seconds"].items(), key=lambda item: -item[1]):
+        label = "utama" if pid == cpu["root_pid"] else "worker"
+        print(f"  pid {pid:>8} ({label}) {seconds:>8.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator beban untuk aplikasi Kalkulator Faraidh.")
+    parser.add_argument("--target", choices=("inproc", "socket"), default="inproc")
+    parser.add_argument("--url", help="server yang sudah jalan (target socket); default: jalankan serve.py")
+    parser.add_argument("--workers", type=int, default=2, help="worker serve.py untuk target socket")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=bobot dipisah koma")
+    parser.add_argument("--workload", help="NDJSON dari benchmarks/workload.py (menggantikan --mix)")
+    parser.add_argument("--workload-limit", type=int, default=100_000, help="baris workload yang dimuat")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="cetak hasil sebagai JSON")
+    args = parser.parse_args()
+    workload = Workload.from_file(args.workload, args.workload_limit) if args.workload \
+        else Workload.from_mix(parse_mix(args.mix))
+
+    if args.target == "inproc":
+        result = asyncio.run(run_inproc(args, workload))
+    elif args.url:
+        # Server eksternal: CPU server tidak terlihat, hanya proses generator ini
+        result = asyncio.run(run_socket(args, workload, args.url.rstrip("/"), os.getpid()))
+    else:
+        server, url = start_server(args.workers)
+        try:
+            result = asyncio.run(run_socket(args, workload, url, server.pid))
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        report(result)
@@ -0,0 +1,89 @@
+# benchmarks/memory.py
+
+"""
+Benchmark memori per endpoint & per tahap solver: setiap kasus dikirim lewat
+aplikasi (TestClient) dengan MEMTRACK=1, lalu agregat memtrack dibaca dari
+GET /admin/memory — puncak alokasi (peak_bytes) dan selisih blok (net_blocks)
+untuk endpoint, job di worker berat, dan tahap solver.
+
+    python benchmarks/memory.py [--rounds 50] [--save base.json]
+    python benchmarks/memory.py --baseline base.json [--tolerance 0.15]
+
+Dengan --baseline, p50 peak_bytes tiap kunci dibandingkan dengan baseline;
+kenaikan di atas toleransi dilaporkan dan skrip keluar dengan kode 1, sehingga
+regresi memori bisa dijaga di CI seperti regresi latensi.
+Tidak butuh database: solver dijalankan dalam mode tanpa database.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sys
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = ""   # sebelum modul proyek di-import: mode tanpa database
+os.environ["MEMTRACK"] = "1"
+os.environ.setdefault("ADMIN_TOKEN", secrets.token_hex(8))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient
+
+import main
+from serialization import CASES
+
+# Kasus dengan peak di bawah ini tidak dibandingkan (derau alokator)
+MIN_COMPARED_BYTES = 4096
+
+
+def collect(rounds: int) -> dict:
+    headers = {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+    with TestClient(main.app) as client:
+        # Putaran pemanasan: cache lru/katalog & import malas tidak ikut terukur
+        for path, _, payload in CASES.values():
+            client.post(path, json=payload).raise_for_status()
+        client.delete("/admin/memory", headers=headers)
+        for _ in range(rounds):
+            for path, _, payload in CASES.values():
+                client.post(path, json=payload).raise_for_status()
+        snapshot = client.get("/admin/memory", headers=headers).json()
+    return {f"{group}:{name}": stats
+            for group in ("endpoints", "jobs", "stages")
+            for name, stats in snapshot[group].items()}
+
+
+def report(stats: dict) -> None:
+    print(f"{'key':<42} {'count':>6} {'peak_p50':>9} {'peak_p95':>9} {'peak_max':>9} {'blocks_p50':>10}")
+    for key, s in stats.items():
+        peak = s["peak_bytes"]
+        print(f"{key:<42} {s['count']:>6} {peak['p50']:>9} {peak['p95']:>9} {peak['max']:>9} "
+              f"{s['net_blocks']['p50']:>10}")
+
+
+def compare(stats: dict, baseline: dict, tolerance: float) -> int:
+    regressions = 0
+    for key, base in baseline.items():
+        if key not in stats:
+            continue
+        before, after = base["peak_bytes"]["p50"], stats[key]["peak_bytes"]["p50"]
+        if before >= MIN_COMPARED_BYTES and after > before * (1 + tolerance):
+            print(f"REGRESI {key}: peak p50 {before} → {after} (+{after / before - 1:.0%})")
+            regressions += 1
+    print(f"\n{regressions} regresi memori (toleransi {tolerance:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark memori per endpoint & tahap solver.")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--save", type=Path, help="simpan agregat sebagai baseline JSON")
+    parser.add_argument("--baseline", type=Path, help="bandingkan dengan baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    stats = collect(args.rounds)
+    report(stats)
+    if args.save:
+        args.save.write_text(json.dumps(stats, indent=2))
+    if args.baseline:
+        sys.exit(1 if compare(stats, json.loads(args.baseline.read_text()), args.tolerance) else 0)
@@ -0,0 +1,227 @@
+# benchmarks/replay.py
+
+"""
+Putar ulang log rekaman capture.py (CAPTURE_DIR) ke build kandidat lalu
+bandingkan setiap respons dengan yang terekam.
+
+    python benchmarks/replay.py CAPTURE_DIR_ATAU_FILE... [--url URL]
+                                [--speed 1.0] [--concurrency 32] [--limit N]
+                                [--ignore $.notes] [--show 10] [--json]
+
+Tanpa --url, kandidatnya adalah pohon kode ini sendiri (main.app di proses
+yang sama, mode tanpa database). `--speed` mengatur laju: 1 = sesuai jarak
+waktu terekam, 10 = sepuluh kali lebih cepat, 0 = secepat mungkin (dibatasi
+--concurrency).
+
+Laporan:
+  - hasil: respons identik / berbeda (status, atau isi JSON per path dengan
+    toleransi relatif --rel-tol untuk angka pecahan); respons non-JSON
+    dibandingkan lewat sha256
+  - latensi: persentil waktu terekam vs waktu replay dan selisihnya per
+    request, total & per rute. Waktu terekam diukur di middleware server,
+    waktu replay di klien — pada target in-process selisih keduanya kecil.
+Keluar dengan kode 1 bila ada respons yang berbeda.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+
+from loadtest import inproc_client, percentile, socket_client
+
+import capture
+
+_VARIABLE_SEGMENT = re.compile(r"^(/calculate/(?:k|sessions|results))/[^/]+")
+
+
+def load_records(paths: Iterable[str], limit: Optional[int] = None) -> List[dict]:
+    """Semua baris rekaman (termasuk file hasil rotasi), urut waktu."""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.glob("capture-*.ndjson*")) if path.is_dir() else [path])
+    records = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda r: r["ts"])
+    return records[:limit] if limit else records
+
+
+def route_of(record: dict) -> str:
+    return record["method"] + " " + _VARIABLE_SEGMENT.sub(r"\1/*", record["path"])
+
+
+# =========================
+# Perbandingan respons
+# =========================
+def diff(expected: Any, actual: Any, rel_tol: float, path: str = "$") -> List[Tuple[str, Any, Any]]:
+    """Daftar (path, terekam, replay) yang berbeda."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        out = []
+        for key in list(expected) + [k for k in actual if k not in expected]:
+            out.extend(diff(expected.get(key), actual.get(key), rel_tol, f"{path}.{key}"))
+        return out
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [(f"{path}.length", len(expected), len(actual))]
+        out = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            out.extend(diff(e, a, rel_tol, f"{path}[{i}]"))
+        return out
+    if isinstance(expected, float) or isinstance(actual, float):
+        if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+                and math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=1e-12):
+            return []
+    elif expected == actual:
+        return []
+    return [(path, expected, actual)]
+
+
+def compare(record: dict, status: int, body: bytes, rel_tol: float, ignore: List[str]) -> List[Tuple[str, Any, Any]]:
+    if status != record["status"]:
+        return [("status", record["status"], status)]
+    if "response_sha256" in record:
+        digest = hashlib.sha256(body).hexdigest()
+        return [] if digest == record["response_sha256"] else [("sha256", record["response_sha256"], digest)]
+    try:
+        actual = json.loads(body) if body else None
+    except ValueError:
+        return [("$", "<json>", body[:80].decode("latin-1"))]
+    # Sanitasi yang sama dengan saat merekam (nama masalah dipseudonimkan)
+    actual = capture.sanitize(actual)
+    return [d for d in diff(record.get("response"), actual, rel_tol)
+            if not any(d[0] == p or d[0].startswith(p + ".") or d[0].startswith(p + "[") for p in ignore)]
+
+
+# =========================
+# Replay
+# =========================
+async def _send(client: httpx.AsyncClient, record: dict) -> Tuple[int, bytes, float]:
+    url = record["path"] + (f"?{record['query']}" if record["query"] else "")
+    content = json.dumps(record["body"]).encode() if record.get("body") is not None else None
+    started = time.perf_counter()
+    response = await client.request(record["method"], url, headers=record["headers"], content=content)
+    return response.status_code, response.content, time.perf_counter() - started
+
+
+async def replay(client: httpx.AsyncClient, records: List[dict], speed: float, concurrency: int,
+                 rel_tol: float, ignore: List[str]) -> List[dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes: List[dict] = [{} for _ in records]
+
+    async def one(i: int, record: dict) -> None:
+        try:
+            status, body, seconds = await _send(client, record)
+            differences = compare(record, status, body, rel_tol, ignore)
+        except httpx.HTTPError as e:
+            seconds, differences = 0.0, [("error", None, type(e).__name__)]
+        finally:
+            semaphore.release()
+        outcomes[i] = {"index": i, "route": route_of(record), "recorded_ms": record["elapsed_ms"],
+                       "replay_ms": round(seconds * 1000, 3), "diffs": differences}
+
+    tasks = []
+    start, first_ts = time.monotonic(), records[0]["ts"] if records else 0.0
+    for i, record in enumerate(records):
+        if speed > 0:
+            delay = start + (record["ts"] - first_ts) / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await semaphore.acquire()
+        tasks.append(asyncio.create_task(one(i, record)))
+    await asyncio.gather(*tasks)
+    return outcomes
+
+
+def _ms(values: List[float]) -> dict:
+    ordered = sorted(values)
+    return {f"p{int(p * 100)}": round(percentile(ordered, p), 3) for p in (0.5, 0.9, 0.99)}
+
+
+def summarize(outcomes: List[dict], show: int) -> dict:
+    routes: Dict[str, List[dict]] = {}
+    for outcome in outcomes:
+        routes.setdefault(outcome["route"], []).append(outcome)
+
+    def latency(items: List[dict]) -> dict:
+        recorded = [o["recorded_ms"] for o in items]
+        replayed = [o["replay_ms"] for o in items]
+        deltas = [o["replay_ms"] - o["recorded_ms"] for o in items]
+        median_recorded = percentile(sorted(recorded), 0.5)
+        return {"recorded_ms": _ms(recorded), "replay_ms": _ms(replayed), "delta_ms": _ms(deltas),
+                "median_ratio": round(percentile(sorted(replayed), 0.5) / median_recorded, 3)
+                if median_recorded else None}
+
+    different = [o for o in outcomes if o["diffs"]]
+    return {
+        "requests": len(outcomes),
+        "identical": len(outcomes) - len(different),
+        "different": len(different),
+        "latency": latency(outcomes) if outcomes else {},
+        "routes": {route: {"requests": len(items), "different": sum(1 for o in items if o["diffs"]),
+                           **latency(items)} for route, items in sorted(routes.items())},
+        "examples": [{"index": o["index"], "route": o["route"],
+                      "diffs": [list(map(str, d)) for d in o["diffs"][:5]]} for o in different[:show]],
+    }
+
+
+def report(result: dict) -> None:
+    print(f"{result['requests']} request: {result['identical']} identik, {result['different']} berbeda")
+    if result["latency"]:
+        lat = result["latency"]
+        print(f"latensi terekam p50 {lat['recorded_ms']['p50']} ms → replay p50 {lat['replay_ms']['p50']} ms "
+              f"(selisih per request p50 {lat['delta_ms']['p50']:+} ms, p90 {lat['delta_ms']['p90']:+} ms, "
+              f"rasio median {lat['median_ratio']})\n")
+    print(f"{'rute':<36} {'req':>6} {'beda':>5} {'rec_p50':>8} {'rep_p50':>8} {'rec_p90':>8} {'rep_p90':>8} {'Δp50':>8}")
+    for route, r in result["routes"].items():
+        print(f"{route:<36} {r['requests']:>6} {r['different']:>5} {r['recorded_ms']['p50']:>8} "
+              f"{r['replay_ms']['p50']:>8} {r['recorded_ms']['p90']:>8} {r['replay_ms']['p90']:>8} "
+              f"{r['delta_ms']['p50']:>+8.3f}")
+    for example in result["examples"]:
+        print(f"\n#{example['index']} {example['route']}")
+        for path, expected, actual in example["diffs"]:
+            print(f"  {path}: {expected[:80]} → {actual[:80]}")
+
+
+async def main_async(args) -> dict:
+    records = load_records(args.captures, args.limit)
+    if args.url:
+        async with socket_client(args.url.rstrip("/"), args.concurrency, args.timeout) as client:
+            outcomes = await replay(client, records, args.speed, args.concurrency, args.rel_tol, args.ignore)
+    else:
+        async with inproc_client(args.timeout) as client:
+            outcomes = await replay(client, records, args.speed, args.concurrency, args.rel_tol, args.ignore)
+    return summarize(outcomes, args.show)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Putar ulang rekaman request & bandingkan respons.")
+    parser.add_argument("captures", nargs="+", help="direktori CAPTURE_DIR atau file capture-*.ndjson")
+    parser.add_argument("--url", help="build kandidat yang sudah jalan; default: main.app in-process")
+    parser.add_argument("--speed", type=float, default=1.0, help="pengali laju terekam (0 = secepatnya)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, help="hanya N request pertama")
+    parser.add_argument("--rel-tol", type=float, default=1e-9)
+    parser.add_argument("--ignore", action="append", default=[], help="path JSON yang diabaikan, misal $.notes")
+    parser.add_argument("--show", type=int, default=10, help="contoh respons berbeda yang dicetak")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        report(result)
+    sys.exit(1 if result["different"] else 0)
@@ -0,0 +1,127 @@
+# benchmarks/serialization.py
+
+"""
+Benchmark waktu encode payload respons per endpoint: jalur lama FastAPI
+(validasi ulang lewat response_model + jsonable_encoder + json.dumps) vs jalur
+cepat (hasil langsung diserialisasi pydantic-core, seperti main._json_response
+dan worker solver berat), plus ukuran & waktu encode format kolumnar ringkas
+(compact.py) sebagai JSON dan MessagePack.
+
+    python benchmarks/serialization.py [--rounds 2000]
+
+Tidak butuh database: solver dijalankan dalam mode tanpa database.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ["DATABASE_URL"] = ""   # sebelum modul proyek di-import: mode tanpa database
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+import compact
+import executor
+import main
+import schemas
+from calculator import calculate_inheritance
+
+HEIRS = [{"id": 3}, {"id": 18}, {"id": 16, "quantity": 3}, {"id": 17, "quantity": 2},
+         {"id": 21, "quantity": 2}, {"id": 9}, {"id": 12, "quantity": 4}]
+
+# endpoint → (path di aplikasi, jenis solver berat atau None untuk kalkulator dasar, payload)
+CASES = {
+    "calculate": ("/calculate/", None, {"heirs": HEIRS, "tirkah": 120_000_000}),
+    "haml": ("/calculate/haml/", "haml",
+             {"heirs": [{"id": 4}, {"id": 18}, {"id": 2}, {"id": 1, "status": "haml"}], "tirkah": 120_000_000}),
+    "mafqud": ("/calculate/mafqud/", "mafqud",
+               {"heirs": HEIRS + [{"id": 1, "status": "mafquf"}], "tirkah": 120_000_000}),
+    "khuntsa": ("/calculate/khuntsa/", "khuntsa",
+                {"heirs": [{"id": 3}, {"id": 18}, {"id": 1}], "tirkah": 120_000_000,
+                 "khuntsa_id": 1, "male_equivalent_id": 1, "female_equivalent_id": 16}),
+    "munasakhot": ("/calculate/munasakhot/", "munasakhot",
+                   {"masalah_ula": {"heirs": HEIRS, "tirkah": 120_000_000}, "mayit_tsani_id": 3,
+                    "masalah_tsaniyah_heirs": [{"id": 1}, {"id": 16, "quantity": 2}]}),
+    "gharqa": ("/calculate/gharqa/", "gharqa",
+               {"problems": [{"problem_name": f"p{i}", "heirs": HEIRS, "tirkah": 1000 * (i + 1)}
+                             for i in range(3)]}),
+}
+
+
+def build_result(kind, payload):
+    if kind is None:
+        return calculate_inheritance(None, schemas.CalculationInput.model_validate(payload))
+    module_name, fn_name, schema_name = executor.HEAVY_JOBS[kind]
+    solver = getattr(importlib.import_module(module_name), fn_name)
+    return solver(None, getattr(schemas, schema_name).model_validate(payload))
+
+
+def route_for(path):
+    for route in main.app.routes:
+        if isinstance(route, APIRoute) and route.path == path and "POST" in route.methods:
+            return route
+    raise LookupError(path)
+
+
+def _median_us(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e6
+
+
+def run(rounds: int) -> None:
+    loop = asyncio.new_event_loop()
+    print(f"{'endpoint':<12} {'bytes':>7} {'fastapi_us':>11} {'fast_us':>9} {'speedup':>8}")
+    for name, (path, kind, payload) in CASES.items():
+        result = build_result(kind, payload)
+        field = route_for(path).secure_cloned_response_field
+
+        def before():
+            content = loop.run_until_complete(serialize_response(field=field, response_content=result))
+            return JSONResponse(content).body
+
+        def after():
+            return pydantic_core.to_json(result)
+
+        # Kedua jalur harus menghasilkan dokumen JSON yang sama
+        assert json.loads(before()) == json.loads(after()), name
+        size = len(after())
+        slow = _median_us(before, rounds)
+        fast = _median_us(after, rounds)
+        print(f"{name:<12} {size:>7} {slow:>11.1f} {fast:>9.1f} {slow / fast:>7.1f}x")
+    loop.close()
+
+    media_types = [("compact", compact.MEDIA_COMPACT_JSON)]
+    try:
+        compact.negotiate("msgpack", None)
+        media_types.append(("msgpack", compact.MEDIA_MSGPACK))
+    except compact.FormatUnavailable:
+        print("\n(msgpack tidak terpasang; format MessagePack dilewati)")
+    print(f"\n{'endpoint':<12} {'format':<8} {'bytes':>7} {'vs_json':>8} {'encode_us':>10}")
+    for name, (path, kind, payload) in CASES.items():
+        result = build_result(kind, payload)
+        full_size = len(pydantic_core.to_json(result))
+        for label, media_type in media_types:
+            def encode():
+                return compact.encode(compact.convert(kind or "calculate", result), media_type)
+
+            size = len(encode())
+            print(f"{name:<12} {label:<8} {size:>7} {size / full_size:>7.0%} {_median_us(encode, rounds):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark serialisasi respons.")
+    parser.add_argument("--rounds", type=int, default=2000)
+    run(parser.parse_args().rounds)
@@ -0,0 +1,308 @@
+# benchmarks/workload.py
+
+"""
+Generator beban sintetis: payload perhitungan yang valid dengan sebaran
+keluarga yang realistis, ditulis sebagai NDJSON.
+
+    python benchmarks/workload.py --count 1000000 [--seed 1] [--jobs 4]
+                                  [--profile profil.json] [--output beban.ndjson]
+                                  [--validate 1000]
+
+Setiap baris: {"kind": "calculate", "path": "/calculate/", "payload": {...}}
+— jenis payload: calculate (CalculationInput), munasakhot, mafqud, khuntsa,
+haml, gharqa. Isi `payload` bisa langsung dikirim ke `path`, dipakai
+benchmarks/loadtest.py (--workload) atau dijalankan offline ke solver.
+
+Model keluarga (DEFAULT_PROFILE, bisa ditimpa sebagian lewat --profile JSON):
+pasangan + anak paling sering; orang tua, kakek/nenek, cucu, saudara, dan
+paman muncul dengan peluang masing-masing, sehingga kasus jadd ma‘al-ikhwah,
+akdariyyah, atau 'aul tetap jarang seperti di data nyata. Jumlah anak &
+saudara mengikuti Poisson. Hasil deterministik untuk seed yang sama, berapa
+pun --jobs (setiap blok CHUNK baris memakai seed turunannya sendiri).
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.rules.engine import ID
+
+CHUNK = 10_000
+
+PATHS = {
+    "calculate": "/calculate/",
+    "munasakhot": "/calculate/munasakhot/",
+    "mafqud": "/calculate/mafqud/",
+    "khuntsa": "/calculate/khuntsa/",
+    "haml": "/calculate/haml/",
+    "gharqa": "/calculate/gharqa/",
+}
+
+DEFAULT_PROFILE: Dict[str, Any] = {
+    "kinds": {"calculate": 0.92, "munasakhot": 0.025, "mafqud": 0.01, "khuntsa": 0.01,
+              "haml": 0.02, "gharqa": 0.015},
+    "deceased_male": 0.55,
+    "spouse_alive": 0.75,
+    "wives": [0.92, 0.06, 0.015, 0.005],      # peluang 1..4 istri
+    "children_mean": 2.6,                     # Poisson
+    "son_ratio": 0.5,
+    "father_alive": 0.3,
+    "mother_alive": 0.45,
+    "grandfather_alive": 0.12,                # hanya bila ayah sudah wafat
+    "grandmother_alive": 0.15,                # hanya bila ibu sudah wafat
+    "predeceased_son": 0.08,                  # cucu dari anak laki-laki yang sudah wafat
+    "grandchildren_mean": 2.0,
+    "siblings_listed_with_children": 0.2,     # saudara tetap didaftarkan walau ada anak
+    "siblings_listed": 0.85,
+    "siblings_mean": 2.5,
+    "sibling_kinds": {"abawayn": 0.8, "ab": 0.12, "umm": 0.08},
+    "uncles_if_distant": 0.6,                 # tanpa anak/ayah/saudara: paman/sepupu
+    "tirkah_log10": [6.0, 10.0],              # tirkah log-uniform, dibulatkan ribuan
+    "gharqa_problems": [2, 3],
+}
+
+
+def load_profile(path: Optional[str]) -> Dict[str, Any]:
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    if path:
+        overrides = json.loads(Path(path).read_text())
+        unknown = set(overrides) - set(profile)
+        if unknown:
+            raise SystemExit(f"kunci profil tidak dikenal: {', '.join(sorted(unknown))}")
+        profile.update(overrides)
+    return profile
+
+
+# =========================
+# Model keluarga
+# =========================
+def _poisson(rnd: random.Random, mean: float) -> int:
+    # Knuth; rata-rata di sini kecil (≤ ~5)
+    limit, k, p = math.exp(-mean), 0, rnd.random()
+    while p > limit:
+        k += 1
+        p *= rnd.random()
+    return k
+
+
+def _split(rnd: random.Random, total: int, male_ratio: float):
+    males = sum(1 for _ in range(total) if rnd.random() < male_ratio)
+    return males, total - males
+
+
+def _heir(out: List[dict], key: str, quantity: int = 1) -> None:
+    if quantity > 0:
+        out.append({"id": ID[key], "quantity": quantity} if quantity != 1 else {"id": ID[key]})
+
+
+class Family:
+    """Pembentuk daftar ahli waris + tirkah menurut satu profil."""
+
+    def __init__(self, profile: Dict[str, Any]):
+        self.p = profile
+        self.wife_counts = list(range(1, len(profile["wives"]) + 1))
+        self.sibling_kinds = list(profile["sibling_kinds"])
+        self.sibling_weights = list(profile["sibling_kinds"].values())
+
+    def tirkah(self, rnd: random.Random) -> float:
+        low, high = self.p["tirkah_log10"]
+        return float(round(10 ** rnd.uniform(low, high), -3) or 1000)
+
+    def heirs(self, rnd: random.Random, deceased_male: Optional[bool] = None) -> List[dict]:
+        p, out = self.p, []
+        male = rnd.random() < p["deceased_male"] if deceased_male is None else deceased_male
+        if rnd.random() < p["spouse_alive"]:
+            if male:
+                _heir(out, "ZAWJAH", rnd.choices(self.wife_counts, p["wives"])[0])
+            else:
+                _heir(out, "ZAWJ")
+
+        sons, daughters = _split(rnd, _poisson(rnd, p["children_mean"]), p["son_ratio"])
+        _heir(out, "IBN", sons)
+        _heir(out, "BINT", daughters)
+        if rnd.random() < p["predeceased_son"]:
+            grandsons, granddaughters = _split(rnd, _poisson(rnd, p["grandchildren_mean"]), p["son_ratio"])
+            _heir(out, "IBN_IBN", grandsons)
+            _heir(out, "BINT_IBN", granddaughters)
+
+        father = rnd.random() < p["father_alive"]
+        if father:
+            _heir(out, "AB")
+        elif rnd.random() < p["grandfather_alive"]:
+            _heir(out, "JADD")
+        if rnd.random() < p["mother_alive"]:
+            _heir(out, "UMM")
+        elif rnd.random() < p["grandmother_alive"]:
+            _heir(out, "JADDAH_MIN_ALUMM" if rnd.random() < 0.5 else "JADDAH_MIN_ALAB")
+
+        has_children = bool(sons or daughters)
+        listed = p["siblings_listed_with_children"] if has_children else p["siblings_listed"]
+        siblings = 0
+        if rnd.random() < listed:
+            siblings = _poisson(rnd, p["siblings_mean"])
+            kind = rnd.choices(self.sibling_kinds, self.sibling_weights)[0]
+            brothers, sisters = _split(rnd, siblings, 0.5)
+            if kind == "umm":
+                _heir(out, "AKH_UMM", brothers)
+                _heir(out, "UKHT_UMM", sisters)
+            else:
+                _heir(out, "AKH_ABAWAYN" if kind == "abawayn" else "AKH_AB", brothers)
+                _heir(out, "UKHT_ABAWAYN" if kind == "abawayn" else "UKHT_AB", sisters)
+
+        if not (has_children or father or siblings) and rnd.random() < p["uncles_if_distant"]:
+            _heir(out, "AMM_ABAWAYN" if rnd.random() < 0.7 else "IBN_AMM_ABAWAYN",
+                  1 + _poisson(rnd, 1.5))
+        if not out:
+            _heir(out, "AKH_ABAWAYN", 1 + _poisson(rnd, 1.5))
+        return out
+
+
+# =========================
+# Payload per jenis
+# =========================
+_DISTANT_IDS = {ID["IBN_AKH_ABAWAYN"], ID["IBN_AKH_AB"], ID["AMM_ABAWAYN"], ID["AMM_AB"],
+                ID["IBN_AMM_ABAWAYN"], ID["IBN_AMM_AB"]}
+
+
+def _ids(heirs: List[dict]) -> set:
+    return {h["id"] for h in heirs}
+
+
+def build(kind: str, rnd: random.Random, family: Family) -> dict:
+    heirs = family.heirs(rnd)
+    tirkah = family.tirkah(rnd)
+    if kind == "calculate":
+        return {"heirs": heirs, "tirkah": tirkah}
+
+    if kind == "mafqud":
+        # Anak laki-laki atau saudara yang hilang kabarnya
+        missing = "IBN" if rnd.random() < 0.7 else "AKH_ABAWAYN"
+        return {"heirs": heirs + [{"id": ID[missing], "status": "mafquf"}], "tirkah": tirkah}
+
+    if kind == "haml":
+        # Janin dari istri yang ditinggal: pastikan ada istri
+        if ID["ZAWJAH"] not in _ids(heirs) and ID["ZAWJ"] not in _ids(heirs):
+            heirs.insert(0, {"id": ID["ZAWJAH"]})
+        return {"heirs": heirs + [{"id": ID["IBN"], "status": "haml"}], "tirkah": tirkah}
+
+    if kind == "khuntsa":
+        male, female = ("IBN", "BINT") if rnd.random() < 0.8 else ("AKH_ABAWAYN", "UKHT_ABAWAYN")
+        if ID[male] not in _ids(heirs):
+            heirs.append({"id": ID[male]})
+        return {"heirs": heirs, "tirkah": tirkah, "khuntsa_id": ID[male],
+                "male_equivalent_id": ID[male], "female_equivalent_id": ID[female]}
+
+    if kind == "munasakhot":
+        # Mayit kedua harus mendapat bagian di masalah pertama: pasangan, orang tua, atau anak
+        present = _ids(heirs)
+        candidates = [i for i in (ID["ZAWJ"], ID["ZAWJAH"], ID["UMM"], ID["AB"], ID["IBN"], ID["BINT"])
+                      if i in present]
+        if not candidates:
+            heirs.append({"id": ID["BINT"]})
+            candidates = [ID["BINT"]]
+        second = rnd.choice(candidates)
+        # Ahli waris mayit kedua: anak-anak yang sama bila mayit kedua pasangan/orang tua, selain itu keluarga baru
+        children = [h for h in heirs if h["id"] in (ID["IBN"], ID["BINT"]) and h["id"] != second]
+        if second in (ID["ZAWJ"], ID["ZAWJAH"]) and children:
+            tsaniyah = children + ([{"id": ID["UMM"]}] if rnd.random() < 0.3 else [])
+        else:
+            tsaniyah = family.heirs(rnd, deceased_male=second in (ID["ZAWJ"], ID["AB"], ID["IBN"]))
+            # Engine belum membagi tirkah ke paman/sepupu saja (AM 0) → masalah kedua tak bisa di-jami‘ah
+            if _ids(tsaniyah) <= _DISTANT_IDS:
+                tsaniyah = [{"id": ID["UMM"]}, {"id": ID["AKH_ABAWAYN"]}]
+        return {"masalah_ula": {"heirs": heirs, "tirkah": tirkah}, "mayit_tsani_id": second,
+                "masalah_tsaniyah_heirs": tsaniyah}
+
+    if kind == "gharqa":
+        low, high = family.p["gharqa_problems"]
+        problems = [{"problem_name": f"Mayit {i + 1}", "heirs": family.heirs(rnd) if i else heirs,
+                     "tirkah": family.tirkah(rnd) if i else tirkah}
+                    for i in range(rnd.randint(low, high))]
+        return {"problems": problems}
+
+    raise ValueError(f"jenis payload tidak dikenal: {kind}")
+
+
+def generate_chunk(seed: int, chunk: int, count: int, profile: Dict[str, Any]) -> str:
+    """`count` baris NDJSON untuk blok ke-`chunk` (seed turunan → deterministik per blok)."""
+    rnd = random.Random(f"{seed}:{chunk}")
+    family = Family(profile)
+    kinds, weights = list(profile["kinds"]), list(profile["kinds"].values())
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    lines = []
+    for kind in rnd.choices(kinds, weights, k=count):
+        lines.append(dumps({"kind": kind, "path": PATHS[kind], "payload": build(kind, rnd, family)}))
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _generate_args(args):
+    return generate_chunk(*args)
+
+
+def generate(count: int, seed: int, profile: Dict[str, Any], jobs: int = 1):
+    """Iterator blok teks NDJSON, urut, total `count` baris."""
+    tasks = [(seed, i, min(CHUNK, count - i * CHUNK), profile) for i in range(math.ceil(count / CHUNK))]
+    if jobs <= 1:
+        yield from map(_generate_args, tasks)
+        return
+    with Pool(jobs) as pool:
+        yield from pool.imap(_generate_args, tasks)
+
+
+def validate(path: str, limit: int) -> None:
+    """Jalankan `limit` baris pertama lewat skema, admission, dan solver (mode tanpa database)."""
+    import importlib
+    import os
+    os.environ["DATABASE_URL"] = ""
+    import admission
+    import catalog
+    import executor
+    import schemas
+
+    catalog.load_defaults()
+    counts: Dict[str, int] = {}
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if n >= limit:
+                break
+            record = json.loads(line)
+            module_name, fn_name, schema_name = executor.HEAVY_JOBS[record["kind"]]
+            payload = getattr(schemas, schema_name).model_validate(record["payload"])
+            admission.admit(record["kind"], payload)
+            getattr(importlib.import_module(module_name), fn_name)(None, payload)
+            counts[record["kind"]] = counts.get(record["kind"], 0) + 1
+    print(f"valid: {sum(counts.values())} baris " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())),
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator payload waris sintetis (NDJSON).")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=1, help="proses generator paralel")
+    parser.add_argument("--profile", help="JSON yang menimpa sebagian DEFAULT_PROFILE")
+    parser.add_argument("--output", help="file tujuan (default stdout)")
+    parser.add_argument("--validate", type=int, default=0, metavar="N",
+                        help="setelah menulis --output, jalankan N baris pertama ke solver")
+    args = parser.parse_args()
+
+    profile = load_profile(args.profile)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for block in generate(args.count, args.seed, profile, args.jobs):
+            out.write(block)
+    finally:
+        if args.output:
+            out.close()
+    if args.validate:
+        if not args.output:
+            raise SystemExit("--validate membutuhkan --output")
+        validate(args.output, args.validate)
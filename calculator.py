@@ -1,18 +1,23 @@
 # calculator.py
 
 from __future__ import annotations
-from typing import List, Dict
-from fractions import Fraction
+import os
+from typing import TYPE_CHECKING, List, Dict, Optional, Sequence, Tuple
+from functools import lru_cache
 from math import gcd
 
-from sqlalchemy.orm import Session
-
-import crud
+import catalog
+import memtrack
 import schemas
+from tracing import Trace
 from app.rules.engine import determine_furudh
 from app.math.ashl import compute_ashl
+from app.math.rational import Rational
 from app.special.router import apply_special_cases
 
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
 
 # =========================
 # Util kecil
@@ -26,7 +31,84 @@ def _lcm(a: int, b: int) -> int:
 def _is_male_asabah_id(hid: int) -> bool:
     return hid in MALE_ASABAH_IDS
 
-def _append_mahjub_shares(db: Session, heirs_input: List[schemas.Heir], furudh_items: List[schemas.FurudhItem], notes: List[str]) -> List[schemas.HeirShare]:
+# Hasil dibangun tanpa validasi Pydantic: semua nilainya hasil hitungan sendiri,
+# jadi cukup dikonversi ke tipe field-nya (JSON-nya sama dengan konstruktor biasa).
+def _share(heir: schemas.Heir, quantity: int, share_fraction: str, saham, reason: str,
+           share_amount) -> schemas.HeirShare:
+    return schemas.HeirShare.model_construct(
+        heir=heir, quantity=int(quantity), share_fraction=share_fraction,
+        saham=float(saham), reason=reason, share_amount=float(share_amount),
+    )
+
+def _result(tirkah, ashlul_masalah_awal, ashlul_masalah_akhir, total_saham, status: str,
+            shares: List[schemas.HeirShare]) -> schemas.CalculationResult:
+    # notes diisi belakangan (dirender dari jejak) oleh calculate_inheritance
+    return schemas.CalculationResult.model_construct(
+        tirkah=float(tirkah), ashlul_masalah_awal=int(ashlul_masalah_awal),
+        ashlul_masalah_akhir=int(ashlul_masalah_akhir), total_saham=float(total_saham),
+        status=status, notes=[], shares=shares,
+    )
+
+def _trace_amount(trace: Trace, f: schemas.FurudhItem, saham, tirkah, am, amount) -> None:
+    trace.name(f.heir.id, f.heir.name_id)
+    trace.add("amount", heir_id=f.heir.id, quantity=f.quantity, saham=saham, tirkah=tirkah, am=am, amount=amount)
+
+def _trace_saham(trace: Trace, shares: List[schemas.HeirShare], saham_awal: Dict[int, int]) -> None:
+    """
+    Saham per ahli waris sebelum & sesudah tashīḥ. Tanpa tashīḥ keduanya sama;
+    Ashobah campur yang sahamnya baru dibagi setelah tashīḥ juga memakai saham akhir.
+    """
+    for s in shares:
+        saham = int(s.saham)
+        trace.add("saham", heir_id=s.heir.id, quantity=s.quantity, fraction=s.share_fraction,
+                  saham_awal=saham_awal.get(s.heir.id, saham), saham_akhir=saham)
+
+# =========================
+# Tahap furudh (hajb + kasus khusus), di-cache per tanda tangan jumlah
+# =========================
+# Hasil determine_furudh + apply_special_cases hanya bergantung pada ada/tidaknya
+# tiap ahli waris, kecuali: anak/cucu pr, saudari, dan saudara kandung/seayah
+# (hitungan "≥2 saudara" untuk Ibu) cukup dibedakan 1 vs ≥2; saudara seibu
+# dipakai persis karena penyebutnya 1/(3×n). Jumlah sebenarnya dipasang kembali
+# ke item hasil cache.
+_SIGNATURE_CAP = {7: 2, 8: 2, 16: 2, 17: 2, 21: 2, 22: 2, 9: None, 23: None}
+FURUDH_CACHE_SIZE = int(os.getenv("FURUDH_CACHE_SIZE", "4096"))
+
+FurudhStage = Tuple[List[schemas.FurudhItem], List[str], Dict[str, str]]
+
+def _first_counts(heirs: Sequence[schemas.HeirInput]) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    for h in heirs:
+        counts.setdefault(h.id, h.quantity)   # engine membaca entri pertama untuk id yang sama
+    return counts
+
+def furudh_signature(heirs: Sequence[schemas.HeirInput]) -> Tuple[Tuple[int, int], ...]:
+    signature = []
+    for hid, q in _first_counts(heirs).items():
+        cap = _SIGNATURE_CAP.get(hid, 1)
+        signature.append((hid, q if cap is None or q <= 0 else min(q, cap)))
+    return tuple(signature)
+
+@lru_cache(maxsize=FURUDH_CACHE_SIZE)
+def _furudh_for_signature(signature: Tuple[Tuple[int, int], ...]):
+    heirs = [schemas.HeirInput(id=hid, quantity=q) for hid, q in signature]
+    items = determine_furudh(None, heirs)
+    items, special_notes, calc_mode = apply_special_cases(None, heirs, items)
+    return tuple(items), tuple(special_notes), tuple(calc_mode.items())
+
+def furudh_stage(heirs: Sequence[schemas.HeirInput]) -> FurudhStage:
+    """Furudh, catatan kasus khusus & mode hitung untuk daftar ahli waris ini."""
+    return requantify(_furudh_for_signature(furudh_signature(heirs)), heirs)
+
+def requantify(stage, heirs: Sequence[schemas.HeirInput]) -> FurudhStage:
+    """Pasang jumlah sebenarnya ke item tahap furudh dengan tanda tangan yang sama."""
+    items, special_notes, calc_mode = stage
+    counts = _first_counts(heirs)
+    items = [f if f.quantity == counts[f.heir.id] else f.model_copy(update={"quantity": counts[f.heir.id]})
+             for f in items]
+    return items, list(special_notes), dict(calc_mode)
+
+def _append_mahjub_shares(db: Session, heirs_input: List[schemas.Heir], furudh_items: List[schemas.FurudhItem], trace: Trace) -> List[schemas.HeirShare]:
     """Tambahkan ke output: ahli waris yang hadir di request tapi mahjūb (tidak muncul di furudh_items)."""
     shares_mahjub: List[schemas.HeirShare] = []
     already_listed_ids = {f.heir.id for f in furudh_items}
@@ -39,6 +121,13 @@ def _append_mahjub_shares(db: Session, heirs_input: List[schemas.Heir], furudh_i
         for f in furudh_items:
             if f.heir.id == hid:
                 return f.heir
+        cached = catalog.get_heir(hid)
+        if cached:
+            return cached
+        if db is None:
+            # Mode tanpa database: katalog belum dimuat → pakai nama bawaan
+            return catalog.default_heir(hid) or schemas.Heir(id=hid, name_id=f"ID {hid}", name_ar="-")
+        import crud   # hanya untuk id di luar katalog; import sqlalchemy ditunda sampai perlu
         meta = None
         if hasattr(crud, "get_heir_by_id"):
             meta = crud.get_heir_by_id(db, hid)
@@ -53,14 +142,15 @@ def _append_mahjub_shares(db: Session, heirs_input: List[schemas.Heir], furudh_i
         if h.id not in already_listed_ids:
             heir_meta = _get_heir_meta(h.id)
             if has_son_or_grandson:
-                reason = "Mahjūb (terhalang) oleh keturunan laki-laki."
+                blocker, reason = "keturunan", "Mahjūb (terhalang) oleh keturunan laki-laki."
             elif has_father_or_grandfather:
-                reason = "Mahjūb (terhalang) oleh ayah/kakek."
+                blocker, reason = "ayah_kakek", "Mahjūb (terhalang) oleh ayah/kakek."
             else:
-                reason = "Mahjūb (terhalang) menurut kaidah hijāb."
-            notes.append(f"{heir_meta.name_id} mahjūb (terhalang).")
+                blocker, reason = "hijab", "Mahjūb (terhalang) menurut kaidah hijāb."
+            trace.name(h.id, heir_meta.name_id)
+            trace.add("mahjub", heir_id=h.id, quantity=h.quantity, by=blocker)
             shares_mahjub.append(
-                schemas.HeirShare(
+                _share(
                     heir=heir_meta,
                     quantity=h.quantity,
                     share_fraction="-",
@@ -76,7 +166,7 @@ def _append_mahjub_shares(db: Session, heirs_input: List[schemas.Heir], furudh_i
 # Distribusi Ashobah Campur 2:1 (umum)
 # =========================
 def _distribute_ashobah_mixed(ashobah_items: List[schemas.FurudhItem], sisa: int,
-                              saham_map: Dict[int, int], notes: List[str]) -> None:
+                              saham_map: Dict[int, int], trace: Trace) -> None:
     """
     Bagi sisa untuk kelompok Ashobah campur (2:1). Lakukan tashīḥ jika perlu.
     """
@@ -90,17 +180,15 @@ def _distribute_ashobah_mixed(ashobah_items: List[schemas.FurudhItem], sisa: int
     g = gcd(sisa, total_heads)
     k = total_heads // g  # faktor tashīḥ
     if k > 1:
-        notes.append(f"Inkisār Ashobah: sisa = {sisa}, total bobot = {total_heads} → tashīḥ ×{k}.")
+        trace.add("inkisar", sisa=sisa, bobot=total_heads, k=k)
         # Caller harus mengalikan AM juga; di sini kita hanya bagi proporsional.
     # Distribusi proporsional (integer setelah tashīḥ)
     for f in ashobah_items:
         w = 2 if f.heir.id in MALE_ASABAH_IDS else 1
         bagian = (sisa * (w * f.quantity)) // total_heads
         saham_map[f.heir.id] = saham_map.get(f.heir.id, 0) + bagian
-        if f.quantity > 1:
-            notes.append(f"{f.heir.name_id} ({f.quantity} orang) mendapat {bagian} saham dari sisa (Ashobah 2:1).")
-        else:
-            notes.append(f"{f.heir.name_id} mendapat {bagian} saham dari sisa (Ashobah 2:1).")
+        trace.name(f.heir.id, f.heir.name_id)
+        trace.add("ashobah_share", heir_id=f.heir.id, quantity=f.quantity, saham=bagian)
 
 
 # =========================
@@ -111,9 +199,9 @@ VALID_AUL = {
     12: [13, 15, 17],
     24: [27],
 }
-def _handle_aul(AM_awal: int, total_saham: int, notes: List[str]) -> int:
+def _handle_aul(AM_awal: int, total_saham: int, trace: Trace) -> int:
     if AM_awal in VALID_AUL and total_saham in VALID_AUL[AM_awal]:
-        notes.append(f"Terjadi Aul: total saham {total_saham} > AM awal {AM_awal}. AM akhir = {total_saham}.")
+        trace.add("aul", total_saham=total_saham, am=AM_awal)
         return total_saham
     return AM_awal
 
@@ -121,23 +209,82 @@ def _handle_aul(AM_awal: int, total_saham: int, notes: List[str]) -> int:
 # =========================
 # Fungsi Utama
 # =========================
-def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInput) -> schemas.CalculationResult:
+def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInput,
+                          render_notes: bool = True) -> schemas.CalculationResult:
+    """Hasil perhitungan; `notes` dirender dari jejak kecuali render_notes=False."""
+    result, trace = calculate_traced(db, calculation_input)
+    if render_notes:
+        with memtrack.stage("calculate.notes"):
+            result.notes = trace.render_notes()
+    return result
+
+
+def calculate_traced(db: Session, calculation_input: schemas.CalculationInput,
+                     furudh: Optional[FurudhStage] = None) -> Tuple[schemas.CalculationResult, Trace]:
+    """
+    Hasil (notes kosong) beserta jejak perhitungan terstrukturnya. `furudh` =
+    hasil tahap furudh yang sudah diketahui (lihat requantify), bila ada.
+    """
+    trace = Trace()
+    with memtrack.stage("calculate.solve"):
+        return _calculate(db, calculation_input, trace, furudh), trace
+
+
+def retarget_tirkah(result: schemas.CalculationResult, trace: Trace,
+                    tirkah: float) -> Tuple[schemas.CalculationResult, Trace]:
+    """
+    Tahap nominal saja: furudh, saham & AM tidak bergantung pada tirkah, jadi
+    hanya nominal (dan record `amount` di jejak) yang dihitung ulang.
+    """
+    retargeted = Trace()
+    retargeted.names = trace.names
+    amounts = []
+    for step, data in trace.records:
+        if step == "amount":
+            amount = (data["saham"] / data["am"]) * tirkah if data["am"] else 0.0
+            data = {**data, "tirkah": tirkah, "amount": amount}
+            amounts.append(amount)
+        retargeted.records.append((step, data))
+    # Urutan shares = urutan record amount (item furudh), lalu ahli waris mahjūb (nominal 0)
+    shares = [_share(s.heir, s.quantity, s.share_fraction, s.saham, s.reason,
+                     round(amounts[i], 2) if i < len(amounts) else 0.0)
+              for i, s in enumerate(result.shares)]
+    return result.model_copy(update={"tirkah": float(tirkah), "shares": shares, "notes": []}), retargeted
+
+
+def calculate_with_trace(db: Session, calculation_input: schemas.CalculationInput) -> schemas.CalculationTraceResult:
+    """Bentuk respons /calculate/trace: hasil + jejak + saham & nominal per ahli waris."""
+    result, trace = calculate_traced(db, calculation_input)
+    saham = {d["heir_id"]: d for step, d in trace.records if step == "saham"}
+    saham_items, final_amounts = [], []
+    for s in result.shares:
+        d = saham[s.heir.id]
+        saham_items.append(schemas.SahamItem.model_construct(
+            heir=s.heir, quantity=s.quantity, saham_awal=d["saham_awal"], saham_akhir=d["saham_akhir"],
+            share_fraction=s.share_fraction, reason=s.reason,
+        ))
+        final_amounts.append(schemas.FinalAmount.model_construct(
+            heir=s.heir, quantity=s.quantity, saham=d["saham_akhir"],
+            amount_each=(s.share_amount / s.quantity) if s.quantity else 0.0, total_amount=s.share_amount,
+        ))
+    return schemas.CalculationTraceResult.model_construct(
+        result=result, trace=trace.to_models(), saham=saham_items, final_amounts=final_amounts,
+    )
+
+
+def _calculate(db: Session, calculation_input: schemas.CalculationInput, trace: Trace,
+               furudh: Optional[FurudhStage] = None) -> schemas.CalculationResult:
     heirs = calculation_input.heirs
     tirkah = calculation_input.tirkah
 
-    notes: List[str] = []
     shares: List[schemas.HeirShare] = []
 
-    # --- DEFAULT calc_mode
-    calc_mode = {"mode": "normal"}
-
-    # 1) Tentukan furudh
-    notes.append("Menentukan furudh ahli waris sesuai ketentuan syar’i")
-    furudh_items = determine_furudh(db, heirs)
-
-    # 1b) Kasus-kasus khusus (Akdariyyah, al-‘Add, Jadd-Ikhwah)
-    furudh_items, special_notes, calc_mode = apply_special_cases(db, heirs, furudh_items)
-    notes.extend(special_notes)
+    # 1) Tentukan furudh + 1b) kasus-kasus khusus (Akdariyyah, al-‘Add, Jadd-Ikhwah)
+    with memtrack.stage("calculate.furudh"):
+        furudh_items, special_notes, calc_mode = furudh if furudh is not None else furudh_stage(heirs)
+    trace.add("furudh", items=[[f.heir.id, f.fraction, f.quantity] for f in furudh_items])
+    for text in special_notes:
+        trace.add("special", text=text)
 
     # 2) Ambil penyebut furudh
     denominators = [f.denominator for f in furudh_items if f.fraction != "Ashobah" and f.denominator > 0]
@@ -151,25 +298,24 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
 
         # ---------- MODE KHUSUS: Jadd ma‘al-Ikhwah ----------
         if mode == "jadd_ikhwah":
-            notes.append("Kasus Jadd ma‘al-Ikhwah: membandingkan 3 opsi (muqāsamah, 1/3 sisa, 1/6 total).")
-
             # Kepala untuk muqāsamah: Jadd = 2, Ikhwah: lk=2, pr=1
             head_jadd = 2  # Jadd dihitung laki-laki
             male_sibs = sum(f.quantity for f in furudh_items if f.fraction == "Ashobah" and f.heir.id in {7, 8})
             female_sibs = sum(f.quantity for f in furudh_items if f.fraction == "Ashobah" and f.heir.id in {21, 22})
             head_sibs = 2 * male_sibs + 1 * female_sibs
+            trace.add("jadd_ikhwah", head_jadd=head_jadd, head_sibs=head_sibs)
 
             if head_sibs == 0:
                 # tidak ada saudara → jadd ashabah penuh
                 AM = head_jadd
                 ashl_info = schemas.AshlInfo(ashl_awal=AM, ashl_akhir=AM, comparisons=[], total_saham=AM, status="Adil")
                 saham_map: Dict[int, int] = {6: head_jadd}
-                notes.append(f"Tidak ada saudara; Jadd menjadi Ashobah penuh. AM = {AM}.")
+                trace.add("jadd_option", option="ashobah_penuh", am=AM)
             else:
                 # Bandingkan 3 opsi dengan porsi dari TOTAL (karena tidak ada fard)
-                frac_muq = Fraction(head_jadd, head_jadd + head_sibs)  # porsi Jadd bila muqāsamah
-                frac_1_3 = Fraction(1, 3)
-                frac_1_6 = Fraction(1, 6)
+                frac_muq = Rational(head_jadd, head_jadd + head_sibs)  # porsi Jadd bila muqāsamah
+                frac_1_3 = Rational(1, 3)
+                frac_1_6 = Rational(1, 6)
                 best = max([("muqasamah", frac_muq), ("one_third_resid", frac_1_3), ("one_sixth_total", frac_1_6)],
                            key=lambda x: x[1])
 
@@ -186,7 +332,7 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
                             saham_map[f.heir.id] = saham_map.get(f.heir.id, 0) + 2 * f.quantity
                         if f.heir.id in {21, 22}:
                             saham_map[f.heir.id] = saham_map.get(f.heir.id, 0) + 1 * f.quantity
-                    notes.append(f"Memilih muqāsamah: Jadd {frac_muq} (> 1/3, > 1/6). AM = {AM} (jumlah kepala).")
+                    trace.add("jadd_option", option="muqasamah", portion=str(frac_muq), am=AM)
 
                 elif best[0] == "one_third_resid":
                     # Jadd = 1/3 total; saudara = 2/3 total proporsional 2:1
@@ -203,7 +349,7 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
                             saham_map[f.heir.id] = saham_map.get(f.heir.id, 0) + (1 * f.quantity) * per_head
 
                     ashl_info = schemas.AshlInfo(ashl_awal=AM, ashl_akhir=AM, comparisons=[], total_saham=AM, status="Adil")
-                    notes.append(f"Memilih 1/3 sisa: AM ditashīḥ menjadi {AM} agar bulat.")
+                    trace.add("jadd_option", option="one_third_resid", am=AM)
 
                 else:  # "one_sixth_total"
                     AM = _lcm(6, head_sibs) or 6 * head_sibs
@@ -219,7 +365,7 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
                             saham_map[f.heir.id] = saham_map.get(f.heir.id, 0) + (1 * f.quantity) * per_head
 
                     ashl_info = schemas.AshlInfo(ashl_awal=AM, ashl_akhir=AM, comparisons=[], total_saham=AM, status="Adil")
-                    notes.append(f"Memilih 1/6 total: AM ditashīḥ menjadi {AM} agar bulat.")
+                    trace.add("jadd_option", option="one_sixth_total", am=AM)
 
             # ---- Bangun output final dari saham_map + AM ----
             total_saham = sum(saham_map.values())
@@ -227,26 +373,22 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
                 if f.heir.id in saham_map:
                     saham = saham_map[f.heir.id]
                     amount = (saham / ashl_info.ashl_akhir) * tirkah
-                    if f.quantity == 1:
-                        notes.append(f"{f.heir.name_id} = {saham} × {tirkah:,.0f} ÷ {ashl_info.ashl_akhir} = Rp {amount:,.0f}")
-                    else:
-                        per_orang = amount / f.quantity
-                        notes.append(f"{f.heir.name_id} ({f.quantity} orang) = {saham} × {tirkah:,.0f} ÷ {ashl_info.ashl_akhir} = Rp {amount:,.0f} → masing-masing Rp {per_orang:,.0f}")
-                    shares.append(schemas.HeirShare(
+                    _trace_amount(trace, f, saham, tirkah, ashl_info.ashl_akhir, amount)
+                    shares.append(_share(
                         heir=f.heir, quantity=f.quantity, share_fraction="Ashobah",
                         saham=saham, reason=f.reason, share_amount=round(amount, 2)
                     ))
 
             # tampilkan mahjūb (mis. ukht seayah yang akhirnya 0 karena hijāb)
-            shares.extend(_append_mahjub_shares(db, heirs, furudh_items, notes))
+            shares.extend(_append_mahjub_shares(db, heirs, furudh_items, trace))
+            _trace_saham(trace, shares, {})
 
-            return schemas.CalculationResult(
+            return _result(
                 tirkah=tirkah,
                 ashlul_masalah_awal=ashl_info.ashl_awal,
                 ashlul_masalah_akhir=ashl_info.ashl_akhir,
                 total_saham=total_saham,
                 status="Adil",
-                notes=notes,
                 shares=shares
             )
 
@@ -268,30 +410,26 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
 
             AM = total_bobot
             ashl_info = schemas.AshlInfo(ashl_awal=AM, ashl_akhir=AM, comparisons=[], total_saham=AM, status="Adil")
-            notes.append(f"Semua ahli waris adalah Ashobah → Ashlul Mas'alah = total bobot = {AM}")
+            trace.add("all_ashobah", am=AM)
 
             for f in furudh_items:
                 saham = saham_map[f.heir.id]
                 amount = (saham / AM) * tirkah
-                if f.quantity == 1:
-                    notes.append(f"{f.heir.name_id} = {saham} × {tirkah:,.0f} ÷ {AM} = Rp {amount:,.0f}")
-                else:
-                    per_orang = amount / f.quantity
-                    notes.append(f"{f.heir.name_id} ({f.quantity} orang) = {saham} × {tirkah:,.0f} ÷ {AM} = Rp {amount:,.0f} → masing-masing Rp {per_orang:,.0f}")
-                shares.append(schemas.HeirShare(
+                _trace_amount(trace, f, saham, tirkah, AM, amount)
+                shares.append(_share(
                     heir=f.heir, quantity=f.quantity, share_fraction="Ashobah",
                     saham=saham, reason=f.reason, share_amount=round(amount, 2)
                 ))
 
-            shares.extend(_append_mahjub_shares(db, heirs, furudh_items, notes))
+            shares.extend(_append_mahjub_shares(db, heirs, furudh_items, trace))
+            _trace_saham(trace, shares, {})
 
-            return schemas.CalculationResult(
+            return _result(
                 tirkah=tirkah,
                 ashlul_masalah_awal=AM,
                 ashlul_masalah_akhir=AM,
                 total_saham=AM,
                 status="Adil",
-                notes=notes,
                 shares=shares
             )
 
@@ -301,11 +439,11 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
     # CABANG UMUM: Ada furudh tetap → hitung AM, saham furudh, sisa, dst.
     # ============================================================
     AM_awal = ashl_info.ashl_awal
-    notes.append(f"Menentukan Ashlul Mas’alah: {AM_awal}")
+    trace.add("ashl", am=AM_awal)
 
     # Tambahkan perbandingan antar penyebut (kalau ada)
     for c in ashl_info.comparisons:
-        notes.append(f"Penyebut {c.a} & {c.b} = {c.relation}")
+        trace.add("comparison", a=c.a, b=c.b, relation=c.relation, lcm=c.lcm)
 
     # 3) Hitung saham furudh (non-Ashobah)
     saham_map: Dict[int, int] = {}
@@ -318,23 +456,24 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
             saham_total = saham_per_orang * f.quantity
             saham_map[f.heir.id] = saham_map.get(f.heir.id, 0) + saham_total
             total_saham_furudh += saham_total
-            if f.quantity == 1:
-                notes.append(f"{f.heir.name_id}: {saham_per_orang} saham karena {f.fraction} dari {AM_awal}")
-            else:
-                notes.append(f"{f.heir.name_id}: {saham_total} saham karena {f.fraction} (kelompok) dari {AM_awal}")
+            trace.name(f.heir.id, f.heir.name_id)
+            trace.add("saham_furudh", heir_id=f.heir.id, fraction=f.fraction, quantity=f.quantity,
+                      per_orang=saham_per_orang, total=saham_total, am=AM_awal)
         else:
             ashobah_items.append(f)
 
     # 4) Hitung sisa untuk Ashobah (kalau ada)
     sisa = AM_awal - total_saham_furudh
     AM_akhir = AM_awal
+    saham_awal: Dict[int, int] = {}   # saham sebelum tashīḥ (hanya terisi bila ada tashīḥ)
 
     if ashobah_items and sisa > 0:
         if len(ashobah_items) == 1:
             # 1 Ashobah → ambil semua sisa
             sole = ashobah_items[0]
             saham_map[sole.heir.id] = saham_map.get(sole.heir.id, 0) + sisa
-            notes.append(f"{sole.heir.name_id} mendapat sisa {sisa} saham sebagai Ashobah")
+            trace.name(sole.heir.id, sole.heir.name_id)
+            trace.add("sisa", heir_id=sole.heir.id, sisa=sisa)
         else:
             # Ashobah campur 2:1
             # Jika sisa tidak habis terhadap bobot, lakukan tashīḥ (mengubah AM)
@@ -343,45 +482,42 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
             total_heads = male_heads + female_heads
             if total_heads > 0 and sisa % total_heads != 0:
                 k = total_heads // gcd(sisa, total_heads)
-                notes.append(f"Inkisār Ashobah: sisa = {sisa}, total bobot = {total_heads} → tashīḥ ×{k}. AM akhir: {AM_akhir} × {k} = {AM_akhir * k}")
+                trace.add("tashih", sisa=sisa, bobot=total_heads, k=k, am=AM_akhir)
+                saham_awal = dict(saham_map)
                 # skala saham furudh yang sudah ada
                 for hid in list(saham_map.keys()):
                     saham_map[hid] *= k
                 sisa *= k
                 AM_akhir *= k
             # distribusi
-            _distribute_ashobah_mixed(ashobah_items, sisa, saham_map, notes)
+            _distribute_ashobah_mixed(ashobah_items, sisa, saham_map, trace)
 
     # 5) Tentukan status (Adil/Aul/Radd)
     total_saham_final = sum(saham_map.values())
     status = "Adil"
     if total_saham_final > AM_akhir:
         # Aul hanya kalau ada di tabel valid
-        new_AM = _handle_aul(AM_akhir, total_saham_final, notes)
+        new_AM = _handle_aul(AM_akhir, total_saham_final, trace)
         if new_AM != AM_akhir:
             AM_akhir = new_AM
             status = "Aul"
         else:
             # jika tidak valid, anggap adil (sesuai permintaan sebelumnya)
-            notes.append(f"⚠️ Total saham {total_saham_final} tidak sesuai daftar Aul untuk AM {AM_akhir} → dianggap Adil (AM tetap).")
+            trace.add("aul_invalid", total_saham=total_saham_final, am=AM_akhir)
             status = "Adil"
     elif total_saham_final < AM_akhir:
         # Radd sederhana: AM akhir = total_saham_final, kecuali ada pasangan + pola khusus (sudah kamu buat di modul radd)
         status = "Radd"
         AM_akhir = total_saham_final
-        notes.append(f"Terjadi Radd: total saham {total_saham_final} < AM awal {ashl_info.ashl_awal}. AM akhir: {AM_akhir}")
+        trace.add("radd", total_saham=total_saham_final, am_awal=ashl_info.ashl_awal, am_akhir=AM_akhir)
 
     # 6) Hitung nominal akhir + catatan rumus
     for f in furudh_items:
         saham_final = saham_map.get(f.heir.id, 0)
         amount = (saham_final / AM_akhir) * tirkah if AM_akhir else 0.0
-        if f.quantity == 1:
-            notes.append(f"{f.heir.name_id} = {saham_final} × {tirkah:,.0f} ÷ {AM_akhir} = Rp {amount:,.0f}")
-        else:
-            per_orang = (amount / f.quantity) if f.quantity else 0.0
-            notes.append(f"{f.heir.name_id} ({f.quantity} orang) = {saham_final} × {tirkah:,.0f} ÷ {AM_akhir} = Rp {amount:,.0f} → masing-masing Rp {per_orang:,.0f}")
+        _trace_amount(trace, f, saham_final, tirkah, AM_akhir, amount)
         shares.append(
-            schemas.HeirShare(
+            _share(
                 heir=f.heir,
                 quantity=f.quantity,
                 share_fraction=f.fraction,
@@ -392,15 +528,15 @@ def calculate_inheritance(db: Session, calculation_input: schemas.CalculationInp
         )
 
     # 7) Tambahkan mahjūb (supaya transparan)
-    shares.extend(_append_mahjub_shares(db, heirs, furudh_items, notes))
+    shares.extend(_append_mahjub_shares(db, heirs, furudh_items, trace))
+    _trace_saham(trace, shares, saham_awal)
 
     # 8) Return
-    return schemas.CalculationResult(
+    return _result(
         tirkah=tirkah,
         ashlul_masalah_awal=ashl_info.ashl_awal,
         ashlul_masalah_akhir=AM_akhir,
         total_saham=sum(saham_map.values()),
         status=status,
-        notes=notes,
         shares=shares
     )
@@ -8,6 +8,7 @@ import crud
 import schemas
 import models
 import jadd_wal_ikhwah
+from app.math.rational import Rational, lcm_denominators
 from fractions import Fraction
 import math
 from typing import List, Dict, Set, Tuple, Any
@@ -640,24 +641,16 @@ def handle_masalah_al_add(selected_heirs: List[Dict], blocked_heirs: Set[str],
     # Tashih jika perlu
     all_saham = [kakek['saham'], saudari_kandung['saham']] + [h['saham'] for h in seayah_siblings] + [h['saham'] for h in other_dzawil_furudh]
     
-    denominators = []
-    for s in all_saham:
-        if isinstance(s, float) and not s.is_integer():
-            frac = Fraction(s).limit_denominator(1000)
-            denominators.append(frac.denominator)
-    
-    if denominators:
-        tashih_multiplier = denominators[0]
-        for d in denominators[1:]:
-            tashih_multiplier = math.lcm(tashih_multiplier, d)
+    tashih_multiplier = lcm_denominators(
+        Rational.from_float(s) for s in all_saham if isinstance(s, float) and not s.is_integer()
+    )
+    if tashih_multiplier > 1:
+        notes.append(f"Tashih al-'Add: {ashlul_masalah_awal} × {tashih_multiplier} = {ashlul_masalah_awal * tashih_multiplier}")
+        ashlul_masalah_awal *= tashih_multiplier
         
-        if tashih_multiplier > 1:
-            notes.append(f"Tashih al-'Add: {ashlul_masalah_awal} × {tashih_multiplier} = {ashlul_masalah_awal * tashih_multiplier}")
-            ashlul_masalah_awal *= tashih_multiplier
-            
-            for h in selected_heirs:
-                if h.get('saham', 0) > 0:
-                    h['saham'] *= tashih_multiplier
+        for h in selected_heirs:
+            if h.get('saham', 0) > 0:
+                h['saham'] *= tashih_multiplier
     
     return ashlul_masalah_awal
 
@@ -1069,8 +1062,6 @@ def apply_radd_with_spouse(selected_heirs: List[Dict], ashlul_masalah_awal: int)
 def apply_inkisar(selected_heirs: List[Dict], ashlul_masalah_akhir: int, 
                   notes: List[str]) -> int:
     """Menerapkan Inkisar (Tashihul Mas'alah) jika diperlukan."""
-    from decimal import Decimal
-    
     # Cari kelompok yang perlu Inkisar (saham tidak habis dibagi jumlah)
     inkisar_groups = []
     for h in selected_heirs:
@@ -1080,11 +1071,8 @@ def apply_inkisar(selected_heirs: List[Dict], ashlul_masalah_akhir: int,
             
         saham_val = h.get('saham', 0)
         if saham_val > 0:
-            saham_decimal = Decimal(str(saham_val))
-            quantity_decimal = Decimal(str(h['quantity']))
-            
             # Jika saham tidak habis dibagi quantity, butuh Inkisar
-            if saham_decimal % quantity_decimal != 0:
+            if not (Rational.of(saham_val) / h['quantity']).is_integer():
                 inkisar_groups.append(h)
     
     if not inkisar_groups:
@@ -1102,8 +1090,7 @@ def apply_inkisar(selected_heirs: List[Dict], ashlul_masalah_akhir: int,
             multipliers.append(h['quantity'] // gcd_val)
         else:
             # Saham adalah pecahan
-            frac = Fraction(saham_val).limit_denominator(1000)
-            multipliers.append(frac.denominator)
+            multipliers.append(Rational.of(saham_val).denominator)
     
     # Hitung KPK dari semua pengali
     if multipliers:
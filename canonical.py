@@ -0,0 +1,86 @@
+# canonical.py
+
+"""
+Bentuk kanonik sebuah request perhitungan.
+
+Dua request dianggap sama bila multiset ahli warisnya (id, jumlah, penghalang,
+status), tirkah-nya, dan tingkat detailnya sama, tanpa peduli urutan input.
+"""
+
+import hashlib
+import json
+from typing import List, Sequence
+
+from pydantic import BaseModel
+
+import schemas
+
+DETAIL_LENGKAP = "lengkap"   # hasil lengkap dengan catatan langkah
+DETAIL_RINGKAS = "ringkas"   # tanpa catatan (notes kosong)
+
+
+def canonical_heirs(heirs: Sequence[schemas.HeirInput]) -> List[schemas.HeirInput]:
+    """
+    Urutkan ahli waris berdasarkan id. Urutan stabil dipakai supaya bila id yang
+    sama muncul dua kali, entri pertama tetap yang dibaca oleh engine.
+    """
+    return sorted(heirs, key=lambda h: h.id)
+
+
+def request_key(kind: str, heirs: Sequence[schemas.HeirInput], tirkah: float,
+                detail: str = DETAIL_LENGKAP) -> str:
+    """Hash SHA-256 dari bentuk kanonik request."""
+    body = {
+        "kind": kind,
+        "heirs": [[h.id, h.quantity, h.penghalang, h.status] for h in canonical_heirs(heirs)],
+        "tirkah": tirkah,
+        "detail": detail,
+    }
+    raw = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def canonicalize(payload: BaseModel) -> BaseModel:
+    """
+    Salinan payload dengan setiap daftar ahli waris (termasuk yang bersarang,
+    misal `masalah_ula.heirs` atau `problems[i].heirs`) dalam urutan kanonik.
+    """
+    updates = {}
+    for name, value in payload:
+        if isinstance(value, BaseModel):
+            updates[name] = canonicalize(value)
+        elif isinstance(value, list) and value:
+            if all(isinstance(v, schemas.HeirInput) for v in value):
+                updates[name] = canonical_heirs(value)
+            elif all(isinstance(v, BaseModel) for v in value):
+                updates[name] = [canonicalize(v) for v in value]
+    return payload.model_copy(update=updates)
+
+
+def payload_digest(kind: str, payload: BaseModel) -> str:
+    """Hash SHA-256 dari jenis perhitungan + payload yang sudah kanonik."""
+    raw = kind + "\n" + payload.model_dump_json()
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# =========================
+# Kunci path untuk GET /calculate/k/{heir_key}
+# =========================
+# Format: id ahli waris urut naik dipisah "-", jumlah >1 ditulis "x<n>".
+# Contoh: Suami, Ibu, 2 Saudari Kandung → "3-18-21x2"
+def encode_heir_key(heirs: Sequence[schemas.HeirInput]) -> str:
+    parts = []
+    for h in canonical_heirs(heirs):
+        parts.append(str(h.id) if h.quantity == 1 else f"{h.id}x{h.quantity}")
+    return "-".join(parts)
+
+
+def decode_heir_key(heir_key: str) -> List[schemas.HeirInput]:
+    """Kebalikan encode_heir_key. ValueError bila formatnya salah."""
+    heirs = []
+    for part in heir_key.split("-"):
+        id_text, _, qty_text = part.partition("x")
+        if not id_text.isdigit() or (qty_text and not qty_text.isdigit()):
+            raise ValueError(f"Bagian kunci ahli waris tidak valid: {part!r}")
+        heirs.append(schemas.HeirInput(id=int(id_text), quantity=int(qty_text) if qty_text else 1))
+    return heirs
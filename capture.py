@@ -0,0 +1,171 @@
+# capture.py
+
+"""
+Perekam request /calculate* opsional untuk perbandingan performa (replay).
+
+Aktif bila CAPTURE_DIR diisi. Setiap request ke rute berawalan /calculate
+dicatat sebagai satu baris NDJSON di CAPTURE_DIR/capture-<pid>.ndjson (satu
+file per proses worker; dirotasi setiap CAPTURE_MAX_BYTES, CAPTURE_BACKUPS
+cadangan):
+
+    {"ts": 1760000000.123, "method": "POST", "path": "/calculate/", "query": "",
+     "headers": {"accept": "..."}, "body": {...}, "status": 200,
+     "elapsed_ms": 3.21, "response": {...}}
+
+Sanitasi: hanya header yang memengaruhi hasil (CAPTURED_HEADERS) yang
+disimpan — Idempotency-Key, cookie, token, dsb. dibuang — dan field teks
+bebas (FREE_TEXT_FIELDS, misal nama masalah gharqa) diganti pseudonim stabil.
+Respons JSON disanitasi dengan cara yang sama (nama masalah ikut tergema di
+hasil gharqa); respons non-JSON (format compact/msgpack) hanya disimpan
+sebagai sha256-nya.
+
+Penulisan ke disk dilakukan thread QueueListener, jadi event loop hanya
+menanggung encode JSON satu baris. Putar ulang dengan benchmarks/replay.py.
+"""
+
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import time
+from typing import Any, Optional
+
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", "")
+CAPTURE_MAX_BYTES = int(os.getenv("CAPTURE_MAX_BYTES", str(50 * 1024 * 1024)))
+CAPTURE_BACKUPS = int(os.getenv("CAPTURE_BACKUPS", "5"))
+CAPTURE_PREFIX = "/calculate"
+
+CAPTURED_HEADERS = ("accept", "content-type", "x-deadline-seconds")
+FREE_TEXT_FIELDS = frozenset({"problem_name"})
+
+_PSEUDONYM = re.compile(r"teks-[0-9a-f]{10}")
+
+_logger = logging.getLogger("zahrotul.capture")
+_logger.propagate = False
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def enabled() -> bool:
+    return _listener is not None
+
+
+def start(directory: Optional[str] = None) -> None:
+    """Mulai merekam ke `directory` (default CAPTURE_DIR); tanpa direktori tidak melakukan apa pun."""
+    global _listener
+    directory = directory or CAPTURE_DIR
+    if not directory or _listener is not None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    # Per proses: RotatingFileHandler tidak aman dirotasi bersamaan oleh banyak proses
+    handler = logging.handlers.RotatingFileHandler(
+        os.path.join(directory, f"capture-{os.getpid()}.ndjson"),
+        maxBytes=CAPTURE_MAX_BYTES, backupCount=CAPTURE_BACKUPS, encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _logger.handlers = [logging.handlers.QueueHandler(records)]
+    _logger.setLevel(logging.INFO)
+    _listener = logging.handlers.QueueListener(records, handler)
+    _listener.start()
+
+
+def stop() -> None:
+    """Tulis sisa antrean ke disk lalu berhenti merekam."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        _logger.handlers = []
+
+
+def pseudonym(text: str) -> str:
+    """Pseudonim stabil; teks yang sudah berupa pseudonim dikembalikan apa adanya."""
+    if _PSEUDONYM.fullmatch(text):
+        return text
+    return "teks-" + hashlib.sha256(text.encode()).hexdigest()[:10]
+
+
+def sanitize(value: Any) -> Any:
+    """Salinan body dengan field teks bebas diganti pseudonim."""
+    if isinstance(value, dict):
+        return {k: pseudonym(v) if k in FREE_TEXT_FIELDS and isinstance(v, str) else sanitize(v)
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize(v) for v in value]
+    return value
+
+
+def _json_body(body: bytes, content_type: str) -> Optional[Any]:
+    if body and "json" in content_type:
+        try:
+            return sanitize(json.loads(body))
+        except ValueError:
+            pass
+    return None
+
+
+def record(scope, request_body: bytes, status: int, response_headers, response_body: bytes,
+           started: float, elapsed: float) -> None:
+    headers = {}
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").lower()
+        if name in CAPTURED_HEADERS:
+            headers[name] = value.decode("latin-1")
+    response_type = ""
+    for name, value in response_headers or ():
+        if name.lower() == b"content-type":
+            response_type = value.decode("latin-1")
+    response = {"response": _json_body(response_body, response_type)}
+    if response["response"] is None and response_body:
+        response = {"response_sha256": hashlib.sha256(response_body).hexdigest()}
+    _logger.info(json.dumps({
+        "ts": round(started, 6),
+        "method": scope["method"],
+        "path": scope["path"],
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "headers": headers,
+        "body": _json_body(request_body, headers.get("content-type", "")),
+        "status": status,
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "response_type": response_type,
+        **response,
+    }, ensure_ascii=False, separators=(",", ":")))
+
+
+class CaptureMiddleware:
+    """Middleware ASGI: rekam request & respons rute /calculate* selama perekaman aktif."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _listener is None or not scope["path"].startswith(CAPTURE_PREFIX):
+            return await self.app(scope, receive, send)
+        request_chunks, response_chunks = [], []
+        response = {"status": 0, "headers": None}
+        started_wall, started = time.time(), time.perf_counter()
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_chunks.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers")
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            record(scope, b"".join(request_chunks), response["status"] or 500, response["headers"],
+                   b"".join(response_chunks), started_wall, time.perf_counter() - started)
@@ -0,0 +1,103 @@
+# catalog.py
+
+"""
+Katalog ahli waris di memori (id → nama Indonesia & Arab).
+
+Tabel `heirs` hanya berisi 25 baris dan hampir tidak pernah berubah, jadi
+cukup dibaca sekali per proses. Kalkulator memakai katalog ini lebih dulu
+sebelum jatuh ke query database.
+
+DEFAULT_HEIRS mengikuti pemetaan id yang dipakai engine aturan
+(app/rules/engine.py); dipakai dalam mode tanpa database.
+"""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import schemas
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+DEFAULT_HEIRS = (
+    (1, "Anak Laki-laki", "ابن"),
+    (2, "Ayah", "أب"),
+    (3, "Suami", "زوج"),
+    (4, "Istri", "زوجة"),
+    (5, "Cucu Laki-laki", "ابن ابن"),
+    (6, "Kakek", "جد"),
+    (7, "Saudara Laki-laki Kandung", "أخ لأبوين"),
+    (8, "Saudara Laki-laki Seayah", "أخ لأب"),
+    (9, "Saudara Laki-laki Seibu", "أخ لأم"),
+    (10, "Keponakan Laki-laki (dari Sdr Lk Kandung)", "ابن أخ لأبوين"),
+    (11, "Keponakan Laki-laki (dari Sdr Lk Seayah)", "ابن أخ لأب"),
+    (12, "Paman Kandung", "عم لأبوين"),
+    (13, "Paman Seayah", "عم لأب"),
+    (14, "Sepupu Laki-laki (dari Paman Kandung)", "ابن عم لأبوين"),
+    (15, "Sepupu Laki-laki (dari Paman Seayah)", "ابن عم لأب"),
+    (16, "Anak Perempuan", "بنت"),
+    (17, "Cucu Perempuan", "بنت ابن"),
+    (18, "Ibu", "أم"),
+    (19, "Nenek dari Ibu", "جدة من الأم"),
+    (20, "Nenek dari Ayah", "جدة من الأب"),
+    (21, "Saudari Kandung", "أخت لأبوين"),
+    (22, "Saudari Seayah", "أخت لأب"),
+    (23, "Saudari Seibu", "أخت لأم"),
+    (24, "Pria Pembebas Budak", "معتق"),
+    (25, "Wanita Pembebas Budak", "معتقة"),
+)
+
+_heirs: Dict[int, schemas.Heir] = {}
+
+
+def load_from_db(db: Session) -> int:
+    """Isi ulang katalog dari tabel `heirs`. Mengembalikan jumlah baris."""
+    import crud
+    rows = crud.get_heir_rows(db, limit=None)
+    return load_rows([(row.id, row.name_id, row.name_ar) for row in rows])
+
+
+def load_rows(rows) -> int:
+    """Isi ulang katalog dari daftar (id, name_id, name_ar), misal dari snapshot warm-start."""
+    _heirs.clear()
+    for hid, name_id, name_ar in rows:
+        _heirs[hid] = schemas.Heir(id=hid, name_id=name_id, name_ar=name_ar)
+    return len(_heirs)
+
+
+def load_defaults() -> int:
+    """Isi katalog dari DEFAULT_HEIRS (mode tanpa database)."""
+    return load_rows(DEFAULT_HEIRS)
+
+
+def default_heir(hid: int) -> Optional[schemas.Heir]:
+    for default_id, name_id, name_ar in DEFAULT_HEIRS:
+        if default_id == hid:
+            return schemas.Heir(id=hid, name_id=name_id, name_ar=name_ar)
+    return None
+
+
+def get_heir(hid: int) -> Optional[schemas.Heir]:
+    return _heirs.get(hid)
+
+
+def is_loaded() -> bool:
+    return bool(_heirs)
+
+
+def verify_rows(rows) -> List[str]:
+    """
+    Bandingkan baris tabel `heirs` dengan pemetaan ID engine aturan.
+    Mengembalikan daftar ketidakcocokan (kosong = aman dipakai engine).
+    """
+    from app.rules.engine import ID
+
+    stored = {row.id: row.name_id for row in rows}
+    defaults = {hid: name_id for hid, name_id, _ in DEFAULT_HEIRS}
+    problems = []
+    for key, hid in sorted(ID.items(), key=lambda item: item[1]):
+        if hid not in stored:
+            problems.append(f"ID {hid} ({key}) tidak ada di tabel heirs")
+        elif stored[hid] != defaults.get(hid):
+            problems.append(f"ID {hid} ({key}) tersimpan sebagai {stored[hid]!r}, seharusnya {defaults.get(hid)!r}")
+    return problems
@@ -0,0 +1,270 @@
+# compact.py
+
+"""
+Format respons kolumnar ringkas untuk klien mesin yang sudah mengenal katalog
+ahli waris.
+
+Alih-alih daftar objek `shares` (objek `heir` lengkap + teks `reason` panjang
+per ahli waris), setiap daftar bagian dikirim sebagai array paralel:
+
+    {"heir_ids": [3, 18], "quantity": [1, 1], "fraction": [2, 7],
+     "saham": [3.0, 1.0], "share_amount": [..], "reason": [1, 4]}
+
+`fraction` dan `reason` berisi kode = indeks ke tabel FRACTIONS / REASONS
+(GET /calculate/codes). Teks yang tidak ada di tabel dikirim apa adanya
+(string), jadi klien cukup memakai `tabel[c] if isinstance(c, int) else c`.
+Tabel hanya boleh ditambah di ujungnya; setiap perubahan menaikkan
+CODES_VERSION (dikirim di header X-Compact-Codes).
+
+Tersedia sebagai JSON (application/vnd.faraidh.compact+json) dan MessagePack
+(application/msgpack, butuh paket `msgpack`).
+
+Catatan langkah (`notes`) adalah bagian terbesar payload dan tidak dikirim
+kecuali diminta: `?notes=true` atau parameter media type `;notes=1` di Accept.
+Pilihan itu dibawa sebagai parameter media type (`...; notes=1`) sampai ke
+encoder, jadi Content-Type respons juga menunjukkan apakah notes disertakan.
+"""
+
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pydantic_core
+
+CODES_VERSION = 1
+
+MEDIA_COMPACT_JSON = "application/vnd.faraidh.compact+json"
+MEDIA_MSGPACK = "application/msgpack"
+_MSGPACK_ALIASES = (MEDIA_MSGPACK, "application/x-msgpack")
+_PLAIN_JSON = ("application/json", "application/*", "*/*")
+NOTES_PARAM = "notes=1"
+
+FRACTIONS = ("-", "Ashobah", "1/2", "1/3", "1/4", "1/6", "1/8", "2/3")
+
+REASONS = (
+    # Mahjub (calculator._append_mahjub_shares)
+    "Mahjūb (terhalang) oleh keturunan laki-laki.",
+    "Mahjūb (terhalang) oleh ayah/kakek.",
+    "Mahjūb (terhalang) menurut kaidah hijāb.",
+    "Ashobah",
+    # Tabel furudh (app/rules/engine.py)
+    "Suami mendapat 1/4 karena pewaris punya anak/cucu",
+    "Suami mendapat 1/2 karena pewaris tidak punya anak/cucu",
+    "Istri mendapat 1/8 karena pewaris punya anak/cucu",
+    "Istri mendapat 1/4 karena pewaris tidak punya anak/cucu",
+    "Ibu mendapat 1/6 karena ada keturunan atau ≥2 saudara",
+    "Ibu mendapat 1/3 karena tanpa keturunan & <2 saudara",
+    "Ayah mendapat 1/6 karena ada keturunan; sisanya sebagai Ashobah.",
+    "Ayah menjadi Ashobah karena tanpa keturunan.",
+    "Kakek mendapat 1/6 karena ada keturunan; sisanya sebagai Ashobah.",
+    "Kakek menjadi Ashobah karena tanpa keturunan.",
+    "Nenek (pihak ibu) 1/6 karena Ibu tiada dan tanpa penghalang.",
+    "Nenek (pihak ayah) 1/6 karena Ibu/Ayah tiada dan tanpa penghalang.",
+    "Anak laki-laki menjadi Ashobah (mengambil sisa).",
+    "Anak perempuan bersama anak laki-laki: Ashobah bil-ghair (2:1).",
+    "Anak perempuan tunggal 1/2 karena tanpa anak laki-laki.",
+    "≥2 anak perempuan mendapat 2/3 bersama, dibagi rata.",
+    "Cucu laki-laki menjadi Ashobah karena tidak ada anak.",
+    "Cucu perempuan tunggal 1/2 karena tanpa anak/cucu lk.",
+    "≥2 cucu perempuan 2/3 bersama karena tanpa anak/cucu lk.",
+    "Cucu perempuan mendapat 1/6 untuk menyempurnakan 2/3 bersama anak perempuan.",
+    "Saudara seibu (1 orang) mendapat 1/6 karena tanpa keturunan & ayah/kakek.",
+    "Saudara seibu (≥2) mendapat 1/3 bersama, dibagi rata lintas gender.",
+    "Saudari kandung tunggal 1/2 bila tanpa keturunan & ayah/kakek.",
+    "≥2 saudari kandung 2/3 bersama bila tanpa keturunan & ayah/kakek.",
+    "Saudari kandung bersama anak/cucu perempuan: Ashobah ma‘a al-ghair.",
+    "Saudara laki-laki kandung menjadi Ashobah bila tanpa keturunan & ayah/kakek.",
+    "Saudari kandung bersama saudara laki-laki kandung: Ashobah ma‘a al-ākh (2:1).",
+    "Saudari seayah tunggal 1/2 bila tanpa keturunan & ayah/kakek serta tanpa saudari kandung.",
+    "≥2 saudari seayah 2/3 bersama bila tanpa keturunan & ayah/kakek serta tanpa saudari kandung.",
+    "Saudari seayah bersama anak/cucu perempuan: Ashobah ma‘a al-ghair.",
+    "Saudara laki-laki seayah menjadi Ashobah bila tanpa keturunan & ayah/kakek.",
+    "Saudari seayah bersama saudara laki-laki seayah: Ashobah ma‘a al-ākh (2:1).",
+    "Keponakan (dari sdr lk kandung) menjadi Ashobah karena tidak ada ‘ashabah di atasnya.",
+    "Keponakan (dari sdr lk seayah) menjadi Ashobah karena tidak ada ‘ashabah di atasnya.",
+    "Paman kandung menjadi Ashobah karena tidak ada ‘ashabah di atasnya.",
+    "Paman seayah menjadi Ashobah karena tidak ada ‘ashabah di atasnya.",
+    "Sepupu (dari paman kandung) menjadi Ashobah karena tidak ada ‘ashabah di atasnya.",
+    "Sepupu (dari paman seayah) menjadi Ashobah karena tidak ada ‘ashabah di atasnya.",
+    "Wala’ (pria pembebas budak) mewarisi karena tidak ada dzawi al-furudh & ‘ashobah nasab.",
+    "Wala’ (wanita pembebas budak) mewarisi karena tidak ada dzawi al-furudh & ‘ashobah nasab.",
+    # Kasus khusus (app/special/akdariyyah.py)
+    "Akdariyyah: Suami tetap 1/2.",
+    "Akdariyyah: Ibu 1/6 karena bersama Jadd.",
+    "Akdariyyah: Jadd 1/6 lalu muqasamah dengan Ukht.",
+    "Akdariyyah: Ukht jadi asabah ma‘a al-Jadd (muqasamah 2:1 pada sisa).",
+    # Mauquf (mauquf._solve_mauquf_generic)
+    "Menerima bagian terkecil dari semua skenario.",
+)
+
+_FRACTION_CODE = {text: code for code, text in enumerate(FRACTIONS)}
+_REASON_CODE = {text: code for code, text in enumerate(REASONS)}
+
+
+class FormatUnavailable(Exception):
+    """Format yang diminta butuh dependensi opsional yang tidak terpasang."""
+
+
+def codes() -> Dict[str, Any]:
+    return {"version": CODES_VERSION, "fractions": list(FRACTIONS), "reasons": list(REASONS)}
+
+
+# =========================
+# Konversi (objek hasil atau bentuk JSON-nya → kolumnar)
+# =========================
+# Hasil perhitungan dasar dikonversi langsung dari atribut model (jalur panas,
+# tanpa to_jsonable_python); hasil dari penyimpanan berupa dict hasil json.loads.
+def _getter(obj) -> Callable[[Any, str], Any]:
+    return operator.getitem if isinstance(obj, dict) else getattr
+
+def _fraction(text: str):
+    return _FRACTION_CODE.get(text, text)
+
+def _reason(text: str):
+    return _REASON_CODE.get(text, text)
+
+def calculation(result, notes: bool = False) -> Dict[str, Any]:
+    get = _getter(result)
+    shares = get(result, "shares")
+    get_share = _getter(shares[0]) if shares else get
+    heirs = [get_share(s, "heir") for s in shares]
+    get_heir = _getter(heirs[0]) if heirs else get
+    doc = {
+        "tirkah": get(result, "tirkah"),
+        "ashlul_masalah_awal": get(result, "ashlul_masalah_awal"),
+        "ashlul_masalah_akhir": get(result, "ashlul_masalah_akhir"),
+        "total_saham": get(result, "total_saham"),
+        "status": get(result, "status"),
+        "heir_ids": [get_heir(h, "id") for h in heirs],
+        "quantity": [get_share(s, "quantity") for s in shares],
+        "fraction": [_fraction(get_share(s, "share_fraction")) for s in shares],
+        "saham": [get_share(s, "saham") for s in shares],
+        "share_amount": [get_share(s, "share_amount") for s in shares],
+        "reason": [_reason(get_share(s, "reason")) for s in shares],
+    }
+    if notes:
+        doc["notes"] = get(result, "notes")
+    return doc
+
+def mauquf(result: Dict[str, Any], notes: bool = False) -> Dict[str, Any]:
+    shares = result["pembagian_sekarang"]
+    return {
+        "tirkah": result["tirkah"],
+        "dana_mauquf": result["dana_mauquf"],
+        "pembagian_sekarang": {
+            "heir_ids": [s["heir"]["id"] for s in shares],
+            "quantity": [s["quantity"] for s in shares],
+            "share_amount_yakin": [s["share_amount_yakin"] for s in shares],
+            "reason": [_reason(s["reason"]) for s in shares],
+        },
+        "detail_skenarios": {name: calculation(r, notes) for name, r in result["detail_skenarios"].items()},
+    }
+
+def munasakhot(result: Dict[str, Any], notes: bool = False) -> Dict[str, Any]:
+    shares = result["final_shares"]
+    return {
+        "detail_masalah_ula": calculation(result["detail_masalah_ula"], notes),
+        "detail_masalah_tsaniyah": calculation(result["detail_masalah_tsaniyah"], notes),
+        "perbandingan": result["perbandingan"],
+        "jamiiah": result["jamiiah"],
+        "final_shares": {
+            "heir_ids": [s["heir"]["id"] for s in shares],
+            "saham": [s["saham"] for s in shares],
+            "share_amount": [s["share_amount"] for s in shares],
+        },
+    }
+
+def gharqa(results: List[Dict[str, Any]], notes: bool = False) -> List[Dict[str, Any]]:
+    # Dari worker: dict biasa berisi objek CalculationResult
+    return [{"problem_name": r["problem_name"], "result": calculation(r["result"], notes)} for r in results]
+
+
+# Jenis perhitungan → konverter (sama dengan nama di executor.HEAVY_JOBS)
+CONVERTERS: Dict[str, Callable[[Any, bool], Any]] = {
+    "calculate": calculation,
+    "mafqud": mauquf,
+    "khuntsa": mauquf,
+    "haml": mauquf,
+    "munasakhot": munasakhot,
+    "gharqa": gharqa,
+}
+
+
+def convert(kind: str, result: Any, notes: bool = False) -> Any:
+    """`result` berupa objek respons (model Pydantic) atau hasil json.loads dari JSON-nya."""
+    if kind != "calculate" and not isinstance(result, (dict, list)):
+        result = pydantic_core.to_jsonable_python(result)
+    return CONVERTERS[kind](result, notes)
+
+
+# =========================
+# Negosiasi & encoding
+# =========================
+def _load_msgpack():
+    try:
+        import msgpack
+    except ImportError:   # dependensi opsional
+        raise FormatUnavailable("Format MessagePack membutuhkan paket `msgpack`.") from None
+    return msgpack
+
+def _accepted(accept: Optional[str]) -> Dict[str, Tuple[float, Dict[str, str]]]:
+    """Media type di header Accept → (q, parameternya). Yang ber-q=0 berarti "tidak diterima" dan dibuang."""
+    accepted = {}
+    for part in (accept or "").split(","):
+        media, *raw_params = part.split(";")
+        params = {}
+        for param in raw_params:
+            name, _, value = param.partition("=")
+            params[name.strip().lower()] = value.strip().strip('"')
+        try:
+            quality = float(params.get("q", "1"))
+        except ValueError:
+            quality = 1.0
+        media = media.strip().lower()
+        if media and quality > 0:
+            accepted[media] = (quality, params)
+    return accepted
+
+def negotiate(fmt: Optional[str], accept: Optional[str], notes: bool = False) -> Optional[str]:
+    """
+    Media type ringkas yang diminta lewat query `format` (compact | msgpack)
+    atau header Accept; None = format lengkap biasa. Bila notes diminta (argumen
+    `notes` atau parameter `notes=1` di Accept), hasilnya berparameter `; notes=1`.
+
+    `format` eksplisit selalu menang atas Accept. Tanpa `format`, dipilih tipe
+    dengan q tertinggi; bila JSON biasa (application/json, application/*, */*)
+    lebih tinggi daripada semua tipe ringkas, hasilnya None. Pada q yang sama
+    tipe ringkas yang disebut eksplisit menang, MessagePack lebih dulu.
+    """
+    accepted = _accepted(accept)
+    if fmt in ("msgpack", "compact"):
+        media_type = MEDIA_MSGPACK if fmt == "msgpack" else MEDIA_COMPACT_JSON
+    else:
+        ranked = [(accepted[m][0], m) for m in _MSGPACK_ALIASES + (MEDIA_COMPACT_JSON,) if m in accepted]
+        if not ranked:
+            return None
+        # max() stabil: pada q sama, urutan di atas (msgpack dulu) yang dipakai
+        quality, media_type = max(ranked, key=operator.itemgetter(0))
+        if quality < max((accepted[m][0] for m in _PLAIN_JSON if m in accepted), default=0):
+            return None
+        if media_type in _MSGPACK_ALIASES:
+            media_type = MEDIA_MSGPACK
+    if media_type == MEDIA_MSGPACK:
+        _load_msgpack()
+        aliases = _MSGPACK_ALIASES
+    else:
+        aliases = (MEDIA_COMPACT_JSON,)
+    if notes or any(accepted[m][1].get("notes") in ("1", "true") for m in aliases if m in accepted):
+        return f"{media_type}; {NOTES_PARAM}"
+    return media_type
+
+def wants_notes(media_type: str) -> bool:
+    return media_type.endswith(NOTES_PARAM)
+
+def encode(doc: Any, media_type: str) -> bytes:
+    if media_type.startswith(MEDIA_MSGPACK):
+        return _load_msgpack().packb(doc, use_bin_type=True)
+    return pydantic_core.to_json(doc)
+
+def render(kind: str, result: Any, media_type: str) -> bytes:
+    """convert + encode sesuai media type hasil `negotiate` (termasuk pilihan notes)."""
+    return encode(convert(kind, result, wants_notes(media_type)), media_type)
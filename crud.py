@@ -1,5 +1,10 @@
 # Di dalam file: crud.py
 
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 import models
 import schemas
@@ -27,10 +32,139 @@ def get_heirs(db: Session, skip: int = 0, limit: int = 100):
     Fungsi untuk mengambil daftar semua ahli waris dari database.
     'skip' dan 'limit' berguna untuk paginasi jika data sudah banyak.
     """
-    return db.query(models.Heir).offset(skip).limit(limit).all()
+    return db.query(models.Heir).order_by(models.Heir.id).offset(skip).limit(limit).all()
+
+def heir_rows_query(after_id: Optional[int] = None, limit: Optional[int] = 100):
+    """SELECT proyeksi kolom + keyset untuk get_heir_rows (dipakai juga versi async)."""
+    stmt = select(models.Heir.id, models.Heir.name_id, models.Heir.name_ar).order_by(models.Heir.id)
+    if after_id is not None:
+        stmt = stmt.where(models.Heir.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def get_heir_rows(db: Session, after_id: Optional[int] = None, limit: Optional[int] = 100):
+    """
+    Versi ringan get_heirs: paginasi keyset (id > after_id) dan hanya kolom yang
+    dibutuhkan, tanpa membuat objek ORM / identity map. Baris tetap punya atribut
+    .id, .name_id, .name_ar. Halaman berikutnya: after_id = id baris terakhir.
+    """
+    return db.execute(heir_rows_query(after_id, limit)).all()
 
 def get_heirs_by_ids(db: Session, heir_ids: list[int]):
     """
     Fungsi untuk mengambil beberapa ahli waris berdasarkan daftar ID.
     """
-    return db.query(models.Heir).filter(models.Heir.id.in_(heir_ids)).all()
\ No newline at end of file
+    return db.query(models.Heir).filter(models.Heir.id.in_(heir_ids)).all()
+
+def heirs_upsert_rows(heirs: list[schemas.Heir]) -> dict:
+    """id → baris; bila ID yang sama muncul dua kali, entri terakhir yang dipakai."""
+    return {h.id: {"id": h.id, "name_id": h.name_id, "name_ar": h.name_ar} for h in heirs}
+
+def heirs_upsert_statements(dialect: str, rows: dict) -> list:
+    """
+    Satu INSERT multi-baris `ON CONFLICT (id) DO UPDATE` (+ penyesuaian sequence di
+    PostgreSQL). List kosong bila dialeknya tidak mendukung; pemanggil memakai merge.
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return []
+    stmt = insert(models.Heir).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Heir.id],
+        set_={"name_id": stmt.excluded.name_id, "name_ar": stmt.excluded.name_ar},
+    )
+    statements = [stmt]
+    if dialect == "postgresql":
+        # ID eksplisit tidak memajukan sequence; tanpa ini POST /heirs/ berikutnya bentrok
+        statements.append(text("SELECT setval(pg_get_serial_sequence('heirs', 'id'), (SELECT MAX(id) FROM heirs))"))
+    return statements
+
+def upsert_heirs(db: Session, heirs: list[schemas.Heir], commit: bool = True):
+    """
+    Simpan banyak ahli waris sekaligus dengan ID eksplisit dalam satu statement.
+    Dengan commit=False pemanggil yang memutuskan commit/rollback.
+    """
+    rows = heirs_upsert_rows(heirs)
+    if not rows:
+        return []
+    statements = heirs_upsert_statements(db.get_bind().dialect.name, rows)
+    for stmt in statements:
+        db.execute(stmt)
+    if not statements:
+        for row in rows.values():
+            db.merge(models.Heir(**row))
+        db.flush()
+    if commit:
+        db.commit()
+    return sorted(get_heirs_by_ids(db, list(rows)), key=lambda h: h.id)
+# --- Penyimpanan hasil perhitungan (content-addressed) ---
+def get_stored_result(db: Session, digest: str, not_before: datetime):
+    """
+    Ambil hasil tersimpan berdasarkan hash input, selama belum melewati masa simpan.
+    """
+    return (
+        db.query(models.StoredResult)
+        .filter(models.StoredResult.digest == digest, models.StoredResult.created_at >= not_before)
+        .first()
+    )
+
+def get_idempotency_key(db: Session, key: str, not_before: datetime):
+    return (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.key == key, models.IdempotencyKey.created_at >= not_before)
+        .first()
+    )
+
+def is_expired(created_at: datetime, not_before: Optional[datetime]) -> bool:
+    """True bila baris sudah melewati masa simpan (tetapi belum di-purge)."""
+    if not_before is None:
+        return False
+    if created_at.tzinfo is None:   # SQLite mengembalikan datetime tanpa zona waktu
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at < not_before
+
+def refresh_result(row, kind: str, request_json: str, result_json: str, now: datetime) -> None:
+    """Segarkan baris hasil yang kedaluwarsa seolah baru disimpan."""
+    row.kind, row.request_json, row.result_json, row.created_at = kind, request_json, result_json, now
+
+def save_result(db: Session, digest: str, kind: str, request_json: str, result_json: str,
+                idempotency_key: Optional[str] = None, not_before: Optional[datetime] = None):
+    """
+    Simpan hasil perhitungan (dan kunci idempotensinya bila ada).
+    Bila request identik sempat tersimpan lebih dulu oleh proses lain, cukup diabaikan.
+    Baris yang sudah lewat `not_before` (kedaluwarsa, belum di-purge) ditimpa — tanpa itu
+    lookup terus meleset dan hasilnya tidak pernah tersimpan lagi sampai purge berikutnya.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        existing = db.get(models.StoredResult, digest)
+        if existing is None:
+            db.add(models.StoredResult(digest=digest, kind=kind, request_json=request_json,
+                                       result_json=result_json, created_at=now))
+        elif is_expired(existing.created_at, not_before):
+            refresh_result(existing, kind, request_json, result_json, now)
+        if idempotency_key:
+            entry = db.get(models.IdempotencyKey, idempotency_key)
+            if entry is None:
+                db.add(models.IdempotencyKey(key=idempotency_key, digest=digest, created_at=now))
+            elif is_expired(entry.created_at, not_before):
+                entry.digest, entry.created_at = digest, now
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+def purge_results(db: Session, before: datetime) -> int:
+    """Hapus hasil & kunci idempotensi yang lebih tua dari `before`. Mengembalikan jumlah hasil terhapus."""
+    expired = db.query(models.StoredResult.digest).filter(models.StoredResult.created_at < before)
+    db.query(models.IdempotencyKey).filter(
+        (models.IdempotencyKey.created_at < before) | models.IdempotencyKey.digest.in_(expired)
+    ).delete(synchronize_session=False)
+    deleted = db.query(models.StoredResult).filter(models.StoredResult.created_at < before).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    return deleted
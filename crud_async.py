@@ -0,0 +1,96 @@
+# Di dalam file: crud_async.py
+
+"""
+Padanan async dari fungsi-fungsi crud.py yang dipakai langsung oleh route
+(AsyncSession). Statement SQL-nya dibangun oleh crud.py agar kedua versi
+selalu menjalankan query yang sama.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+import models
+import schemas
+
+
+async def get_heir_by_name(db: AsyncSession, name_id: str):
+    result = await db.execute(select(models.Heir).where(models.Heir.name_id == name_id).limit(1))
+    return result.scalars().first()
+
+async def create_heir(db: AsyncSession, heir: schemas.HeirCreate):
+    db_heir = models.Heir(name_id=heir.name_id, name_ar=heir.name_ar)
+    db.add(db_heir)
+    await db.commit()
+    await db.refresh(db_heir)
+    return db_heir
+
+async def get_heir_rows(db: AsyncSession, after_id: Optional[int] = None, limit: Optional[int] = 100):
+    """Lihat crud.get_heir_rows (keyset + proyeksi kolom)."""
+    result = await db.execute(crud.heir_rows_query(after_id, limit))
+    return result.all()
+
+async def get_heirs_by_ids(db: AsyncSession, heir_ids: list[int]):
+    result = await db.execute(select(models.Heir).where(models.Heir.id.in_(heir_ids)).order_by(models.Heir.id))
+    return result.scalars().all()
+
+async def upsert_heirs(db: AsyncSession, heirs: list[schemas.Heir], commit: bool = True):
+    """Lihat crud.upsert_heirs."""
+    rows = crud.heirs_upsert_rows(heirs)
+    if not rows:
+        return []
+    statements = crud.heirs_upsert_statements(db.bind.dialect.name, rows)
+    for stmt in statements:
+        await db.execute(stmt)
+    if not statements:
+        for row in rows.values():
+            await db.merge(models.Heir(**row))
+        await db.flush()
+    if commit:
+        await db.commit()
+    return await get_heirs_by_ids(db, list(rows))
+
+# --- Penyimpanan hasil perhitungan (content-addressed) ---
+async def get_stored_result(db: AsyncSession, digest: str, not_before: datetime):
+    result = await db.execute(
+        select(models.StoredResult)
+        .where(models.StoredResult.digest == digest, models.StoredResult.created_at >= not_before)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+async def get_idempotency_key(db: AsyncSession, key: str, not_before: datetime):
+    result = await db.execute(
+        select(models.IdempotencyKey)
+        .where(models.IdempotencyKey.key == key, models.IdempotencyKey.created_at >= not_before)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+async def save_result(db: AsyncSession, digest: str, kind: str, request_json: str, result_json: str,
+                      idempotency_key: Optional[str] = None, not_before: Optional[datetime] = None):
+    """
+    Lihat crud.save_result: request identik yang sempat tersimpan lebih dulu diabaikan,
+    baris yang sudah kedaluwarsa (lewat `not_before`) ditimpa.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        existing = await db.get(models.StoredResult, digest)
+        if existing is None:
+            db.add(models.StoredResult(digest=digest, kind=kind, request_json=request_json,
+                                       result_json=result_json, created_at=now))
+        elif crud.is_expired(existing.created_at, not_before):
+            crud.refresh_result(existing, kind, request_json, result_json, now)
+        if idempotency_key:
+            entry = await db.get(models.IdempotencyKey, idempotency_key)
+            if entry is None:
+                db.add(models.IdempotencyKey(key=idempotency_key, digest=digest, created_at=now))
+            elif crud.is_expired(entry.created_at, not_before):
+                entry.digest, entry.created_at = digest, now
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
@@ -1,12 +1,239 @@
 import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 load_dotenv() # Memuat variabel dari file .env
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+# Default: diturunkan dari DATABASE_URL (psycopg2 → asyncpg, sqlite → aiosqlite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Pengaturan pool koneksi (berlaku untuk engine sync maupun async)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # detik; di bawah idle timeout server/proxy
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # detik menunggu koneksi bebas
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False")
+
+Base = declarative_base()
+
+# Engine dibuat saat pertama kali dipakai, bukan saat modul di-import,
+# supaya test/skrip offline bisa meng-import apa saja tanpa menyentuh database.
+_engine: Optional[Engine] = None
+_async_engine = None
+_engine_lock = threading.Lock()
+
+
+def db_enabled() -> bool:
+    """False = mode tanpa database (DATABASE_URL kosong)."""
+    return bool(SQLALCHEMY_DATABASE_URL)
+
+
+# =========================
+# Metrik pool koneksi
+# =========================
+class PoolMetrics:
+    """Lama tunggu checkout koneksi & jumlah timeout untuk satu pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_last = 0.0
+        self._wait_sum = 0.0
+        self._wait_max = 0.0
+
+    def record(self, waited: float) -> None:
+        with self._lock:
+            self._checkouts += 1
+            self._wait_last = waited
+            self._wait_sum += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def stats(self, pool: Optional[QueuePool]) -> Dict[str, Any]:
+        with self._lock:
+            result: Dict[str, Any] = {
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "wait_seconds_last": round(self._wait_last, 6),
+                "wait_seconds_avg": round(self._wait_sum / self._checkouts, 6) if self._checkouts else 0.0,
+                "wait_seconds_max": round(self._wait_max, 6),
+            }
+        if pool is not None:
+            capacity = pool.size() + max(DB_MAX_OVERFLOW, 0)
+            result.update({
+                "pool_size": pool.size(),
+                "max_overflow": DB_MAX_OVERFLOW,
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "saturation": round(pool.checkedout() / capacity, 4) if capacity else 0.0,
+            })
+        return result
+
+
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+class _TimedPoolMixin:
+    """Ukur lama menunggu koneksi bebas di setiap checkout."""
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+
+class _TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics = sync_pool_metrics
+
+
+class _TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def _pool_kwargs(url: str, poolclass) -> Dict[str, Any]:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}   # SQLite di memori memakai pool khusus satu koneksi
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url() -> str:
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    url = make_url(SQLALCHEMY_DATABASE_URL)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+
+# =========================
+# Engine sync (startup, CLI, solver di thread/proses)
+# =========================
+def get_engine() -> Engine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            if not db_enabled():
+                raise RuntimeError("DATABASE_URL belum diatur (mode tanpa database).")
+            _engine = create_engine(SQLALCHEMY_DATABASE_URL,
+                                    **_pool_kwargs(SQLALCHEMY_DATABASE_URL, _TimedQueuePool))
+        return _engine
+
+
+def dispose_engine_after_fork() -> None:
+    """Proses hasil fork tidak boleh memakai ulang koneksi DB milik parent."""
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+
+
+class _LazySession(Session):
+    """Sesi yang baru mengikat engine ketika benar-benar menjalankan query."""
+
+    def get_bind(self, *args, **kwargs):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(*args, **kwargs)
+
+
+SessionLocal = sessionmaker(class_=_LazySession, autocommit=False, autoflush=False)
+
+
+# =========================
+# Engine async (route yang membutuhkan DB)
+# =========================
+def get_async_engine():
+    global _async_engine
+    with _engine_lock:
+        if _async_engine is None:
+            if not db_enabled():
+                raise RuntimeError("DATABASE_URL belum diatur (mode tanpa database).")
+            from sqlalchemy.ext.asyncio import create_async_engine
+            url = async_database_url()
+            _async_engine = create_async_engine(url, **_pool_kwargs(url, _TimedAsyncQueuePool))
+        return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """Tutup koneksi async; koneksi terikat ke event loop yang sedang berjalan."""
+    global _async_engine
+    engine, _async_engine = _async_engine, None
+    if engine is not None:
+        await engine.dispose()
+
+
+class LazyAsyncSession:
+    """
+    Pembungkus AsyncSession yang baru membuat sesinya saat atribut pertama
+    dipakai, jadi handler yang tidak menyentuh DB tidak membuka sesi sama sekali.
+    """
+
+    def __init__(self):
+        self._session = None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            from sqlalchemy.ext.asyncio import AsyncSession
+            self._session = AsyncSession(get_async_engine(), autoflush=False, expire_on_commit=False)
+        return getattr(self._session, name)
+
+    async def aclose(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def get_async_db():
+    """Dependency FastAPI: sesi async malas, atau None dalam mode tanpa database."""
+    if not db_enabled():
+        yield None
+        return
+    db = LazyAsyncSession()
+    try:
+        yield db
+    finally:
+        await db.aclose()
+
+
+def pool_stats() -> Dict[str, Any]:
+    return {
+        "sync": sync_pool_metrics.stats(_engine.pool if _engine is not None else None),
+        "async": async_pool_metrics.stats(_async_engine.sync_engine.pool if _async_engine is not None else None),
+    }
+
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+def __getattr__(name: str):
+    # Kompatibilitas untuk `from database import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,352 @@
+# executor.py
+
+"""
+Pool eksekusi terpisah untuk rute API.
+
+Secara default Starlette menjalankan semua rute `def` di satu threadpool anyio,
+sehingga query DB `/heirs/` dan perhitungan `/calculate/*` (CPU-bound) saling
+antre. Modul ini memisahkan keduanya:
+  - pool "calc" : perhitungan faraidh, bisa thread atau process (CALC_EXECUTOR)
+  - pool "db"   : akses database (selalu thread)
+  - pool "heavy": solver berat (mauquf, munasakhot, gharqa), selalu process,
+                  dipanaskan dengan katalog ahli waris, diberi tenggat per request & antrean terbatas
+Setiap pool mencatat gauge kedalaman antrean dan lama tunggu sendiri-sendiri.
+"""
+
+from __future__ import annotations
+import asyncio
+import importlib
+import os
+import signal
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import memtrack
+
+# =========================
+# Konfigurasi (dari environment)
+# =========================
+CALC_EXECUTOR = os.getenv("CALC_EXECUTOR", "thread")          # "thread" | "process"
+CALC_WORKERS = int(os.getenv("CALC_WORKERS", str(os.cpu_count() or 2)))
+DB_WORKERS = int(os.getenv("DB_WORKERS", "8"))
+HEAVY_WORKERS = int(os.getenv("HEAVY_WORKERS", str(os.cpu_count() or 2)))
+HEAVY_DEADLINE_SECONDS = float(os.getenv("HEAVY_DEADLINE_SECONDS", "30"))
+# Batas tugas yang boleh menunggu di antrean pool berat (di luar yang sedang jalan)
+HEAVY_QUEUE_MAX = int(os.getenv("HEAVY_QUEUE_MAX", str(HEAVY_WORKERS * 8)))
+# Jeda tambahan di parent setelah tenggat, memberi kesempatan worker membatalkan sendiri
+DEADLINE_GRACE_SECONDS = 1.0
+
+
+class DeadlineExceeded(Exception):
+    """Perhitungan melewati tenggat yang diberikan untuk request ini."""
+
+
+class QueueFull(Exception):
+    """Antrean pool sudah mencapai batasnya; request sebaiknya dicoba lagi nanti."""
+
+
+class WorkerLost(Exception):
+    """Worker tugas ini hilang (pool diganti/rusak) bahkan setelah dicoba ulang; coba lagi nanti."""
+
+
+# =========================
+# Fungsi yang dijalankan di worker
+# =========================
+def _init_process_worker() -> None:
+    """Worker hasil fork tidak boleh memakai ulang koneksi DB milik parent."""
+    # Handler sinyal uvicorn ikut terwarisi saat fork; tanpa direset, SIGTERM
+    # hanya menyetel flag server yang tidak berjalan di sini dan worker tidak berhenti
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from database import dispose_engine_after_fork
+    dispose_engine_after_fork()
+
+
+def _init_heavy_worker() -> None:
+    """Inisialisasi worker berat: lepas koneksi parent lalu muat katalog ahli waris."""
+    _init_process_worker()
+    if memtrack.ENABLED:
+        memtrack.start()
+    import catalog
+    if catalog.is_loaded():
+        return   # sudah diwarisi dari parent (snapshot warm-start)
+    from database import SessionLocal, db_enabled
+    if not db_enabled():
+        catalog.load_defaults()
+        return
+    db = SessionLocal()
+    try:
+        catalog.load_from_db(db)
+    except Exception:
+        # Katalog hanya optimasi; tanpa katalog kalkulator tetap query ke DB
+        pass
+    finally:
+        db.close()
+
+
+def _warm_noop() -> None:
+    return None
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    """
+    Catat waktu mulai (wall clock) agar parent bisa menghitung lama antre.
+    Sampel memtrack dari worker proses ikut dikirim balik ke parent.
+    """
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    return started_at, result, memtrack.drain()
+
+
+def with_session(fn: Callable, *args, **kwargs):
+    """
+    Buka sesi DB di dalam worker, panggil fn(db, ...), lalu tutup sesinya.
+    Dalam mode tanpa database fn dipanggil dengan db=None.
+    """
+    from database import SessionLocal, db_enabled
+    if not db_enabled():
+        return fn(None, *args, **kwargs)
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+# Solver berat: nama → (modul, fungsi, skema input). Di-resolve di worker.
+HEAVY_JOBS: Dict[str, tuple] = {
+    "calculate": ("calculator", "calculate_inheritance", "CalculationInput"),   # /calculate/ yang mahal (admission.py)
+    "mafqud": ("mauquf", "solve_mafqud", "MafqudInput"),
+    "khuntsa": ("mauquf", "solve_khuntsa", "KhuntsaInput"),
+    "haml": ("mauquf", "solve_haml", "HamlInput"),
+    "munasakhot": ("munasakhot", "solve_munasakhot", "MunasakhotInput"),
+    "gharqa": ("gharqa", "solve_gharqa", "GharqaInput"),
+    "trace": ("calculator", "calculate_with_trace", "CalculationInput"),
+}
+
+
+def _on_deadline(signum, frame):
+    raise DeadlineExceeded()
+
+
+def _run_heavy_job(kind: str, payload_json: str, deadline_at: float,
+                   media_type: Optional[str] = None) -> bytes:
+    """
+    Dijalankan di worker berat. Input & output berupa JSON ringkas (bukan pickle
+    objek Pydantic). Tenggat dipasang dengan SIGALRM sehingga solver yang berjalan
+    terlalu lama dibatalkan di dalam worker tanpa mematikan prosesnya.
+    Dengan `media_type` hasil langsung di-encode ke format kolumnar (compact.py).
+    """
+    import pydantic_core
+    import schemas
+
+    remaining = deadline_at - time.time()
+    if remaining <= 0:
+        raise DeadlineExceeded()
+
+    module_name, fn_name, schema_name = HEAVY_JOBS[kind]
+    solver = getattr(importlib.import_module(module_name), fn_name)
+    payload = getattr(schemas, schema_name).model_validate_json(payload_json)
+
+    previous = signal.signal(signal.SIGALRM, _on_deadline)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        with memtrack.measure("job:" + kind):
+            result = with_session(solver, payload)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    if media_type is not None:
+        import compact
+        return compact.render(kind, result, media_type)
+    return pydantic_core.to_json(result)
+
+
+# =========================
+# Pool + gauge
+# =========================
+class WorkPool:
+    """Pembungkus executor yang mencatat kedalaman antrean & lama tunggu."""
+
+    def __init__(self, name: str, kind: str, max_workers: int,
+                 initializer: Optional[Callable] = None, max_pending: Optional[int] = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Jenis executor tidak dikenal: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending   # None = antrean tidak dibatasi
+        self._rejected = 0
+        self._retried = 0
+        self._initializer = initializer or _init_process_worker
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._wait_last = 0.0
+        self._wait_sum = 0.0
+        self._wait_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        # Dibuat malas supaya import modul tidak langsung memunculkan proses/thread
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, initializer=self._initializer
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f"pool-{self.name}"
+                    )
+            return self._executor
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        with self._lock:
+            if self.max_pending is not None and self._in_flight >= self.max_workers + self.max_pending:
+                self._rejected += 1
+                raise QueueFull(f"Antrean pool {self.name} penuh.")
+            self._in_flight += 1
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        try:
+            for attempt in (1, 2):
+                executor = self._get_executor()
+                submitted_at = time.time()
+                try:
+                    try:
+                        future = executor.submit(_timed_call, fn, args, kwargs)
+                    except RuntimeError:
+                        # "cannot schedule new futures after shutdown": pool baru saja di-recycle
+                        if executor is self._executor:
+                            raise
+                        raise BrokenExecutor()
+                    remaining = None if give_up_at is None else max(0.0, give_up_at - time.monotonic())
+                    started_at, result, samples = await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+                    break
+                except asyncio.TimeoutError:
+                    # Masih antre → cukup dibatalkan; sudah jalan & macet → worker harus diganti
+                    if not future.cancel():
+                        self.recycle(executor)
+                    raise DeadlineExceeded()
+                except (BrokenExecutor, asyncio.CancelledError) as e:
+                    # Pool di-recycle karena tugas LAIN macet: tugas ini ikut terputus
+                    # (worker dimatikan, atau masih antre lalu dibatalkan shutdown), jadi
+                    # dicoba sekali lagi di pool baru. Pembatalan request sendiri diteruskan.
+                    if isinstance(e, asyncio.CancelledError) and (
+                            not future.cancelled() or asyncio.current_task().cancelling()):
+                        raise
+                    self.recycle(executor)
+                    if attempt == 2:
+                        raise WorkerLost(f"Worker pool {self.name} hilang saat menjalankan tugas.") from e
+                    with self._lock:
+                        self._retried += 1
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        self._record_wait(max(0.0, started_at - submitted_at))
+        memtrack.merge(samples)
+        return result
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self._completed += 1
+            self._wait_last = waited
+            self._wait_sum += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            # Executor mengambil tugas FIFO → yang melebihi jumlah worker sedang antre
+            queue_depth = max(0, self._in_flight - self.max_workers)
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queue_depth": queue_depth,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "retried": self._retried,
+                "wait_seconds_last": round(self._wait_last, 6),
+                "wait_seconds_avg": round(self._wait_sum / self._completed, 6) if self._completed else 0.0,
+                "wait_seconds_max": round(self._wait_max, 6),
+            }
+
+    def warm_up(self) -> None:
+        """Jalankan tugas kosong agar semua worker sudah hidup sebelum request pertama."""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_warm_noop)
+
+    def recycle(self, executor: Optional[Executor] = None) -> None:
+        """
+        Hentikan paksa worker (untuk tugas yang tidak mau berhenti) lalu buat pool baru.
+        Dengan `executor`, hanya bila pool itu masih yang aktif — pool yang sudah
+        diganti oleh request lain tidak dimatikan dua kali.
+        """
+        with self._lock:
+            if executor is not None and executor is not self._executor:
+                return
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        processes = list(getattr(executor, "_processes", {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self) -> None:
+        # Proses worker dihentikan langsung, bukan menunggu thread pengelola executor:
+        # uvicorn mengirim ulang sinyal ke dirinya sendiri setelah shutdown, jadi
+        # proses induk bisa mati duluan dan worker tertinggal sebagai proses yatim.
+        self.recycle()
+
+
+_pools: Dict[str, WorkPool] = {
+    "calc": WorkPool("calc", CALC_EXECUTOR, CALC_WORKERS),
+    "db": WorkPool("db", "thread", DB_WORKERS),
+    "heavy": WorkPool("heavy", "process", HEAVY_WORKERS, initializer=_init_heavy_worker,
+                      max_pending=HEAVY_QUEUE_MAX),
+}
+
+
+def get_pool(name: str) -> WorkPool:
+    return _pools[name]
+
+
+async def run_calc(fn: Callable, *args) -> Any:
+    """Jalankan solver `fn(db, *args)` di pool perhitungan."""
+    return await _pools["calc"].run(with_session, fn, *args)
+
+
+async def run_db(fn: Callable, *args, **kwargs) -> Any:
+    """Jalankan fungsi crud `fn(db, ...)` di pool database."""
+    return await _pools["db"].run(with_session, fn, *args, **kwargs)
+
+
+async def run_heavy(kind: str, payload_json: str, deadline_seconds: Optional[float] = None,
+                    media_type: Optional[str] = None) -> bytes:
+    """
+    Jalankan solver berat `kind` di pool proses. Mengembalikan hasil sebagai JSON
+    (bytes) yang bisa langsung dikirim ke klien, atau format ringkas `media_type`.
+    Tenggat per request tidak boleh melebihi HEAVY_DEADLINE_SECONDS; QueueFull
+    bila antrean pool sudah HEAVY_QUEUE_MAX.
+    """
+    deadline = HEAVY_DEADLINE_SECONDS
+    if deadline_seconds is not None and 0 < deadline_seconds < deadline:
+        deadline = deadline_seconds
+    deadline_at = time.time() + deadline
+    return await _pools["heavy"].run(
+        _run_heavy_job, kind, payload_json, deadline_at, media_type,
+        timeout=deadline + DEADLINE_GRACE_SECONDS,
+    )
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.stats() for name, pool in _pools.items()}
+
+
+def shutdown_pools() -> None:
+    for pool in _pools.values():
+        pool.shutdown()
@@ -0,0 +1,158 @@
+# heir_search.py
+
+"""
+Indeks pencarian ahli waris di memori (GET /heirs/search).
+
+Setiap ahli waris diindeks dari `name_id`, `name_ar`, dan alias transliterasi
+(ALIASES + nama kunci engine, misal "ukht abawayn"). Teks dinormalisasi dulu:
+
+    Arab       harakat & tatwil dibuang; أ إ آ ٱ → ا, ؤ → و, ئ ى → ي, ة → ه
+    Latin      huruf kecil, tanda diakritik transliterasi dibuang (ā → a, ḍ → d),
+               ‘ ’ ' dan tanda baca dibuang
+
+Kata kueri cocok dengan kata di indeks secara persis, sebagai awalan, atau
+fuzzy (jarak edit ≤ 1 lewat tetangga-hapus ala SymSpell, untuk kata ≥ 4
+huruf). Semua tabel (kata → id, awalan → id, hapusan → kata) dibangun sekali,
+jadi pencarian hanya berupa lookup dict. Indeks dibangun ulang otomatis saat
+snapshot tabel `heirs` (http_cache.heirs_snapshot) berganti generasi, yaitu
+setelah penulisan ke tabel atau kedaluwarsa TTL.
+"""
+
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.rules.engine import ID
+
+# Alias transliterasi/populer tambahan per id engine
+ALIASES: Dict[int, Tuple[str, ...]] = {
+    ID["IBN"]: ("ibnu", "putra", "anak lelaki"),
+    ID["AB"]: ("abu", "bapak"),
+    ID["ZAWJ"]: ("zauj", "husband"),
+    ID["ZAWJAH"]: ("zaujah", "zawjah", "wife"),
+    ID["IBN_IBN"]: ("ibnul ibni", "cucu lelaki"),
+    ID["JADD"]: ("jaddun", "datuk"),
+    ID["AKH_ABAWAYN"]: ("akh syaqiq", "akh shaqiq", "saudara kandung"),
+    ID["AKH_AB"]: ("akh liab", "akh li ab"),
+    ID["AKH_UMM"]: ("akh liumm", "akh li umm"),
+    ID["IBN_AKH_ABAWAYN"]: ("ibnul akh",),
+    ID["IBN_AKH_AB"]: ("ibnul akh liab",),
+    ID["AMM_ABAWAYN"]: ("am", "amm syaqiq"),
+    ID["AMM_AB"]: ("amm liab",),
+    ID["IBN_AMM_ABAWAYN"]: ("ibnul amm",),
+    ID["IBN_AMM_AB"]: ("ibnul amm liab",),
+    ID["BINT"]: ("binti", "putri", "anak wanita"),
+    ID["BINT_IBN"]: ("bintul ibni", "cucu wanita"),
+    ID["UMM"]: ("ummu", "mother"),
+    ID["JADDAH_MIN_ALUMM"]: ("jaddah", "nenek"),
+    ID["JADDAH_MIN_ALAB"]: ("jaddah", "nenek"),
+    ID["UKHT_ABAWAYN"]: ("ukht syaqiqah", "ukht shaqiqah", "saudari"),
+    ID["UKHT_AB"]: ("ukht liab", "saudari"),
+    ID["UKHT_UMM"]: ("ukht liumm", "saudari"),
+    ID["MUTIQ"]: ("mutiq", "wala"),
+    ID["MUTIQAH"]: ("mutiqah", "wala"),
+}
+
+DEFAULT_LIMIT = 10
+FUZZY_MIN_LENGTH = 4
+
+# Skor per kata kueri
+SCORE_EXACT = 3
+SCORE_PREFIX = 2
+SCORE_FUZZY = 1
+
+_ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+_ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ؤ": "و", "ئ": "ي",
+                                 "ى": "ي", "ة": "ه"})
+_NON_WORD = re.compile(r"[^\w\s]|_")
+
+
+def normalize(text: str) -> str:
+    """Bentuk normal teks (Arab atau Latin) untuk indeks & kueri."""
+    text = _ARABIC_DIACRITICS.sub("", text).translate(_ARABIC_LETTERS)
+    # NFKD memisahkan huruf Latin dari diakritiknya (ā → a + ◌̄); huruf Arab tidak terpengaruh
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    text = text.replace("‘", "").replace("’", "").replace("'", "")
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def tokens(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def _deletes(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class SearchIndex:
+    """Tabel lookup untuk satu generasi baris `heirs`."""
+
+    def __init__(self, rows: Iterable[dict]):
+        self.rows: Dict[int, dict] = {}
+        self._exact: Dict[str, Set[int]] = {}
+        self._prefix: Dict[str, Set[int]] = {}
+        self._deletes: Dict[str, Set[str]] = {}   # kata-hapus-satu-huruf → kata asli
+        engine_keys = {hid: key.lower().replace("_", " ") for key, hid in ID.items()}
+        for row in rows:
+            hid = row["id"]
+            self.rows[hid] = row
+            texts = [row["name_id"], row["name_ar"], engine_keys.get(hid, ""), *ALIASES.get(hid, ())]
+            for word in {w for text in texts for w in tokens(text)}:
+                self._exact.setdefault(word, set()).add(hid)
+                for end in range(1, len(word) + 1):
+                    self._prefix.setdefault(word[:end], set()).add(hid)
+                if len(word) >= FUZZY_MIN_LENGTH:
+                    for deleted in _deletes(word):
+                        self._deletes.setdefault(deleted, set()).add(word)
+
+    def _fuzzy(self, word: str) -> Set[int]:
+        """Id dengan kata berjarak edit ≤ 1 dari `word`."""
+        if len(word) < FUZZY_MIN_LENGTH:
+            return set()
+        candidates = set(self._deletes.get(word, ()))               # kueri kurang satu huruf
+        for deleted in _deletes(word):
+            if deleted in self._exact:                               # kueri kelebihan satu huruf
+                candidates.add(deleted)
+            candidates.update(self._deletes.get(deleted, ()))        # satu huruf tertukar
+        ids: Set[int] = set()
+        for candidate in candidates:
+            ids |= self._exact[candidate]
+        return ids
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Tuple[dict, int]]:
+        """(baris, skor) terurut skor menurun lalu id; semua kata kueri harus cocok."""
+        words = tokens(query)
+        if not words:
+            return []
+        scores: Optional[Dict[int, int]] = None
+        for word in words:
+            matched: Dict[int, int] = {}
+            for hid in self._fuzzy(word):
+                matched[hid] = SCORE_FUZZY
+            for hid in self._prefix.get(word, ()):
+                matched[hid] = SCORE_PREFIX
+            for hid in self._exact.get(word, ()):
+                matched[hid] = SCORE_EXACT
+            if scores is None:
+                scores = matched
+            else:
+                scores = {hid: score + matched[hid] for hid, score in scores.items() if hid in matched}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:max(limit, 0)]
+        return [(self.rows[hid], score) for hid, score in ranked]
+
+
+_lock = threading.Lock()
+_index: Optional[SearchIndex] = None
+_generation: Optional[int] = None
+
+
+def index_for(generation: int, rows: List[dict]) -> SearchIndex:
+    """Indeks untuk generasi snapshot ini; dibangun ulang bila generasinya berganti."""
+    global _index, _generation
+    with _lock:
+        if _index is None or _generation != generation:
+            _index, _generation = SearchIndex(rows), generation
+        return _index
@@ -0,0 +1,146 @@
+# http_cache.py
+
+"""
+Dukungan cache HTTP: ETag kuat, Cache-Control, dan snapshot `/heirs/` di memori.
+
+Data ahli waris praktis tidak berubah, jadi `/heirs/` dilayani dari snapshot
+yang dibaca sekali dari database. Body setiap halaman (skip/limit) disimpan
+bersama ETag-nya sehingga request dengan `If-None-Match` yang cocok langsung
+dijawab 304 tanpa menyentuh database. Snapshot dibuang saat ada penulisan ke
+tabel `heirs`, dan juga kedaluwarsa setelah HEIRS_SNAPSHOT_TTL detik agar
+worker lain ikut menyegarkan diri.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+import catalog
+import crud
+import crud_async
+
+HEIRS_SNAPSHOT_TTL = float(os.getenv("HEIRS_SNAPSHOT_TTL", "300"))
+# no-cache: klien/proxy boleh menyimpan, tetapi wajib revalidasi (ETag → 304) setiap kali,
+# supaya perubahan katalog langsung terlihat setelah penulisan ke tabel `heirs`
+HEIRS_CACHE_CONTROL = "public, no-cache"
+CALCULATION_CACHE_CONTROL = "public, max-age=86400"
+MAX_CACHED_PAGES = 256
+HEIRS_EXPORT_BATCH = int(os.getenv("HEIRS_EXPORT_BATCH", "1000"))
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Periksa header If-None-Match (boleh berisi beberapa ETag atau "*")."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_response(request: Request, body: bytes, etag: str, cache_control: str,
+                    extra_headers: Optional[Dict[str, str]] = None,
+                    media_type: str = "application/json") -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control, **(extra_headers or {})}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def load_heir_rows(db: Optional[Session], after_id: Optional[int] = None,
+                   limit: Optional[int] = None) -> List[dict]:
+    """Baris `heirs` (keyset: id > after_id) dalam bentuk JSON respons /heirs/."""
+    if db is None:   # mode tanpa database
+        rows = [(hid, name_id, name_ar) for hid, name_id, name_ar in catalog.DEFAULT_HEIRS
+                if after_id is None or hid > after_id][:limit]
+    else:
+        rows = crud.get_heir_rows(db, after_id=after_id, limit=limit)
+    return [{"name_id": name_id, "name_ar": name_ar, "id": hid} for hid, name_id, name_ar in rows]
+
+
+async def fetch_heir_rows(db, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+    """Seperti load_heir_rows, untuk sesi async (None = mode tanpa database)."""
+    if db is None:
+        return load_heir_rows(None, after_id, limit)
+    rows = await crud_async.get_heir_rows(db, after_id=after_id, limit=limit)
+    return [{"name_id": name_id, "name_ar": name_ar, "id": hid} for hid, name_id, name_ar in rows]
+
+
+class HeirsSnapshot:
+    """Salinan tabel `heirs` di memori + body halaman yang sudah diserialisasi."""
+
+    def __init__(self, ttl: float = HEIRS_SNAPSHOT_TTL):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._rows: Optional[List[dict]] = None
+        self._ids: List[int] = []   # id terurut untuk paginasi keyset
+        self._loaded_at = 0.0
+        self._pages: Dict[tuple, Tuple[bytes, str]] = {}
+        self.generation = 0         # naik setiap kali baris dimuat ulang (lihat heir_search)
+
+    def is_fresh(self) -> bool:
+        with self._lock:
+            return self._rows is not None and (time.monotonic() - self._loaded_at) < self._ttl
+
+    def load(self, db: Session) -> None:
+        self.set_rows(load_heir_rows(db))
+
+    def set_rows(self, rows: List[dict]) -> None:
+        with self._lock:
+            self._rows = rows
+            self._ids = [row["id"] for row in rows]
+            self._loaded_at = time.monotonic()
+            self._pages = {}
+            self.generation += 1
+
+    def rows(self) -> Tuple[int, List[dict]]:
+        """(generasi, baris) snapshot saat ini (harus sudah dimuat)."""
+        with self._lock:
+            return self.generation, self._rows
+
+    def page(self, skip: int, limit: int) -> Tuple[bytes, str]:
+        """Body JSON + ETag untuk halaman tertentu (snapshot harus sudah dimuat)."""
+        with self._lock:
+            return self._page_locked((skip, limit), skip, limit)
+
+    def page_after(self, after_id: int, limit: int) -> Tuple[bytes, str, Optional[int]]:
+        """
+        Halaman keyset: baris dengan id > after_id. Mengembalikan juga kursor
+        halaman berikutnya (id baris terakhir), atau None bila sudah habis.
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._ids, after_id)
+            body, etag = self._page_locked(("after", after_id, limit), start, limit)
+            end = start + max(limit, 0)
+            next_cursor = self._ids[end - 1] if limit > 0 and end < len(self._ids) else None
+            return body, etag, next_cursor
+
+    def _page_locked(self, key: tuple, start: int, limit: int) -> Tuple[bytes, str]:
+        cached = self._pages.get(key)
+        if cached is None:
+            rows = self._rows[start:start + limit] if limit >= 0 else []
+            body = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            cached = (body, strong_etag(body))
+            if len(self._pages) >= MAX_CACHED_PAGES:
+                self._pages.clear()
+            self._pages[key] = cached
+        return cached
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._rows = None
+            self._ids = []
+            self._pages = {}
+
+
+heirs_snapshot = HeirsSnapshot()
@@ -12,9 +12,10 @@ Aturan Jadd wal Ikhwah:
 3. Saudara seibu tidak termasuk dalam perhitungan ini (sudah diblokir)
 """
 
-from fractions import Fraction
 import math
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Union
+
+from app.math.rational import Rational, lcm_denominators
 
 
 # Konstanta
@@ -86,7 +87,8 @@ def calculate_jadd_share(
         raise ValueError("Ashlul Masalah harus lebih besar dari 0")
     
     # Hitung saham dzawil furudh lainnya
-    saham_dzawil_furudh = sum(h.get('saham', 0) for h in other_dzawil_furudh)
+    # Rational: saham lain boleh pecahan, sisa tetap eksak
+    saham_dzawil_furudh = sum((Rational.of(h.get('saham', 0)) for h in other_dzawil_furudh), Rational(0))
     remaining_saham = ashlul_masalah - saham_dzawil_furudh
     
     # Validasi sisa saham
@@ -105,24 +107,24 @@ def calculate_jadd_share(
     # Kakek dihitung sebagai 2 kepala (seperti saudara laki-laki)
     muqosamah_heads = calculate_muqosamah_heads(jadd, ikhwah)
     if muqosamah_heads > 0:
-        options["Muqosamah"] = (remaining_saham * 2) / muqosamah_heads
+        options["Muqosamah"] = remaining_saham * 2 / muqosamah_heads
     
     # Opsi lainnya tergantung ada tidaknya dzawil furudh lain
     if other_dzawil_furudh:
         # Ada dzawil furudh lain
-        options["Suds"] = ashlul_masalah / 6  # 1/6 dari total
+        options["Suds"] = Rational(ashlul_masalah, 6)  # 1/6 dari total
         options["Tsuluts al-Baqi"] = remaining_saham / 3  # 1/3 dari sisa
     else:
         # Tidak ada dzawil furudh lain
-        options["Tsuluts"] = ashlul_masalah / 3  # 1/3 dari total
+        options["Tsuluts"] = Rational(ashlul_masalah, 3)  # 1/3 dari total
     
     # ========== TAHAP 2: PILIH OPSI TERBAIK ==========
     best_option_name = max(options, key=options.get)
     jadd_final_saham = options[best_option_name]
     
     # Aturan minimum: Kakek minimal dapat 1/6 jika ada dzawil furudh lain
-    if other_dzawil_furudh and jadd_final_saham < (ashlul_masalah / 6):
-        jadd_final_saham = ashlul_masalah / 6
+    if other_dzawil_furudh and jadd_final_saham < Rational(ashlul_masalah, 6):
+        jadd_final_saham = Rational(ashlul_masalah, 6)
         best_option_name = "Suds (minimum)"
     
     # ========== TAHAP 3: HITUNG SAHAM IKHWAH ==========
@@ -139,8 +141,9 @@ def calculate_jadd_share(
     )
     
     # Terapkan tashih
-    jadd_saham_int = round(jadd_final_saham * tashih_multiplier)
-    saham_for_ikhwah_int = round(saham_for_ikhwah * tashih_multiplier)
+    # Eksak: tashih_multiplier = KPK penyebut, hasil kali selalu bulat
+    jadd_saham_int = int(jadd_final_saham * tashih_multiplier)
+    saham_for_ikhwah_int = int(saham_for_ikhwah * tashih_multiplier)
     
     # ========== TAHAP 5: DISTRIBUSI KE IKHWAH ==========
     ikhwah_shares = distribute_ikhwah_shares(
@@ -161,7 +164,7 @@ def calculate_jadd_share(
         "chosen_option": best_option_name,
         "jadd_saham": jadd_saham_int,
         "ikhwah_shares": ikhwah_shares.get('shares', {}),
-        "options_calculated": options  # Untuk debugging
+        "options_calculated": {k: float(v) for k, v in options.items()}  # Untuk debugging
     }
 
 
@@ -201,41 +204,21 @@ def calculate_muqosamah_heads(
 
 
 def calculate_tashih_multiplier(
-    jadd_saham: float, 
-    ikhwah_saham: float
+    jadd_saham: Union[int, float, Rational], 
+    ikhwah_saham: Union[int, float, Rational]
 ) -> int:
     """
     Menghitung tashih multiplier untuk menghilangkan pecahan.
     
     Args:
-        jadd_saham: Saham kakek (bisa float)
-        ikhwah_saham: Saham saudara-saudara (bisa float)
+        jadd_saham: Saham kakek (int, Rational eksak, atau float lama)
+        ikhwah_saham: Saham saudara-saudara (int, Rational eksak, atau float lama)
     
     Returns:
-        Multiplier untuk tashih
+        Multiplier untuk tashih (KPK penyebut; 1 bila keduanya bulat)
     """
-    denominators = []
-    
-    # Cek apakah jadd_saham adalah pecahan
-    if isinstance(jadd_saham, float) and not jadd_saham.is_integer():
-        frac = Fraction(jadd_saham).limit_denominator(1000)
-        denominators.append(frac.denominator)
-    
-    # Cek apakah ikhwah_saham adalah pecahan
-    if isinstance(ikhwah_saham, float) and not ikhwah_saham.is_integer():
-        frac = Fraction(ikhwah_saham).limit_denominator(1000)
-        denominators.append(frac.denominator)
-    
-    # Jika tidak ada pecahan, tidak perlu tashih
-    if not denominators:
-        return 1
-    
-    # Hitung LCM dari semua denominator
-    tashih_multiplier = denominators[0]
-    for d in denominators[1:]:
-        tashih_multiplier = lcm(tashih_multiplier, d)
-    
-    return tashih_multiplier
+    # Float hanya dari pemanggil lama: didekati dengan penyebut <= 1000
+    return lcm_denominators((Rational.of(jadd_saham), Rational.of(ikhwah_saham)))
 
 
 def distribute_ikhwah_shares(
@@ -1,40 +1,155 @@
 # Di dalam file: main.py
 
-from fastapi import FastAPI, Depends, HTTPException
+import hmac
+import os
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Body, FastAPI, Depends, HTTPException, Header, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from fastapi.responses import RedirectResponse, StreamingResponse
 from schemas import CalculationInput, CalculationResult
-from calculator import calculate_inheritance
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware # <-- TAMBAHKAN IMPORT INI
 
 import crud
-import gharqa
+import crud_async
+import database
 import models
 import schemas
-from database import SessionLocal, engine
-import calculator
-import munasakhot, mauquf
+from database import SessionLocal
+# Modul solver (calculator, munasakhot, mauquf, gharqa) sengaja tidak di-import di sini:
+# calculator dimuat saat lifespan/perhitungan pertama, solver berat hanya di worker proses.
+import canonical
+import capture
+import catalog
+import admission
+import compact
+import executor
+import heir_search
+import http_cache
+import json
+import memtrack
+import profiler
+import pydantic_core
+import result_store
+import shared_cache
+import singleflight
+import warm_start
 
-# Membuat tabel di database (jika belum ada)
-models.Base.metadata.create_all(bind=engine)
+# Token untuk endpoint /admin/* (header X-Admin-Token); kosong = endpoint admin nonaktif
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
-app = FastAPI(
-    title="Kalkulator Faraidh - Zahrotul Faridhoh",
-    description="API untuk perhitungan waris Islam berdasarkan kitab Zahrotul Faridhoh."
-)
 origins = [
     "http://localhost",
     "http://localhost:3000", # Alamat frontend Next.js kita
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+router = APIRouter()
+
+
+def _create_tables(db: Session) -> None:
+    # Membuat tabel di database (jika belum ada)
+    models.Base.metadata.create_all(bind=db.get_bind())
+
+
+def preload() -> None:
+    """
+    Inisialisasi DB & cache secara sinkron. Dipanggil dari lifespan, atau oleh
+    serve.py di proses parent sebelum fork agar hasilnya dipakai bersama worker.
+    """
+    if database.db_enabled():
+        executor.with_session(_create_tables)
+        executor.with_session(result_store.purge_expired)
+    # Snapshot warm-start (kerangka populer). Katalog selalu dari DB bila ada, agar
+    # perubahan /heirs/bulk setelah snapshot dibuat tidak tertimpa katalog lamanya
+    if database.db_enabled():
+        executor.with_session(catalog.load_from_db)
+        warm_start.load(with_catalog=False)
+    elif not warm_start.load():
+        catalog.load_defaults()
+    import calculator  # noqa: F401  (dimuat sekarang agar request pertama tidak menanggungnya)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inisialisasi DB & cache saat server mulai (bukan saat modul di-import)."""
+    if memtrack.ENABLED:
+        memtrack.start()
+    capture.start()   # hanya bila CAPTURE_DIR diisi
+    if not catalog.is_loaded():   # serve.py sudah melakukannya di parent sebelum fork
+        await executor.get_pool("db").run(preload)
+    # Worker berat dibuat (dan mewarisi katalog) sebelum request pertama datang
+    executor.get_pool("heavy").warm_up()
+    try:
+        yield
+    finally:
+        executor.shutdown_pools()
+        capture.stop()
+        await database.dispose_async_engine()
+
 
-@app.post("/calculate", response_model=CalculationResult)
+def create_app() -> FastAPI:
+    """
+    Factory aplikasi. Tanpa DATABASE_URL aplikasi berjalan dalam mode tanpa
+    database: perhitungan tetap jalan, endpoint penulisan & arsip hasil → 503.
+    """
+    app = FastAPI(
+        title="Kalkulator Faraidh - Zahrotul Faridhoh",
+        description="API untuk perhitungan waris Islam berdasarkan kitab Zahrotul Faridhoh.",
+        lifespan=lifespan,
+    )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(memtrack.MemoryMiddleware)   # tanpa MEMTRACK=1 hanya diteruskan
+    app.add_middleware(capture.CaptureMiddleware)   # tanpa CAPTURE_DIR hanya diteruskan
+    app.include_router(router)
+    return app
+
+
+def _require_db() -> None:
+    if not database.db_enabled():
+        raise HTTPException(status_code=503, detail="Fitur ini membutuhkan database (mode tanpa database aktif).")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency endpoint admin: 404 bila ADMIN_TOKEN tidak diatur, 403 bila token salah."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token admin tidak valid.")
+
+
+def _admit(kind: str, payload) -> admission.Admission:
+    """Normalisasi + batas + estimasi biaya payload sebelum dihitung (lihat admission.py)."""
+    try:
+        return admission.admit(kind, payload)
+    except admission.AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+def compact_format(fmt: Optional[Literal["compact", "msgpack"]] = Query(None, alias="format"),
+                   notes: bool = Query(False),
+                   accept: Optional[str] = Header(None)) -> Optional[str]:
+    """
+    Dependency: format respons kolumnar ringkas (lihat compact.py), diminta lewat
+    `?format=compact|msgpack` atau header Accept. None = format lengkap biasa.
+    Catatan langkah hanya disertakan dengan `?notes=true` (atau `;notes=1` di Accept).
+    """
+    try:
+        return compact.negotiate(fmt, accept, notes)
+    except compact.FormatUnavailable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+@router.post("/calculate", response_model=CalculationResult)
 def api_calculate(payload: CalculationInput):
     return calculate(payload)
 # --- Dependency untuk Sesi Database ---
@@ -47,66 +162,484 @@ def get_db():
         db.close()
 # -----------------------------------------
 
-@app.get("/")
+@router.get("/")
 def read_root():
     """
     Endpoint utama untuk menyapa pengguna.
     """
     return {"message": "Selamat datang di Kalkulator Faraidh Zahrotul Faridhoh"}
 
-@app.post("/heirs/", response_model=schemas.Heir)
-def create_heir_endpoint(heir: schemas.HeirCreate, db: Session = Depends(get_db)):
+@router.post("/heirs/", response_model=schemas.Heir)
+async def create_heir_endpoint(heir: schemas.HeirCreate, db=Depends(database.get_async_db)):
     """
     Endpoint untuk membuat/menambahkan ahli waris baru.
     """
+    _require_db()
     # Cek apakah ahli waris dengan nama yang sama sudah ada
-    db_heir = crud.get_heir_by_name(db, name_id=heir.name_id)
+    db_heir = await crud_async.get_heir_by_name(db, name_id=heir.name_id)
     if db_heir:
         # Jika sudah ada, kirim error
         raise HTTPException(status_code=400, detail="Ahli waris dengan nama ini sudah ada")
-    
+
     # Jika belum ada, buat ahli waris baru
-    return crud.create_heir(db=db, heir=heir)
+    created = await crud_async.create_heir(db=db, heir=heir)
+    http_cache.heirs_snapshot.invalidate()
+    return created
+
+@router.post("/heirs/bulk", response_model=list[schemas.Heir])
+async def upsert_heirs_endpoint(heirs: list[schemas.Heir], db=Depends(database.get_async_db)):
+    """
+    Simpan/perbarui banyak ahli waris (dengan ID eksplisit) dalam satu statement.
+    Ditolak (409) bila hasilnya tidak lagi cocok dengan pemetaan ID engine aturan.
+    """
+    _require_db()
+    try:
+        saved = await crud_async.upsert_heirs(db, heirs, commit=False)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Nama ahli waris bentrok dengan baris lain (ID berbeda).")
+    rows = await crud_async.get_heir_rows(db, limit=None)
+    problems = catalog.verify_rows(rows)
+    if problems:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=problems)
+    await db.commit()
+    http_cache.heirs_snapshot.invalidate()
+    catalog.load_rows(rows)
+    return saved
 
-@app.get("/heirs/", response_model=list[schemas.Heir])
-def read_heirs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/heirs/", response_model=list[schemas.Heir])
+async def read_heirs(request: Request, skip: int = 0, limit: int = 100, after: Optional[int] = None,
+                     db=Depends(database.get_async_db)):
     """
     Endpoint untuk membaca daftar semua ahli waris.
+    Dilayani dari snapshot di memori dengan ETag; If-None-Match yang cocok → 304.
+    Dengan `after` (kursor = id terakhir halaman sebelumnya) dipakai paginasi keyset;
+    kursor halaman berikutnya dikirim di header X-Next-Cursor.
+    """
+    snapshot = http_cache.heirs_snapshot
+    if not snapshot.is_fresh():
+        # Sesi (dan koneksi) hanya dibuka di sini, saat snapshot perlu dimuat ulang
+        snapshot.set_rows(await http_cache.fetch_heir_rows(db))
+    if after is not None:
+        body, etag, next_cursor = snapshot.page_after(after, limit)
+        headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+        return http_cache.cached_response(request, body, etag, http_cache.HEIRS_CACHE_CONTROL, headers)
+    body, etag = snapshot.page(max(skip, 0), limit)
+    return http_cache.cached_response(request, body, etag, http_cache.HEIRS_CACHE_CONTROL)
+
+@router.get("/heirs/search", response_model=list[schemas.HeirSearchHit])
+async def search_heirs(q: str = Query(..., max_length=100), limit: int = Query(heir_search.DEFAULT_LIMIT, ge=1, le=25),
+                       db=Depends(database.get_async_db)):
+    """
+    Cari ahli waris berdasarkan nama Indonesia, Arab (tanpa peduli harakat/hamzah),
+    atau transliterasi ("saudari", "ukht", "أخت"); mendukung awalan & salah ketik.
+    Indeks ikut dibangun ulang setiap snapshot /heirs/ dimuat ulang.
+    """
+    snapshot = http_cache.heirs_snapshot
+    if not snapshot.is_fresh():
+        snapshot.set_rows(await http_cache.fetch_heir_rows(db))
+    index = heir_search.index_for(*snapshot.rows())
+    hits = [{"heir": row, "score": score} for row, score in index.search(q, limit)]
+    return Response(content=pydantic_core.to_json(hits), media_type="application/json")
+
+@router.get("/heirs/export")
+async def export_heirs():
+    """Ekspor seluruh ahli waris sebagai satu array JSON, di-stream per batch keyset dari database."""
+    return StreamingResponse(_stream_heirs(), media_type="application/json")
+
+async def _stream_heirs():
+    # Sesi sendiri: generator masih berjalan setelah handler (dan dependency-nya) selesai
+    db = database.LazyAsyncSession() if database.db_enabled() else None
+    batch = http_cache.HEIRS_EXPORT_BATCH
+    after = None
+    separator = b"["
+    try:
+        while True:
+            rows = await http_cache.fetch_heir_rows(db, after, batch)
+            if rows:
+                chunk = b",".join(json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                                  for row in rows)
+                yield separator + chunk
+                separator = b","
+            if len(rows) < batch:
+                break
+            after = rows[-1]["id"]
+        yield b"[]" if separator == b"[" else b"]"
+    finally:
+        if db is not None:
+            await db.aclose()
+
+@router.get("/metrics/pools")
+def read_pool_metrics():
+    """Gauge kedalaman antrean & lama tunggu untuk tiap pool eksekusi."""
+    return executor.pool_stats()
+
+@router.get("/metrics/db")
+def read_db_metrics():
+    """Lama tunggu checkout & saturasi pool koneksi database (sync dan async)."""
+    return database.pool_stats()
+
+@router.get("/metrics/admission")
+def read_admission_metrics():
+    """Jumlah request perhitungan yang dijalankan langsung, dialihkan ke pool berat, atau ditolak."""
+    return admission.admission_stats.stats()
+
+@router.get("/metrics/coalescing")
+def read_coalescing_metrics():
+    """Jumlah request perhitungan yang dihitung sendiri vs yang ikut request identik."""
+    return singleflight.calculation_flights.stats()
+
+@router.get("/admin/memory", dependencies=[Depends(require_admin)])
+def read_memory_profile():
+    """Agregat bergulir puncak memori & blok teralokasi per endpoint, job berat, dan tahap solver."""
+    return memtrack.snapshot()
+
+@router.delete("/admin/memory", status_code=204, dependencies=[Depends(require_admin)])
+def reset_memory_profile():
+    memtrack.rolling.reset()
+
+@router.post("/admin/profile/{kind}", dependencies=[Depends(require_admin)])
+async def profile_calculation(kind: str, payload: dict = Body(...),
+                              mode: Literal["sampling", "deterministic"] = Query(profiler.MODE_SAMPLING),
+                              seconds: float = Query(profiler.DEFAULT_SECONDS, gt=0),
+                              interval_ms: float = Query(profiler.DEFAULT_INTERVAL * 1000, ge=0.1, le=100),
+                              top: int = Query(profiler.DEFAULT_TOP, ge=1, le=500),
+                              fmt: Literal["json", "collapsed"] = Query("json", alias="format")):
+    """
+    Profil payload `kind` (calculate, trace, munasakhot, haml, ...) di worker pool
+    berat: stack terlipat untuk flame graph + fungsi teratas menurut waktu kumulatif.
+    `?format=collapsed` mengembalikan stack terlipat saja sebagai teks.
     """
-    heirs = crud.get_heirs(db, skip=skip, limit=limit)
-    return heirs
+    if kind not in executor.HEAVY_JOBS:
+        raise HTTPException(status_code=404, detail=f"Jenis perhitungan tidak dikenal: {kind}")
+    try:
+        data = getattr(schemas, executor.HEAVY_JOBS[kind][2]).model_validate(payload)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    data = _admit(kind, data).payload
+    seconds = min(seconds, profiler.PROFILE_MAX_SECONDS)
+    try:
+        report = await executor.get_pool("heavy").run(
+            profiler.run_job, kind, data.model_dump_json(), mode, seconds, interval_ms / 1000, top,
+            timeout=seconds + 1.0 + executor.DEADLINE_GRACE_SECONDS,
+        )
+    except executor.DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Profil melebihi batas waktu.")
+    except (executor.QueueFull, executor.WorkerLost):
+        raise HTTPException(status_code=503, detail="Server sedang sibuk, coba lagi sebentar.",
+                            headers={"Retry-After": "1"})
+    if fmt == "collapsed":
+        return Response(content=report["collapsed"] + "\n", media_type="text/plain")
+    return report
+
+@router.get("/calculate/codes")
+def read_compact_codes(request: Request):
+    """Tabel kode pecahan & alasan untuk format respons ringkas (?format=compact|msgpack)."""
+    body = pydantic_core.to_json(compact.codes())
+    return http_cache.cached_response(request, body, http_cache.strong_etag(body),
+                                      http_cache.CALCULATION_CACHE_CONTROL)
 
-@app.post("/calculate/", response_model=schemas.CalculationResult) # TAMBAHKAN INI
-def run_calculation(calculation_data: schemas.CalculationInput, db: Session = Depends(get_db)):
+@router.post("/calculate/", response_model=schemas.CalculationResult) # TAMBAHKAN INI
+async def run_calculation(calculation_data: schemas.CalculationInput,
+                          detail: Literal["lengkap", "ringkas"] = Query(canonical.DETAIL_LENGKAP),
+                          media_type: Optional[str] = Depends(compact_format)):
     """
     Endpoint utama untuk menjalankan perhitungan Faraidh.
+    Request identik yang datang bersamaan hanya dihitung sekali.
+    """
+    admitted = _admit("calculate", calculation_data)
+    calculation_data = admitted.payload
+    if media_type is not None and not compact.wants_notes(media_type):
+        detail = canonical.DETAIL_RINGKAS   # notes tidak dikirim → tidak perlu dirender
+    key = canonical.request_key("calculate", calculation_data.heirs, calculation_data.tirkah, detail)
+    result = await singleflight.calculation_flights.do_async(
+        key, _calculate, calculation_data.heirs, calculation_data.tirkah, detail, admitted.route
+    )
+    if media_type is not None:
+        return _compact_response("calculate", result, media_type)
+    return _json_response(result)
+
+@router.get("/calculate/k/{heir_key}", response_model=schemas.CalculationResult)
+async def run_calculation_get(request: Request, heir_key: str, tirkah: float,
+                              detail: Literal["lengkap", "ringkas"] = Query(canonical.DETAIL_LENGKAP),
+                              media_type: Optional[str] = Depends(compact_format)):
+    """
+    Bentuk GET dari /calculate/ agar bisa di-cache reverse proxy/CDN.
+    `heir_key` = multiset ahli waris kanonik, misal "3-18-21x2" (Suami, Ibu, 2 Saudari Kandung).
+    Kunci yang belum kanonik dialihkan (301) ke bentuk kanoniknya.
+    """
+    try:
+        heirs = canonical.decode_heir_key(heir_key)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    canonical_key = canonical.encode_heir_key(heirs)
+    if canonical_key != heir_key:
+        target = request.url.replace(path=request.url.path[: -len(heir_key)] + canonical_key)
+        return RedirectResponse(str(target), status_code=301)
+
+    admitted = _admit("calculate", schemas.CalculationInput(heirs=heirs, tirkah=tirkah))
+    if media_type is not None and not compact.wants_notes(media_type):
+        detail = canonical.DETAIL_RINGKAS   # notes tidak dikirim → tidak perlu dirender
+    key = canonical.request_key("calculate", heirs, tirkah, detail)
+    result = await singleflight.calculation_flights.do_async(
+        key, _calculate, admitted.payload.heirs, tirkah, detail, admitted.route
+    )
+    headers = {"Vary": "Accept"}   # format ringkas juga bisa dipilih lewat header Accept
+    if media_type is not None:
+        body = compact.render("calculate", result, media_type)
+        headers["X-Compact-Codes"] = str(compact.CODES_VERSION)
+    else:
+        body, media_type = pydantic_core.to_json(result), "application/json"
+    return http_cache.cached_response(request, body, http_cache.strong_etag(body),
+                                      http_cache.CALCULATION_CACHE_CONTROL, headers, media_type)
+
+def _json_response(result) -> Response:
     """
-    result = calculator.calculate_inheritance(db, calculation_input=calculation_data)
+    Hasil sudah bertipe response_model, jadi langsung diserialisasi pydantic-core
+    (Rust) tanpa validasi ulang + jsonable_encoder + json.dumps milik FastAPI.
+    """
+    return Response(content=pydantic_core.to_json(result), media_type="application/json")
+
+def _compact_response(kind: str, result, media_type: str, headers: Optional[dict] = None) -> Response:
+    """`result` = objek hasil atau JSON lengkapnya yang sudah di-parse."""
+    body = compact.render(kind, result, media_type)
+    return Response(content=body, media_type=media_type,
+                    headers={"X-Compact-Codes": str(compact.CODES_VERSION), **(headers or {})})
+
+async def _calculate(heirs, tirkah: float, detail: str,
+                     route: str = admission.ROUTE_INLINE) -> schemas.CalculationResult:
+    heirs = canonical.canonical_heirs(heirs)
+    skeletons = shared_cache.get_cache()
+    skeleton_key = shared_cache.skeleton_key(heirs)
+    if detail == canonical.DETAIL_RINGKAS:
+        # Hasil ringkas bisa dibangun langsung dari kerangka milik worker mana pun
+        payload = skeletons.get(skeleton_key)
+        result = shared_cache.result_from_skeleton(payload, tirkah) if payload is not None else None
+        if result is not None:
+            return result
+
+    # Dihitung dari bentuk kanonik supaya hasilnya sama untuk semua peserta yang digabung
+    import calculator
+    calc_input = schemas.CalculationInput(heirs=heirs, tirkah=tirkah)
+    # Catatan teks dirender dari jejak hanya untuk detail lengkap
+    render_notes = detail != canonical.DETAIL_RINGKAS
+    if route == admission.ROUTE_HEAVY:
+        # Estimasi biaya tinggi: jangan menahan pool perhitungan, pakai pool berat yang antreannya dibatasi
+        body = await _heavy_body("calculate", calc_input, None)
+        result = CalculationResult.model_validate_json(body)
+        if not render_notes:
+            result.notes = []
+    else:
+        result = await executor.run_calc(calculator.calculate_inheritance, calc_input, render_notes)
+    skeletons.put(skeleton_key, shared_cache.skeleton_from_result(result))
     return result
 
-@app.post("/calculate/munasakhot/")
-def run_munasakhot_calculation(munasakhot_data: schemas.MunasakhotInput, db: Session = Depends(get_db)):
+async def _heavy_body(kind: str, payload, deadline_seconds: Optional[float],
+                      media_type: Optional[str] = None) -> bytes:
+    try:
+        return await executor.run_heavy(kind, payload.model_dump_json(), deadline_seconds, media_type)
+    except executor.DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Perhitungan melebihi batas waktu.")
+    except (executor.QueueFull, executor.WorkerLost):
+        raise HTTPException(status_code=503, detail="Server sedang sibuk, coba lagi sebentar.",
+                            headers={"Retry-After": "1"})
+
+async def _run_heavy(kind: str, payload, deadline_seconds: Optional[float],
+                     media_type: Optional[str] = None) -> Response:
+    """
+    Kirim solver berat ke pool proses; hasil dari worker diteruskan apa adanya
+    (format ringkas pun sudah di-encode di worker).
+    """
+    body = await _heavy_body(kind, payload, deadline_seconds, media_type)
+    if media_type is not None:
+        return Response(content=body, media_type=media_type,
+                        headers={"X-Compact-Codes": str(compact.CODES_VERSION)})
+    return Response(content=body, media_type="application/json")
+
+async def _run_stored(kind: str, payload, db, idempotency_key: Optional[str],
+                      deadline_seconds: Optional[float], media_type: Optional[str] = None) -> Response:
+    """
+    Seperti _run_heavy, tetapi hasil disimpan berdasarkan hash input kanonik.
+    Request ulang (input sama atau Idempotency-Key sama) dilayani dari penyimpanan.
+    Dalam mode tanpa database hasil tidak disimpan. Yang disimpan selalu JSON
+    lengkap; format ringkas dibangun dari situ.
+    """
+    if not database.db_enabled():
+        return await _run_heavy(kind, payload, deadline_seconds, media_type)
+    payload = canonical.canonicalize(payload)
+    digest = canonical.payload_digest(kind, payload)
+
+    stored = None
+    if idempotency_key:
+        stored = await result_store.lookup_idempotent(db, idempotency_key)
+        if stored is not None and stored.digest != digest:
+            raise HTTPException(status_code=422, detail="Idempotency-Key sudah dipakai untuk input yang berbeda.")
+    if stored is None:
+        stored = await result_store.lookup(db, digest)
+        if stored is not None and idempotency_key:
+            await result_store.store(db, digest, kind, stored.request_json,
+                                     stored.result_json, idempotency_key)
+    if stored is not None:
+        headers = {"X-Result-Digest": digest, "X-Result-Cache": "hit"}
+        if media_type is not None:
+            return _compact_response(kind, json.loads(stored.result_json), media_type, headers)
+        return Response(content=stored.result_json, media_type="application/json", headers=headers)
+
+    await db.close()   # lepas koneksi ke pool selama solver berat berjalan
+    response = await _run_heavy(kind, payload, deadline_seconds)
+    await result_store.store(db, digest, kind, payload.model_dump_json(),
+                             response.body.decode("utf-8"), idempotency_key)
+    headers = {"X-Result-Digest": digest, "X-Result-Cache": "miss"}
+    if media_type is not None:
+        return _compact_response(kind, json.loads(response.body), media_type, headers)
+    response.headers.update(headers)
+    return response
+
+@router.get("/results/{digest}")
+async def read_stored_result(digest: str, db=Depends(database.get_async_db)):
+    """Ambil kembali hasil perhitungan tersimpan berdasarkan hash input-nya (untuk audit)."""
+    _require_db()
+    stored = await result_store.lookup(db, digest)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Hasil dengan hash ini tidak ditemukan.")
+    return {
+        "digest": stored.digest,
+        "kind": stored.kind,
+        "created_at": stored.created_at,
+        "request": json.loads(stored.request_json),
+        "result": json.loads(stored.result_json),
+    }
+
+@router.get("/results/{digest}/trace")
+async def read_stored_trace(digest: str, step: Optional[list[str]] = Query(None),
+                            db=Depends(database.get_async_db)):
+    """
+    Jejak tersimpan dari POST /calculate/trace, bisa difilter per kode langkah
+    (misal ?step=aul&step=radd) tanpa mengurai teks catatan.
+    """
+    _require_db()
+    stored = await result_store.lookup(db, digest)
+    if stored is None or stored.kind != "trace":
+        raise HTTPException(status_code=404, detail="Jejak dengan hash ini tidak ditemukan.")
+    trace = json.loads(stored.result_json)["trace"]
+    if step:
+        trace = [record for record in trace if record["step"] in step]
+    return {"digest": stored.digest, "created_at": stored.created_at, "trace": trace}
+
+@router.post("/calculate/trace", response_model=schemas.CalculationTraceResult)
+async def run_calculation_trace(calculation_data: schemas.CalculationInput,
+                                x_deadline_seconds: Optional[float] = Header(None),
+                                idempotency_key: Optional[str] = Header(None),
+                                db=Depends(database.get_async_db)):
+    """
+    Perhitungan dasar beserta jejak langkah terstruktur (furudh, perbandingan,
+    'aul/radd, tashīḥ, saham sebelum & sesudah) untuk audit. Hasil disimpan
+    berdasarkan hash input; lihat /results/{digest}/trace.
+    """
+    calculation_data = _admit("trace", calculation_data).payload
+    return await _run_stored("trace", calculation_data, db, idempotency_key, x_deadline_seconds)
+
+@router.post("/calculate/preview", response_model=list[schemas.HeirPreview])
+def preview_heirs(preview_data: schemas.PreviewInput):
+    """
+    Pratinjau untuk daftar ahli waris yang belum lengkap: untuk ke-25 ahli waris,
+    apakah ia mahjūb bila ditambahkan (dan oleh siapa) serta pecahan sementaranya.
+    Cukup satu panggilan, tidak perlu /calculate/ spekulatif per kandidat.
+    """
+    import preview   # memuat engine aturan
+    return _json_response(preview.preview(preview_data.heirs))
+
+# --- Sesi perhitungan inkremental (lihat sessions.py) ---
+def _session_step(db, action: str, target, delta: Optional[schemas.SessionDelta],
+                  detail: str) -> schemas.SessionResult:
+    """Dijalankan di pool perhitungan; `target` = input awal (create) atau ID sesi."""
+    import sessions   # memuat calculator
+    try:
+        if action == "create":
+            state, recomputed = sessions.create(db, target.heirs, target.tirkah), sessions.RECOMPUTE_LENGKAP
+        else:
+            state = sessions.load(db, target)
+            recomputed = None
+            if delta is not None:
+                state, recomputed = sessions.apply_delta(db, state, delta)
+    except admission.AdmissionRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return schemas.SessionResult.model_construct(session=state.key, recomputed=recomputed or "",
+                                                 result=state.render(detail))
+
+@router.post("/calculate/sessions", response_model=schemas.SessionResult)
+async def create_calculation_session(calculation_data: schemas.CalculationInput,
+                                     detail: Literal["lengkap", "ringkas"] = Query(canonical.DETAIL_LENGKAP)):
+    """
+    Buat sesi perhitungan untuk penyuntingan interaktif. Perubahan berikutnya
+    dikirim lewat PATCH /calculate/sessions/{session} sebagai delta saja.
+    """
+    calculation_data = _admit("calculate", calculation_data).payload
+    result = await executor.run_calc(_session_step, "create", calculation_data, None, detail)
+    return _json_response(result)
+
+@router.get("/calculate/sessions/{session}", response_model=schemas.SessionResult)
+async def read_calculation_session(session: str,
+                                   detail: Literal["lengkap", "ringkas"] = Query(canonical.DETAIL_LENGKAP)):
+    result = await executor.run_calc(_session_step, "read", session, None, detail)
+    return _json_response(result)
+
+@router.patch("/calculate/sessions/{session}", response_model=schemas.SessionResult)
+async def update_calculation_session(session: str, delta: schemas.SessionDelta,
+                                     detail: Literal["lengkap", "ringkas"] = Query(canonical.DETAIL_LENGKAP)):
+    """
+    Terapkan delta (add/remove/update/tirkah). Hanya tahap yang terpengaruh yang
+    dihitung ulang (`recomputed`); ID sesi di respons mewakili keadaan baru.
+    """
+    result = await executor.run_calc(_session_step, "update", session, delta, detail)
+    return _json_response(result)
+
+@router.post("/calculate/munasakhot/", response_model=schemas.MunasakhotResult)
+async def run_munasakhot_calculation(munasakhot_data: schemas.MunasakhotInput,
+                                     x_deadline_seconds: Optional[float] = Header(None),
+                                     idempotency_key: Optional[str] = Header(None),
+                                     db=Depends(database.get_async_db),
+                                     media_type: Optional[str] = Depends(compact_format)):
     """
     Endpoint khusus untuk menjalankan perhitungan Munasakhot.
     """
-    result = munasakhot.solve_munasakhot(db, munasakhot_input=munasakhot_data)
-    return result
+    munasakhot_data = _admit("munasakhot", munasakhot_data).payload
+    return await _run_stored("munasakhot", munasakhot_data, db, idempotency_key, x_deadline_seconds, media_type)
 
-@app.post("/calculate/mafqud/", response_model=schemas.MauqufResult) # <-- Perbarui response_model
-def run_mafqud_calculation(mafqud_data: schemas.MafqudInput, db: Session = Depends(get_db)):
-    return mauquf.solve_mafqud(db, mafqud_input=mafqud_data)
+@router.post("/calculate/mafqud/", response_model=schemas.MauqufResult) # <-- Perbarui response_model
+async def run_mafqud_calculation(mafqud_data: schemas.MafqudInput,
+                                 x_deadline_seconds: Optional[float] = Header(None),
+                                 media_type: Optional[str] = Depends(compact_format)):
+    mafqud_data = _admit("mafqud", mafqud_data).payload
+    return await _run_heavy("mafqud", mafqud_data, x_deadline_seconds, media_type)
 
 # ==> ENDPOINT BARU UNTUK KHUNTSA <==
-@app.post("/calculate/khuntsa/", response_model=schemas.MauqufResult)
-def run_khuntsa_calculation(khuntsa_data: schemas.KhuntsaInput, db: Session = Depends(get_db)):
-    return mauquf.solve_khuntsa(db, khuntsa_input=khuntsa_data)
+@router.post("/calculate/khuntsa/", response_model=schemas.MauqufResult)
+async def run_khuntsa_calculation(khuntsa_data: schemas.KhuntsaInput,
+                                  x_deadline_seconds: Optional[float] = Header(None),
+                                  media_type: Optional[str] = Depends(compact_format)):
+    khuntsa_data = _admit("khuntsa", khuntsa_data).payload
+    return await _run_heavy("khuntsa", khuntsa_data, x_deadline_seconds, media_type)
 
 # ==> ENDPOINT BARU UNTUK HAML <==
-@app.post("/calculate/haml/", response_model=schemas.MauqufResult)
-def run_haml_calculation(haml_data: schemas.HamlInput, db: Session = Depends(get_db)):
-    return mauquf.solve_haml(db, haml_input=haml_data) # mafqud_input diganti haml_input jika ada error
+@router.post("/calculate/haml/", response_model=schemas.MauqufResult)
+async def run_haml_calculation(haml_data: schemas.HamlInput,
+                               x_deadline_seconds: Optional[float] = Header(None),
+                               idempotency_key: Optional[str] = Header(None),
+                               db=Depends(database.get_async_db),
+                               media_type: Optional[str] = Depends(compact_format)):
+    haml_data = _admit("haml", haml_data).payload
+    return await _run_stored("haml", haml_data, db, idempotency_key, x_deadline_seconds, media_type)
 
-@app.post("/calculate/gharqa/")
-def run_gharqa_calculation(gharqa_data: schemas.GharqaInput, db: Session = Depends(get_db)):
+@router.post("/calculate/gharqa/")
+async def run_gharqa_calculation(gharqa_data: schemas.GharqaInput,
+                                 x_deadline_seconds: Optional[float] = Header(None),
+                                 media_type: Optional[str] = Depends(compact_format)):
     """Endpoint untuk kasus kematian bersamaan (al-Gharqa)."""
-    return gharqa.solve_gharqa(db, gharqa_input=gharqa_data)
\ No newline at end of file
+    gharqa_data = _admit("gharqa", gharqa_data).payload
+    return await _run_heavy("gharqa", gharqa_data, x_deadline_seconds, media_type)
+
+app = create_app()
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from schemas import CalculationInput, HeirInput, MafqudInput, MauqufResult, MafqudShare, KhuntsaInput, HamlInput
 from calculator import calculate_inheritance
 import copy
+import memtrack
 
 def _solve_mauquf_generic(db: Session, tirkah: float, scenarios: dict, all_heir_inputs: list):
     """Fungsi generik untuk menyelesaikan semua kasus mauquf."""
@@ -12,8 +13,9 @@ def _solve_mauquf_generic(db: Session, tirkah: float, scenarios: dict, all_heir_
     all_heir_ids = {h.id for h in all_heir_inputs}
 
     for name, heirs in scenarios.items():
-        input_data = CalculationInput(heirs=heirs, tirkah=tirkah)
-        scenario_results[name] = calculate_inheritance(db, input_data)
+        with memtrack.stage("mauquf.scenario"):
+            input_data = CalculationInput(heirs=heirs, tirkah=tirkah)
+            scenario_results[name] = calculate_inheritance(db, input_data)
 
     pembagian_sekarang = []
     total_yakin_dibagikan = 0
@@ -53,13 +55,14 @@ def solve_mafqud(db: Session, mafqud_input: MafqudInput):
 def solve_khuntsa(db: Session, khuntsa_input: KhuntsaInput):
     all_heirs = khuntsa_input.heirs
     
-    heirs_as_male = copy.deepcopy(all_heirs)
-    for h in heirs_as_male:
-        if h.id == khuntsa_input.khuntsa_id: h.id = khuntsa_input.male_equivalent_id
-        
-    heirs_as_female = copy.deepcopy(all_heirs)
-    for h in heirs_as_female:
-        if h.id == khuntsa_input.khuntsa_id: h.id = khuntsa_input.female_equivalent_id
+    with memtrack.stage("mauquf.khuntsa_copy"):
+        heirs_as_male = copy.deepcopy(all_heirs)
+        for h in heirs_as_male:
+            if h.id == khuntsa_input.khuntsa_id: h.id = khuntsa_input.male_equivalent_id
+
+        heirs_as_female = copy.deepcopy(all_heirs)
+        for h in heirs_as_female:
+            if h.id == khuntsa_input.khuntsa_id: h.id = khuntsa_input.female_equivalent_id
         
     scenarios = {
         "dianggap_laki": heirs_as_male,
@@ -0,0 +1,224 @@
+# memtrack.py
+
+"""
+Pelacak alokasi memori opsional per endpoint & per tahap solver (MEMTRACK=1).
+
+Memakai tracemalloc: setiap pengukuran mencatat
+    peak_bytes    puncak memori yang dialokasikan di atas titik awal pengukuran
+    net_bytes     sisa memori yang masih hidup saat pengukuran selesai
+    net_blocks    selisih blok teralokasi (alokasi dikurangi pembebasan,
+                  sys.getallocatedblocks) — ukuran kasar jumlah objek
+Agregat bergulir (RollingStats) menyimpan MEMTRACK_WINDOW sampel terakhir per
+kunci; dibaca lewat GET /admin/memory dan benchmarks/memory.py.
+
+Kunci pengukuran:
+    endpoint:<METHOD> <path>    seluruh request di proses API (middleware)
+    job:<kind>                  satu tugas solver berat di worker proses
+    stage:<nama>                tahap solver (calculate.furudh, calculate.notes, ...)
+
+Sampel dari worker pool berat dikirim balik ke parent bersama hasil tugasnya
+(executor._timed_call → drain/merge). tracemalloc & puncaknya berlaku untuk
+seluruh proses, jadi angka per kunci tepat bila request tidak tumpang-tindih
+(benchmark); di bawah beban bersamaan angkanya menjadi batas atas.
+Bila nonaktif, stage()/measure() hanya mengembalikan context manager kosong.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+ENABLED = os.getenv("MEMTRACK", "").lower() in ("1", "true", "yes")
+MEMTRACK_WINDOW = int(os.getenv("MEMTRACK_WINDOW", "256"))
+MEMTRACK_FRAMES = int(os.getenv("MEMTRACK_FRAMES", "1"))
+
+Sample = Tuple[int, int, int]          # (peak_bytes, net_bytes, net_blocks)
+
+_NULL = nullcontext()
+# Pengukuran yang sedang terbuka di konteks ini (per task asyncio / thread)
+_open: contextvars.ContextVar[Tuple["_Measurement", ...]] = contextvars.ContextVar("memtrack_open", default=())
+_owner_pid = os.getpid()               # proses yang menyimpan agregat; worker hasil fork mengirim lewat outbox
+_outbox: List[Tuple[str, Sample]] = []
+_paused = False
+
+
+def start() -> None:
+    """Aktifkan pelacakan di proses ini (idempoten)."""
+    global ENABLED
+    ENABLED = True
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMTRACK_FRAMES)
+
+
+def stop() -> None:
+    global ENABLED
+    ENABLED = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_active() -> bool:
+    return ENABLED and not _paused and tracemalloc.is_tracing()
+
+
+class _Measurement:
+    __slots__ = ("key", "start_bytes", "start_blocks", "peak", "token")
+
+    def __enter__(self):
+        current, peak = tracemalloc.get_traced_memory()
+        outer = _open.get()
+        # reset_peak berlaku global: puncak sejauh ini dilipat dulu ke pengukuran luar
+        for m in outer:
+            m.peak = max(m.peak, peak)
+        tracemalloc.reset_peak()
+        self.start_bytes = current
+        self.start_blocks = sys.getallocatedblocks()
+        self.peak = current
+        self.token = _open.set(outer + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        _open.reset(self.token)
+        for m in _open.get():
+            m.peak = max(m.peak, peak)
+        peak = max(self.peak, peak)
+        _record(self.key, (peak - self.start_bytes, current - self.start_bytes, blocks - self.start_blocks))
+        return False
+
+
+def measure(key: str):
+    """Context manager yang mengukur blok di dalamnya di bawah `key`."""
+    if not is_active():
+        return _NULL
+    m = _Measurement()
+    m.key = key
+    return m
+
+
+def stage(name: str):
+    """Ukur satu tahap solver (kunci "stage:<name>")."""
+    if not ENABLED:
+        return _NULL
+    return measure("stage:" + name)
+
+
+class paused:
+    """Matikan pencatatan sementara (misal selama profiler mengulang solver)."""
+
+    def __enter__(self):
+        global _paused
+        self._previous, _paused = _paused, True
+
+    def __exit__(self, *exc):
+        global _paused
+        _paused = self._previous
+        return False
+
+
+# =========================
+# Agregat bergulir
+# =========================
+def _percentile(values: List[int], pct: float) -> int:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+class RollingStats:
+    """MEMTRACK_WINDOW sampel terakhir per kunci + jumlah total sampel."""
+
+    def __init__(self, window: int = MEMTRACK_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Sample]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def add(self, key: str, sample: Sample) -> None:
+        with self._lock:
+            bucket = self._samples.get(key)
+            if bucket is None:
+                bucket = self._samples[key] = deque(maxlen=self.window)
+            bucket.append(sample)
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {key: list(samples) for key, samples in self._samples.items()}
+            counts = dict(self._counts)
+        result = {}
+        for key in sorted(snapshot):
+            samples = snapshot[key]
+            peaks = [s[0] for s in samples]
+            nets = [s[1] for s in samples]
+            blocks = [s[2] for s in samples]
+            result[key] = {
+                "count": counts[key],
+                "window": len(samples),
+                "peak_bytes": {"last": peaks[-1], "p50": _percentile(peaks, 0.5),
+                               "p95": _percentile(peaks, 0.95), "max": max(peaks)},
+                "net_bytes": {"p50": _percentile(nets, 0.5), "max": max(nets)},
+                "net_blocks": {"p50": _percentile(blocks, 0.5), "max": max(blocks)},
+            }
+        return result
+
+
+rolling = RollingStats()
+
+
+def _record(key: str, sample: Sample) -> None:
+    if os.getpid() == _owner_pid:
+        rolling.add(key, sample)
+    else:
+        _outbox.append((key, sample))
+
+
+def drain() -> List[Tuple[str, Sample]]:
+    """Sampel yang tercatat di worker sejak drain terakhir (dikirim ke parent)."""
+    global _outbox
+    samples, _outbox = _outbox, []
+    return samples
+
+
+def merge(samples: Optional[List[Tuple[str, Sample]]]) -> None:
+    for key, sample in samples or ():
+        rolling.add(key, sample)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Bentuk respons GET /admin/memory: agregat dikelompokkan per jenis kunci."""
+    groups: Dict[str, Dict[str, Any]] = {"endpoints": {}, "jobs": {}, "stages": {}}
+    group_of = {"endpoint": "endpoints", "job": "jobs", "stage": "stages"}
+    for key, stats in rolling.stats().items():
+        prefix, _, name = key.partition(":")
+        groups[group_of.get(prefix, "stages")][name] = stats
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {"enabled": ENABLED, "window": rolling.window,
+            "traced_bytes": current, "traced_peak_bytes": peak, **groups}
+
+
+class MemoryMiddleware:
+    """Middleware ASGI: ukur setiap request HTTP sebagai "endpoint:<METHOD> <path rute>"."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_active():
+            return await self.app(scope, receive, send)
+        with measure("endpoint:pending") as m:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # Template path (misal /results/{digest}) baru diketahui setelah routing
+                route = scope.get("route")
+                m.key = f"endpoint:{scope['method']} {getattr(route, 'path', '<tanpa rute>')}"
@@ -1,6 +1,6 @@
 # Di dalam file: models.py
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
 from database import Base
 
 # Mendefinisikan model tabel untuk Ahli Waris (Heir)
@@ -9,4 +9,22 @@ class Heir(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name_id = Column(String, unique=True, index=True) # Nama dalam Bahasa Indonesia
-    name_ar = Column(String, unique=True) # Nama dalam Bahasa Arab
\ No newline at end of file
+    name_ar = Column(String, unique=True) # Nama dalam Bahasa Arab
+
+# Hasil perhitungan yang disimpan berdasarkan hash input kanoniknya
+class StoredResult(Base):
+    __tablename__ = "calculation_results"
+
+    digest = Column(String(64), primary_key=True)        # SHA-256 input kanonik
+    kind = Column(String, nullable=False)                # jenis perhitungan, misal "haml"
+    request_json = Column(Text, nullable=False)          # input kanonik (untuk audit)
+    result_json = Column(Text, nullable=False)           # hasil persis seperti dikirim ke klien
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+# Kunci idempotensi dari header `Idempotency-Key` → hasil yang sudah tersimpan
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    digest = Column(String(64), ForeignKey("calculation_results.digest", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
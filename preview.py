@@ -0,0 +1,154 @@
+# preview.py
+
+"""
+Pratinjau hajb & furudh untuk daftar ahli waris yang belum lengkap.
+
+Untuk setiap 25 ahli waris: seandainya ia ditambahkan (atau dengan jumlahnya
+sekarang bila sudah ada), apakah ia mahjūb, oleh siapa, dan pecahan apa yang
+akan diterimanya — dalam satu panggilan, tanpa menjalankan determine_furudh 25
+kali. Kehadiran ahli waris disimpan sebagai bitmask (bit ke-`id`), dan setiap
+kaidah hajb adalah mask penghalang yang dihitung sekali saat modul dimuat.
+
+Kaidah di sini mencerminkan app/rules/engine.py + app/special/ apa adanya,
+termasuk keanehannya (misalnya ‘ashabah bertingkat 10–15 tidak pernah
+mendapat bagian, cucu perempuan tertutup oleh cucu laki-laki); test_preview.py
+membandingkan keduanya. Ubah kedua tempat bersamaan.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import catalog
+import schemas
+from app.rules.engine import ID
+
+
+def _mask(*ids: int) -> int:
+    m = 0
+    for i in ids:
+        m |= 1 << i
+    return m
+
+def _ids(mask: int) -> List[int]:
+    return [i for i in ALL_IDS if mask >> i & 1]
+
+
+ALL_IDS = tuple(range(1, 26))
+
+CHILDREN = _mask(ID["IBN"], ID["BINT"], ID["IBN_IBN"], ID["BINT_IBN"])
+DAUGHTERS = _mask(ID["BINT"], ID["BINT_IBN"])
+FATHER_GF = _mask(ID["AB"], ID["JADD"])
+# engine._blocked_ikhwah: anak/cucu lk, ayah, kakek
+IKHWAH_BLOCKERS = _mask(ID["IBN"], ID["IBN_IBN"]) | FATHER_GF
+# engine._has_male_agnate
+MALE_AGNATES = IKHWAH_BLOCKERS | _mask(*range(ID["AKH_ABAWAYN"], ID["AKH_AB"] + 1),
+                                       *range(ID["IBN_AKH_ABAWAYN"], ID["IBN_AMM_AB"] + 1))
+SIBLINGS = _mask(ID["AKH_ABAWAYN"], ID["AKH_AB"], ID["AKH_UMM"],
+                 ID["UKHT_ABAWAYN"], ID["UKHT_AB"], ID["UKHT_UMM"])
+WALA = _mask(ID["MUTIQ"], ID["MUTIQAH"])
+AKDARIYYAH = _mask(ID["ZAWJ"], ID["UMM"], ID["JADD"], ID["UKHT_ABAWAYN"])
+AKDARIYYAH_EXCLUDED = CHILDREN | _mask(ID["AB"])
+
+# Penghalang mutlak: ahli waris mahjūb bila salah satu id di mask hadir
+BLOCKERS: Dict[int, int] = {
+    ID["IBN_IBN"]: _mask(ID["IBN"]),
+    ID["JADD"]: _mask(ID["AB"]),
+    ID["AKH_ABAWAYN"]: IKHWAH_BLOCKERS,
+    ID["AKH_AB"]: IKHWAH_BLOCKERS,
+    ID["AKH_UMM"]: CHILDREN | FATHER_GF,
+    ID["UKHT_UMM"]: CHILDREN | FATHER_GF,
+    # Engine tidak memberi bagian cucu pr bila cucu lk hadir (hanya ta‘ṣīb lewat cucu lk)
+    ID["BINT_IBN"]: _mask(ID["IBN"], ID["IBN_IBN"]),
+    ID["JADDAH_MIN_ALUMM"]: _mask(ID["UMM"]),
+    ID["JADDAH_MIN_ALAB"]: _mask(ID["UMM"], ID["AB"]),
+    ID["UKHT_ABAWAYN"]: IKHWAH_BLOCKERS,
+    ID["UKHT_AB"]: IKHWAH_BLOCKERS,
+    # Bagian 8 engine hanya berjalan tanpa male agnate, padahal 10–15 termasuk di dalamnya
+    **{i: MALE_AGNATES for i in range(ID["IBN_AKH_ABAWAYN"], ID["IBN_AMM_AB"] + 1)},
+}
+
+Outcome = Tuple[Optional[str], int]   # (pecahan atau None bila mahjūb, mask penghalang yang hadir)
+
+
+def _by_count(n: int) -> str:
+    return "1/2" if n == 1 else "2/3"
+
+def _outcome(hid: int, present: int, counts: Dict[int, int]) -> Outcome:
+    """Bagian `hid` bila ahli waris yang hadir = `present` (sudah termasuk `hid`)."""
+    blocked = present & BLOCKERS.get(hid, 0)
+    if hid == ID["UKHT_ABAWAYN"] and present & AKDARIYYAH == AKDARIYYAH \
+            and not present & AKDARIYYAH_EXCLUDED:
+        return "Ashobah", 0      # Akdariyyah: Ukht dialihkan ke muqāsamah bersama Jadd
+    if blocked:
+        return None, blocked
+    n = counts.get(hid, 1)
+    has_child = bool(present & CHILDREN)
+
+    if hid in (ID["IBN"], ID["IBN_IBN"], ID["AKH_ABAWAYN"], ID["AKH_AB"]):
+        return "Ashobah", 0
+    if hid == ID["ZAWJ"]:
+        return ("1/4" if has_child else "1/2"), 0
+    if hid == ID["ZAWJAH"]:
+        return ("1/8" if has_child else "1/4"), 0
+    if hid in (ID["AB"], ID["JADD"]):
+        if hid == ID["JADD"] and present & AKDARIYYAH == AKDARIYYAH and not present & AKDARIYYAH_EXCLUDED:
+            return "1/6", 0
+        return ("1/6" if has_child else "Ashobah"), 0
+    if hid == ID["UMM"]:
+        siblings = sum(counts.get(i, 1) for i in _ids(present & SIBLINGS))
+        return ("1/6" if has_child or siblings >= 2 or present & AKDARIYYAH == AKDARIYYAH
+                and not present & AKDARIYYAH_EXCLUDED else "1/3"), 0
+    if hid in (ID["JADDAH_MIN_ALUMM"], ID["JADDAH_MIN_ALAB"]):
+        return "1/6", 0
+    if hid == ID["BINT"]:
+        return ("Ashobah" if present & _mask(ID["IBN"]) else _by_count(n)), 0
+    if hid == ID["BINT_IBN"]:
+        return ("1/6" if present & _mask(ID["BINT"]) else _by_count(n)), 0
+    if hid in (ID["AKH_UMM"], ID["UKHT_UMM"]):
+        total = sum(counts.get(i, 1) for i in _ids(present & _mask(ID["AKH_UMM"], ID["UKHT_UMM"])))
+        return ("1/6" if total == 1 else f"1/{3 * total}"), 0
+    if hid in (ID["UKHT_ABAWAYN"], ID["UKHT_AB"]):
+        # Ikut ‘ashabah bersama saudara lk sederajat (2:1)
+        brother = ID["AKH_ABAWAYN"] if hid == ID["UKHT_ABAWAYN"] else ID["AKH_AB"]
+        if present & _mask(brother):
+            return "Ashobah", 0
+        # Furudh / ma‘a al-ghair hanya tanpa male agnate (dan, untuk saudari seayah, tanpa saudari kandung)
+        blockers = present & MALE_AGNATES
+        if hid == ID["UKHT_AB"]:
+            blockers |= present & _mask(ID["UKHT_ABAWAYN"])
+        if blockers:
+            return None, blockers
+        return ("Ashobah" if present & DAUGHTERS else _by_count(n)), 0
+    if hid in (ID["MUTIQ"], ID["MUTIQAH"]):
+        # Wala’ hanya bila tidak ada ahli waris nasab yang mendapat bagian
+        inheriting = 0
+        for other in _ids(present & ~WALA):
+            if _outcome(other, present, counts)[0] is not None:
+                inheriting |= 1 << other
+        if hid == ID["MUTIQAH"]:
+            inheriting |= present & _mask(ID["MUTIQ"])
+        return (None, inheriting) if inheriting else ("Ashobah", 0)
+    return None, 0
+
+
+def _counts(heirs: Sequence[schemas.HeirInput]) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    for h in heirs:
+        counts.setdefault(h.id, h.quantity)   # sama dengan engine: entri pertama per id
+    return {hid: q for hid, q in counts.items() if q > 0}
+
+
+def preview(heirs: Sequence[schemas.HeirInput]) -> List[schemas.HeirPreview]:
+    """Status ke-25 ahli waris terhadap daftar `heirs` (lihat docstring modul)."""
+    counts = _counts(heirs)
+    present = _mask(*(hid for hid in counts if hid in ALL_IDS))
+    results = []
+    for hid in ALL_IDS:
+        fraction, blocked = _outcome(hid, present | 1 << hid, counts)
+        results.append(schemas.HeirPreview.model_construct(
+            heir=catalog.get_heir(hid) or catalog.default_heir(hid),
+            present=hid in counts,
+            mahjub=fraction is None,
+            blocked_by=_ids(blocked & ~(1 << hid)),
+            fraction=fraction,
+        ))
+    return results
@@ -0,0 +1,198 @@
+# profiler.py
+
+"""
+Profiler on-demand untuk admin (POST /admin/profile/{kind}).
+
+Payload dijalankan berulang melalui solver jenis `kind` (nama di
+executor.HEAVY_JOBS) di dalam worker pool berat — bukan di event loop API —
+sampai anggaran waktunya habis, dengan salah satu mode:
+
+    sampling        SIGPROF tiap `interval` detik waktu CPU mencuplik stack
+                    thread utama; overhead kecil, bobot = jumlah cuplikan
+    deterministic   sys.setprofile mencatat setiap call/return; akurat tapi
+                    lambat, bobot = mikrodetik
+
+Hasilnya berupa stack terlipat (collapsed, "a;b;c 12" per baris — langsung
+bisa dipakai flamegraph.pl / speedscope) dan daftar fungsi teratas menurut
+waktu kumulatif. Anggaran dibatasi PROFILE_MAX_SECONDS; bila satu kali
+jalan solver saja melewati anggaran, profil yang sudah terkumpul tetap
+dikembalikan dengan `truncated: true`.
+"""
+
+import importlib
+import os
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "5"))
+DEFAULT_SECONDS = 1.0
+DEFAULT_INTERVAL = 0.001
+DEFAULT_TOP = 30
+
+MODE_SAMPLING = "sampling"
+MODE_DETERMINISTIC = "deterministic"
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_LOOP_FRAME = "profiler.py:_profile_loop"   # bingkai di atasnya milik profiler sendiri
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{code.co_name}"
+
+
+class Aggregate:
+    """Bobot per stack (akar → daun) dan statistik per fungsi."""
+
+    def __init__(self):
+        self.stacks: Dict[Tuple[str, ...], float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def add(self, stack: Tuple[str, ...], weight: float) -> None:
+        # Hanya yang terjadi di dalam loop solver; persiapan/bingkai profiler dibuang
+        if _LOOP_FRAME not in stack:
+            return
+        stack = stack[stack.index(_LOOP_FRAME) + 1:]
+        if stack:
+            self.stacks[stack] = self.stacks.get(stack, 0) + weight
+
+    def collapsed(self) -> str:
+        lines = [f"{';'.join(stack)} {round(weight)}" for stack, weight in self.stacks.items() if round(weight) > 0]
+        return "\n".join(sorted(lines))
+
+    def top(self, limit: int) -> List[Dict[str, Any]]:
+        total = sum(self.stacks.values()) or 1
+        cumulative: Dict[str, float] = {}
+        own: Dict[str, float] = {}
+        for stack, weight in self.stacks.items():
+            own[stack[-1]] = own.get(stack[-1], 0) + weight
+            for name in set(stack):   # rekursi dihitung sekali per stack
+                cumulative[name] = cumulative.get(name, 0) + weight
+        ranked = sorted(cumulative.items(), key=lambda item: -item[1])[:limit]
+        return [{
+            "function": name,
+            "cumulative": round(weight, 3),
+            "self": round(own.get(name, 0), 3),
+            "cumulative_pct": round(100 * weight / total, 2),
+            "calls": self.calls.get(name),
+        } for name, weight in ranked]
+
+
+# =========================
+# Sampling (SIGPROF)
+# =========================
+def _sampling_handler(aggregate: Aggregate):
+    def handler(signum, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        aggregate.add(tuple(reversed(stack)), 1)
+    return handler
+
+
+# =========================
+# Deterministik (sys.setprofile)
+# =========================
+class _Tracer:
+    def __init__(self, aggregate: Aggregate):
+        self.aggregate = aggregate
+        self.stack: List[str] = []
+        self.last = time.perf_counter()
+
+    def _charge(self) -> None:
+        now = time.perf_counter()
+        self.aggregate.add(tuple(self.stack), (now - self.last) * 1e6)
+        self.last = now
+
+    def __call__(self, frame, event, arg):
+        if event in ("call", "c_call"):
+            self._charge()
+            name = _frame_name(frame.f_code) if event == "call" else \
+                f"<builtin>:{getattr(arg, '__qualname__', repr(arg))}"
+            self.stack.append(name)
+            self.aggregate.calls[name] = self.aggregate.calls.get(name, 0) + 1
+        elif event in ("return", "c_return", "c_exception"):
+            self._charge()
+            if self.stack:
+                self.stack.pop()
+
+
+def _profile_loop(solver, db, payload, seconds: float, counter: Dict[str, int]) -> None:
+    stop_at = time.perf_counter() + seconds
+    while True:
+        solver(db, payload)
+        counter["iterations"] += 1
+        if time.perf_counter() >= stop_at:
+            return
+
+
+def run_job(kind: str, payload_json: str, mode: str, seconds: float,
+            interval: float, top: int) -> Dict[str, Any]:
+    """Dijalankan di worker pool berat; hasil berupa dict yang bisa di-pickle."""
+    import executor
+    import memtrack
+    import schemas
+
+    seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+    module_name, fn_name, schema_name = executor.HEAVY_JOBS[kind]
+    solver = getattr(importlib.import_module(module_name), fn_name)
+    payload = getattr(schemas, schema_name).model_validate_json(payload_json)
+
+    aggregate = Aggregate()
+    counter = {"iterations": 0}
+    truncated = False
+
+    def on_budget(signum, frame):
+        raise _BudgetExceeded()
+
+    def loop(db):
+        with memtrack.paused():   # pengulangan solver tidak masuk agregat memori
+            _profile_loop(solver, db, payload, seconds, counter)
+
+    previous_alarm = signal.signal(signal.SIGALRM, on_budget)
+    # Batas keras: satu kali jalan solver yang lebih lama dari anggaran tetap dihentikan
+    signal.setitimer(signal.ITIMER_REAL, seconds + 1.0)
+    started = time.perf_counter()
+    try:
+        if mode == MODE_DETERMINISTIC:
+            sys.setprofile(_Tracer(aggregate))
+            try:
+                executor.with_session(loop)
+            finally:
+                sys.setprofile(None)
+        else:
+            previous_prof = signal.signal(signal.SIGPROF, _sampling_handler(aggregate))
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+            try:
+                executor.with_session(loop)
+            finally:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+                signal.signal(signal.SIGPROF, previous_prof)
+    except _BudgetExceeded:
+        truncated = True
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_alarm)
+
+    return {
+        "kind": kind,
+        "mode": mode,
+        "iterations": counter["iterations"],
+        "elapsed_seconds": round(time.perf_counter() - started, 6),
+        "truncated": truncated,
+        "unit": "microseconds" if mode == MODE_DETERMINISTIC else "samples",
+        "interval_seconds": interval if mode == MODE_SAMPLING else None,
+        "top": aggregate.top(top),
+        "collapsed": aggregate.collapsed(),
+    }
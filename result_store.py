@@ -0,0 +1,66 @@
+# result_store.py
+
+"""
+Penyimpanan hasil perhitungan berdasarkan hash input kanonik (content-addressed).
+
+Klien yang mengulang request karena timeout cukup dilayani dari tabel
+`calculation_results` tanpa menghitung ulang. Header `Idempotency-Key`
+dipetakan ke hash hasil yang sama. Hasil disimpan selama RESULT_RETENTION_DAYS
+hari dan bisa diambil lagi lewat hash-nya untuk keperluan audit.
+
+Jalankan `python result_store.py purge` untuk menghapus hasil yang kedaluwarsa.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import models
+
+RESULT_RETENTION_DAYS = int(os.getenv("RESULT_RETENTION_DAYS", "30"))
+
+
+def _not_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=RESULT_RETENTION_DAYS)
+
+
+async def lookup(db: AsyncSession, digest: str) -> Optional[models.StoredResult]:
+    return await crud_async.get_stored_result(db, digest, not_before=_not_before())
+
+
+async def lookup_idempotent(db: AsyncSession, key: str) -> Optional[models.StoredResult]:
+    """Hasil yang pernah dikirim untuk `Idempotency-Key` ini (bila masih disimpan)."""
+    entry = await crud_async.get_idempotency_key(db, key, not_before=_not_before())
+    if entry is None:
+        return None
+    return await lookup(db, entry.digest)
+
+
+async def store(db: AsyncSession, digest: str, kind: str, request_json: str, result_json: str,
+                idempotency_key: Optional[str] = None) -> None:
+    await crud_async.save_result(db, digest, kind, request_json, result_json, idempotency_key,
+                                 not_before=_not_before())
+
+
+def purge_expired(db: Session) -> int:
+    """Versi sync: dijalankan saat startup (preload) dan dari CLI."""
+    return crud.purge_results(db, before=_not_before())
+
+
+if __name__ == "__main__":
+    import sys
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["purge"]:
+        print("Pemakaian: python result_store.py purge")
+        sys.exit(2)
+    db = SessionLocal()
+    try:
+        print(f"{purge_expired(db)} hasil kedaluwarsa dihapus (masa simpan {RESULT_RETENTION_DAYS} hari).")
+    finally:
+        db.close()
@@ -15,6 +15,10 @@ class Heir(HeirBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+class HeirSearchHit(BaseModel):
+    heir: Heir
+    score: int                 # jumlah skor per kata kueri (persis 3, awalan 2, fuzzy 1)
+
 # --- Skema Input untuk Kalkulasi Dasar ---
 class HeirInput(BaseModel):
     id: int
@@ -94,6 +98,36 @@ class CalculationResult(BaseModel):
     shares: List[HeirShare]
     model_config = ConfigDict(from_attributes=True)
 
+# --- Skema Output /calculate/trace (hasil + jejak terstruktur) ---
+class CalculationTraceResult(BaseModel):
+    result: CalculationResult          # notes kosong; teksnya ada di trace[].description
+    trace: List[CalculationTrace]      # step = kode langkah (lihat tracing.py), data = angka mentah
+    saham: List[SahamItem]             # saham per ahli waris sebelum & sesudah tashīḥ
+    final_amounts: List[FinalAmount]
+
+# --- Skema Sesi Perhitungan Inkremental (/calculate/sessions) ---
+class SessionDelta(BaseModel):
+    add: List[HeirInput] = []          # tambah ahli waris / tambah jumlahnya
+    remove: List[int] = []             # id ahli waris yang dihapus
+    update: List[HeirInput] = []       # set jumlah baru (0 = hapus)
+    tirkah: Optional[float] = None     # None = tirkah tetap
+
+class SessionResult(BaseModel):
+    session: str                       # ID sesi berikutnya (bentuk kanonik keadaannya)
+    recomputed: str                    # tahap yang dihitung ulang: "nominal", "saham", atau "lengkap"
+    result: CalculationResult
+
+# --- Skema Pratinjau Hajb/Furudh (/calculate/preview) ---
+class PreviewInput(BaseModel):
+    heirs: List[HeirInput]             # daftar ahli waris yang sudah diisi (boleh kosong)
+
+class HeirPreview(BaseModel):
+    heir: Heir
+    present: bool                      # sudah ada di daftar
+    mahjub: bool                       # terhalang bila ditambahkan
+    blocked_by: List[int]              # id ahli waris yang menghalangi
+    fraction: Optional[str] = None     # pecahan sementara ("1/6", "Ashobah", ...); None bila mahjūb
+
 # --- Skema untuk Munasakhot ---
 class MunasakhotInput(BaseModel):
     masalah_ula: CalculationInput
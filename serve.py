@@ -0,0 +1,193 @@
+# serve.py
+
+"""
+Entry point produksi dengan model pre-fork.
+
+Proses parent memuat semua yang sifatnya read-only (katalog ahli waris,
+snapshot /heirs/, modul aturan & solver, snapshot warm-start) satu kali,
+membekukan objeknya dengan gc.freeze(), lalu mem-fork N worker uvicorn yang
+berbagi satu socket. Halaman memori parent dipakai bersama secara
+copy-on-write, tidak dibangun ulang di tiap worker seperti `uvicorn --workers N`.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers 4] [--report-interval 60]
+
+Penggunaan memori per worker (RSS & PSS dari /proc) dicetak berkala. PSS
+membagi halaman bersama secara adil ke proses pemakainya, jadi total PSS
+adalah angka yang pantas dibandingkan. Untuk pembanding, jalankan
+`uvicorn main:app --workers N` lalu ukur worker-nya dengan:
+
+    python serve.py --report-pids <pid> <pid> ...
+"""
+
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+DEFAULT_WORKERS = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+
+# Modul yang hanya berisi kode/tabel aturan; dimuat di parent agar ikut dibagi
+_RULE_MODULES = ("calculator", "app.rules.engine", "app.special.router", "app.math.ashl",
+                 "app.math.inkisar", "mauquf", "munasakhot", "gharqa")
+
+
+# =========================
+# Laporan memori
+# =========================
+def read_memory(pid: int) -> Dict[str, int]:
+    """RSS/PSS/shared/private (kB) satu proses dari /proc/<pid>/smaps_rollup."""
+    fields = {"Rss": 0, "Pss": 0, "Shared_Clean": 0, "Shared_Dirty": 0,
+              "Private_Clean": 0, "Private_Dirty": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    fields[name] = int(rest.split()[0])
+    except FileNotFoundError:
+        return {}
+    return {
+        "rss_kb": fields["Rss"],
+        "pss_kb": fields["Pss"],
+        "shared_kb": fields["Shared_Clean"] + fields["Shared_Dirty"],
+        "private_kb": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def memory_report(pids: List[int]) -> str:
+    lines = [f"{'pid':>8} {'rss_mb':>8} {'pss_mb':>8} {'shared_mb':>10} {'private_mb':>11}"]
+    total_rss = total_pss = 0
+    for pid in pids:
+        mem = read_memory(pid)
+        if not mem:
+            continue
+        total_rss += mem["rss_kb"]
+        total_pss += mem["pss_kb"]
+        lines.append(f"{pid:>8} {mem['rss_kb'] / 1024:>8.1f} {mem['pss_kb'] / 1024:>8.1f} "
+                     f"{mem['shared_kb'] / 1024:>10.1f} {mem['private_kb'] / 1024:>11.1f}")
+    lines.append(f"{'total':>8} {total_rss / 1024:>8.1f} {total_pss / 1024:>8.1f}")
+    return "\n".join(lines)
+
+
+# =========================
+# Parent
+# =========================
+def preload() -> None:
+    """Muat semua struktur read-only di parent, sebelum fork."""
+    import executor
+    import http_cache
+    import main
+
+    main.preload()
+    for name in _RULE_MODULES:
+        importlib.import_module(name)
+    try:
+        executor.with_session(http_cache.heirs_snapshot.load)
+    except Exception:
+        pass   # snapshot /heirs/ hanya optimasi; worker memuatnya sendiri saat dibutuhkan
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    # proto eksplisit: asyncio hanya memasang TCP_NODELAY pada koneksi hasil accept bila
+    # sock.proto == IPPROTO_TCP; dengan proto 0 setiap respons keep-alive tertahan
+    # Nagle + delayed ACK (~40 ms)
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM,
+                         socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, log_level: str) -> None:
+    """Badan proses worker (setelah fork). Tidak pernah kembali."""
+    import uvicorn
+    from database import dispose_engine_after_fork
+    import main
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    gc.enable()
+    dispose_engine_after_fork()
+    config = uvicorn.Config(main.app, lifespan="on", log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    os._exit(0)
+
+
+def _spawn(sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _run_worker(sock, log_level)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def serve(host: str, port: int, workers: int, report_interval: float, log_level: str) -> None:
+    # GC dimatikan selama preload agar objek tidak berpindah generasi (menulis
+    # ke header objek) sesaat sebelum dibekukan; lihat dokumentasi gc.freeze
+    gc.disable()
+    preload()
+    gc.freeze()
+
+    sock = _bind_socket(host, port)
+    children = {_spawn(sock, log_level) for _ in range(workers)}
+    print(f"[serve] parent {os.getpid()} mendengarkan {host}:{port} dengan {workers} worker", flush=True)
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    next_report = time.monotonic() + report_interval if report_interval > 0 else None
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            children.discard(pid)
+            if not stopping:
+                print(f"[serve] worker {pid} berhenti (status {status}), dijalankan ulang", flush=True)
+                children.add(_spawn(sock, log_level))
+            continue
+        if next_report is not None and time.monotonic() >= next_report:
+            print("[serve] memori worker:\n" + memory_report([os.getpid()] + sorted(children)), flush=True)
+            next_report = time.monotonic() + report_interval
+        time.sleep(0.5)
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server pre-fork Kalkulator Faraidh.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--report-interval", type=float, default=60.0,
+                        help="detik antar laporan memori worker (0 = mati)")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--report-pids", type=int, nargs="+", metavar="PID",
+                        help="cetak laporan memori untuk PID tertentu lalu keluar")
+    args = parser.parse_args()
+
+    if args.report_pids:
+        print(memory_report(args.report_pids))
+        sys.exit(0)
+    serve(args.host, args.port, args.workers, args.report_interval, args.log_level)
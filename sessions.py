@@ -0,0 +1,194 @@
+# sessions.py
+
+"""
+Sesi perhitungan inkremental untuk penyuntingan ahli waris interaktif.
+
+Klien membuat sesi sekali (POST /calculate/sessions), lalu hanya mengirim
+perubahan (tambah/hapus/ubah jumlah ahli waris, ganti tirkah). Server menyimpan
+vektor jumlah beserta tahap-tahap antara (tahap furudh, hasil tanpa catatan,
+jejak perhitungan) dan menghitung ulang hanya tahap yang terpengaruh:
+
+    nominal   hanya tirkah berubah → saham & AM tetap, nominal dihitung ulang
+    saham     tanda tangan furudh sama (mis. jumlah istri berubah, 3 → 4 anak
+              perempuan) → hajb & kasus khusus dipakai ulang, saham dihitung ulang
+    lengkap   selain itu → semua tahap
+
+ID sesi = bentuk kanonik keadaannya ("<heir_key>~<tirkah>", lihat
+canonical.encode_heir_key), jadi tidak ada keadaan yang hilang bila sesi
+kedaluwarsa atau request berikutnya jatuh ke worker lain: keadaannya cukup
+dibangun ulang dari ID. Penyimpanan di proses hanya cache LRU+TTL.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import admission
+import calculator
+import canonical
+import schemas
+from tracing import Trace
+
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "1024"))
+
+RECOMPUTE_NOMINAL = "nominal"
+RECOMPUTE_SAHAM = "saham"
+RECOMPUTE_LENGKAP = "lengkap"
+
+
+class SessionState:
+    """Keadaan satu sesi: vektor jumlah + tahap-tahap antara perhitungannya."""
+    __slots__ = ("heirs", "tirkah", "signature", "furudh", "result", "trace")
+
+    def __init__(self, heirs: List[schemas.HeirInput], tirkah: float, signature,
+                 furudh: calculator.FurudhStage, result: schemas.CalculationResult, trace: Trace):
+        self.heirs = heirs
+        self.tirkah = tirkah
+        self.signature = signature
+        self.furudh = furudh
+        self.result = result
+        self.trace = trace
+
+    @property
+    def key(self) -> str:
+        return session_key(self.heirs, self.tirkah)
+
+    def counts(self) -> Dict[int, int]:
+        return {h.id: h.quantity for h in self.heirs}
+
+    def render(self, detail: str) -> schemas.CalculationResult:
+        """Hasil untuk tingkat detail ini (catatan dirender dari jejak bila lengkap)."""
+        if detail == canonical.DETAIL_RINGKAS:
+            return self.result
+        return self.result.model_copy(update={"notes": self.trace.render_notes()})
+
+
+# =========================
+# ID sesi
+# =========================
+def session_key(heirs: List[schemas.HeirInput], tirkah: float) -> str:
+    return f"{canonical.encode_heir_key(heirs)}~{float(tirkah)!r}"
+
+
+def parse_session_key(key: str) -> Tuple[List[schemas.HeirInput], float]:
+    """Kebalikan session_key. ValueError bila formatnya salah."""
+    heir_key, sep, tirkah_text = key.rpartition("~")
+    if not sep:
+        raise ValueError(f"ID sesi tidak valid: {key!r}")
+    return canonical.decode_heir_key(heir_key), float(tirkah_text)
+
+
+# =========================
+# Perhitungan bertahap
+# =========================
+def _normalize(counts: Dict[int, int]) -> List[schemas.HeirInput]:
+    if any(q < 0 for q in counts.values()):
+        raise ValueError("Jumlah ahli waris tidak boleh negatif.")
+    heirs = [schemas.HeirInput(id=hid, quantity=q) for hid, q in sorted(counts.items()) if q > 0]
+    if not heirs:
+        raise ValueError("Sesi membutuhkan minimal satu ahli waris.")
+    admission.check_heirs(heirs)   # delta tidak boleh melewati batas yang berlaku untuk /calculate/
+    return heirs
+
+
+def compute(db, heirs: List[schemas.HeirInput], tirkah: float,
+            previous: Optional[SessionState] = None) -> Tuple[SessionState, str]:
+    """
+    Keadaan baru untuk (heirs, tirkah), memakai ulang tahap milik `previous`
+    sejauh perubahannya mengizinkan. Mengembalikan (keadaan, tingkat hitung ulang).
+    `db` hanya dipakai untuk nama ahli waris mahjūb di luar katalog.
+    """
+    tirkah = float(tirkah)
+    if previous is not None and previous.counts() == {h.id: h.quantity for h in heirs}:
+        result, trace = calculator.retarget_tirkah(previous.result, previous.trace, tirkah)
+        return SessionState(heirs, tirkah, previous.signature, previous.furudh, result, trace), RECOMPUTE_NOMINAL
+
+    signature = calculator.furudh_signature(heirs)
+    if previous is not None and previous.signature == signature:
+        furudh, level = calculator.requantify(previous.furudh, heirs), RECOMPUTE_SAHAM
+    else:
+        furudh, level = calculator.furudh_stage(heirs), RECOMPUTE_LENGKAP
+    calc_input = schemas.CalculationInput(heirs=heirs, tirkah=tirkah)
+    # Salinan: _calculate boleh memakai daftar furudh sebagai miliknya sendiri
+    items, special_notes, calc_mode = furudh
+    result, trace = calculator.calculate_traced(db, calc_input, (list(items), list(special_notes), dict(calc_mode)))
+    return SessionState(heirs, tirkah, signature, furudh, result, trace), level
+
+
+def create(db, heirs: List[schemas.HeirInput], tirkah: float) -> SessionState:
+    counts: Dict[int, int] = {}
+    for h in heirs:
+        counts.setdefault(h.id, h.quantity)   # sama dengan engine: entri pertama per id
+    state, _ = compute(db, _normalize(counts), tirkah)
+    store.put(state)
+    return state
+
+
+def load(db, key: str) -> SessionState:
+    """Keadaan sesi dari cache, atau dibangun ulang dari ID-nya. ValueError bila ID salah."""
+    state = store.get(key)
+    if state is None:
+        heirs, tirkah = parse_session_key(key)
+        if session_key(heirs, tirkah) != key:
+            raise ValueError(f"ID sesi tidak kanonik: {key!r}")
+        state, _ = compute(db, heirs, tirkah)
+        store.put(state)
+    return state
+
+
+def apply_delta(db, state: SessionState, delta: schemas.SessionDelta) -> Tuple[SessionState, str]:
+    """Terapkan perubahan (remove → update → add → tirkah) lalu hitung ulang seperlunya."""
+    counts = state.counts()
+    for hid in delta.remove:
+        counts.pop(hid, None)
+    for h in delta.update:
+        counts[h.id] = h.quantity          # 0 = hapus
+    for h in delta.add:
+        counts[h.id] = counts.get(h.id, 0) + h.quantity
+    tirkah = state.tirkah if delta.tirkah is None else delta.tirkah
+    new_state, level = compute(db, _normalize(counts), tirkah, state)
+    store.put(new_state)
+    return new_state, level
+
+
+# =========================
+# Penyimpanan di proses (LRU + TTL)
+# =========================
+class SessionStore:
+    def __init__(self, max_size: int = SESSION_MAX, ttl: float = SESSION_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[float, SessionState]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[SessionState]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            stored_at, state = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return state
+
+    def put(self, state: SessionState) -> None:
+        with self._lock:
+            self._items[state.key] = (time.monotonic(), state)
+            self._items.move_to_end(state.key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+store = SessionStore()
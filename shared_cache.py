@@ -0,0 +1,252 @@
+# shared_cache.py
+
+"""
+Cache kerangka (skeleton) hasil perhitungan yang dipakai bersama oleh semua
+worker uvicorn di satu mesin, lewat file yang di-mmap.
+
+Kerangka = bagian hasil yang tidak bergantung pada tirkah: AM awal/akhir,
+status, total saham, dan per ahli waris (id, jumlah, pecahan, saham, alasan).
+Nama ahli waris tidak disimpan — diambil dari katalog saat hasil dibangun
+ulang, jadi perubahan katalog (/heirs/bulk) langsung terlihat tanpa membuang
+file cache. Nominal tiap ahli waris dihitung ulang dari saham/AM × tirkah.
+
+Tata letak file (semua little-endian):
+  header (64 byte) : magic, versi layout, jumlah slot, ukuran slot
+  slot[i]          : seq u32 | key 16 byte | hits u32 | panjang u32 | payload
+Slot dicari dengan open addressing (linear probing) dari hash kunci.
+
+Pembaca tidak memakai lock (seqlock): seq ganjil berarti slot sedang ditulis,
+dan seq yang berubah selama membaca berarti data harus dibuang. Penulis saling
+mengunci dengan flock. Nama file memuat sidik jari kode aturan, jadi restart
+dengan kode yang sama langsung hangat, sedangkan kode baru memakai file baru.
+"""
+
+from __future__ import annotations
+import contextlib
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import catalog
+import schemas
+
+MAGIC = b"FRDHSKL1"
+LAYOUT_VERSION = 2                             # 2: kerangka tanpa nama ahli waris
+HEADER = struct.Struct("<8sIII")               # magic, versi, jumlah slot, ukuran slot
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<I16sII")         # seq, key, hits, panjang payload
+SLOT_SIZE = 4096
+SLOT_PAYLOAD = SLOT_SIZE - SLOT_HEADER.size
+PROBE_LIMIT = 8
+
+SHARED_CACHE_SLOTS = int(os.getenv("SHARED_CACHE_SLOTS", "4096"))
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", tempfile.gettempdir())
+
+# Berkas yang menentukan hasil perhitungan (dan format kerangkanya); perubahan isinya mengganti file cache
+_RULE_SOURCES = ("calculator.py", "schemas.py", "shared_cache.py", "app/rules/engine.py", "app/special", "app/math")
+
+
+def code_fingerprint() -> str:
+    """Sidik jari (hex pendek) dari kode aturan yang menentukan hasil perhitungan."""
+    root = Path(__file__).resolve().parent
+    digest = hashlib.sha256()
+    for name in _RULE_SOURCES:
+        path = root / name
+        files = sorted(path.glob("*.py")) if path.is_dir() else [path]
+        for f in files:
+            digest.update(f.relative_to(root).as_posix().encode())
+            digest.update(f.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def skeleton_key(heirs: Sequence[schemas.HeirInput]) -> bytes:
+    """Kunci 16 byte dari multiset ahli waris kanonik (tanpa tirkah)."""
+    raw = json.dumps([[h.id, h.quantity, h.penghalang, h.status]
+                      for h in sorted(heirs, key=lambda h: h.id)], separators=(",", ":"))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+
+# =========================
+# Kerangka ↔ CalculationResult
+# =========================
+def skeleton_from_result(result: schemas.CalculationResult) -> bytes:
+    body = {
+        "a": result.ashlul_masalah_awal,
+        "b": result.ashlul_masalah_akhir,
+        "t": result.total_saham,
+        "s": result.status,
+        "h": [
+            # Ahli waris mahjūb ditandai karena nominalnya selalu 0.0 (tidak dihitung ulang)
+            [s.heir.id, s.quantity, s.share_fraction,
+             s.saham, s.reason, s.share_fraction == "-" and s.share_amount == 0.0]
+            for s in result.shares
+        ],
+    }
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def result_from_skeleton(payload: bytes, tirkah: float) -> Optional[schemas.CalculationResult]:
+    """
+    Bangun ulang hasil (tanpa catatan) dari kerangka untuk tirkah tertentu.
+    None bila ada ahli waris yang tidak ada di katalog (pemanggil menghitung biasa).
+    """
+    body = json.loads(payload)
+    am_akhir = body["b"]
+    shares: List[schemas.HeirShare] = []
+    for hid, qty, fraction, saham, reason, mahjub in body["h"]:
+        heir = catalog.get_heir(hid)
+        if heir is None:
+            return None
+        if mahjub:
+            amount = 0.0
+        else:
+            amount = round((saham / am_akhir) * tirkah, 2) if am_akhir else 0.0
+        shares.append(schemas.HeirShare(
+            heir=heir,
+            quantity=qty, share_fraction=fraction, saham=saham, reason=reason, share_amount=amount,
+        ))
+    return schemas.CalculationResult(
+        tirkah=tirkah,
+        ashlul_masalah_awal=body["a"],
+        ashlul_masalah_akhir=am_akhir,
+        total_saham=body["t"],
+        status=body["s"],
+        notes=[],
+        shares=shares,
+    )
+
+
+# =========================
+# File mmap
+# =========================
+class SharedSkeletonCache:
+    def __init__(self, path: Path, slots: int = SHARED_CACHE_SLOTS):
+        self.path = path
+        self.slots = slots
+        self._size = HEADER_SIZE + slots * SLOT_SIZE
+        self._local_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            if os.fstat(self._fd).st_size != self._size or not self._header_ok():
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, HEADER.pack(MAGIC, LAYOUT_VERSION, slots, SLOT_SIZE), 0)
+        self._mm = mmap.mmap(self._fd, self._size)
+
+    def _header_ok(self) -> bool:
+        raw = os.pread(self._fd, HEADER.size, 0)
+        return len(raw) == HEADER.size and HEADER.unpack(raw) == (MAGIC, LAYOUT_VERSION, self.slots, SLOT_SIZE)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # flock mengunci antar-proses; lock lokal menjaga antar-thread di proses ini
+        with self._local_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _offsets(self, key: bytes):
+        start = int.from_bytes(key[:8], "little") % self.slots
+        for i in range(PROBE_LIMIT):
+            yield HEADER_SIZE + ((start + i) % self.slots) * SLOT_SIZE
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """Baca kerangka tanpa lock. None bila tidak ada atau sedang ditulis."""
+        mm = self._mm
+        for off in self._offsets(key):
+            seq, slot_key, hits, length = SLOT_HEADER.unpack_from(mm, off)
+            if seq == 0:
+                return None          # slot kosong → kunci pasti tidak ada lebih jauh
+            if slot_key != key or seq & 1:
+                continue
+            payload = mm[off + SLOT_HEADER.size: off + SLOT_HEADER.size + length]
+            if SLOT_HEADER.unpack_from(mm, off)[0] != seq:
+                return None          # ditimpa penulis di tengah pembacaan
+            # Penghitung hit sengaja tanpa lock; selisih kecil tidak masalah
+            struct.pack_into("<I", mm, off + 20, (hits + 1) & 0xFFFFFFFF)
+            return payload
+        return None
+
+    def _find(self, key: bytes) -> Optional[int]:
+        for off in self._offsets(key):
+            seq, slot_key, _, _ = SLOT_HEADER.unpack_from(self._mm, off)
+            if seq == 0:
+                return None
+            if slot_key == key and not seq & 1:
+                return off
+        return None
+
+    def put(self, key: bytes, payload: bytes) -> bool:
+        """
+        Simpan kerangka. Kerangka untuk satu kunci selalu sama (nama file sudah
+        terikat ke versi kode), jadi kunci yang sudah ada tidak ditulis ulang.
+        """
+        if len(payload) > SLOT_PAYLOAD:
+            return False
+        if self._find(key) is not None:
+            return True
+        mm = self._mm
+        with self._locked():
+            if self._find(key) is not None:
+                return True
+            target = None
+            coldest = None
+            for off in self._offsets(key):
+                seq, slot_key, hits, _ = SLOT_HEADER.unpack_from(mm, off)
+                if seq == 0 or slot_key == key:
+                    target = off
+                    break
+                if coldest is None or hits < coldest[1]:
+                    coldest = (off, hits)
+            if target is None:
+                target = coldest[0]   # semua probe terisi → gusur yang paling jarang dipakai
+            seq = (SLOT_HEADER.unpack_from(mm, target)[0] + 1) | 1   # ganjil: sedang ditulis
+            struct.pack_into("<I", mm, target, seq)
+            mm[target + SLOT_HEADER.size: target + SLOT_HEADER.size + len(payload)] = payload
+            SLOT_HEADER.pack_into(mm, target, seq + 1, key, 0, len(payload))   # genap: selesai
+        return True
+
+    def entries(self):
+        """Iterasi (hits, key, payload) semua slot yang terisi."""
+        mm = self._mm
+        for i in range(self.slots):
+            off = HEADER_SIZE + i * SLOT_SIZE
+            seq, key, hits, length = SLOT_HEADER.unpack_from(mm, off)
+            if seq == 0 or seq & 1:
+                continue
+            payload = mm[off + SLOT_HEADER.size: off + SLOT_HEADER.size + length]
+            if SLOT_HEADER.unpack_from(mm, off)[0] == seq:
+                yield hits, key, payload
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+_cache: Optional[SharedSkeletonCache] = None
+_cache_pid = 0
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SharedSkeletonCache:
+    """
+    Cache bersama untuk kode aturan yang sedang berjalan, dibuka sekali per proses.
+    Proses hasil fork membuka ulang file-nya sendiri karena flock berlaku per
+    file descriptor, bukan per proses.
+    """
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            path = Path(SHARED_CACHE_DIR) / f"faraidh_skeletons-{code_fingerprint()}.bin"
+            _cache = SharedSkeletonCache(path)
+            _cache_pid = os.getpid()
+        return _cache
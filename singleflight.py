@@ -0,0 +1,87 @@
+# singleflight.py
+
+"""
+Penggabungan (coalescing) request identik yang sedang berjalan bersamaan.
+
+Request pertama untuk sebuah kunci menjadi "leader" dan benar-benar menghitung;
+request lain dengan kunci yang sama selama leader belum selesai hanya menunggu
+future yang sama. Peta future dijaga oleh threading.Lock dan isinya
+concurrent.futures.Future, sehingga pemanggil sinkron (thread) dan asinkron
+(event loop) bisa saling bergabung.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Set
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        # Referensi kuat ke task leader: event loop hanya menyimpan weakref-nya
+        self._tasks: Set[asyncio.Task] = set()
+        self._leaders = 0
+        self._coalesced = 0
+
+    def _join(self, key: str):
+        """Kembalikan (future, is_leader) untuk kunci ini."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[..., Any], *args) -> Any:
+        """Versi sinkron (untuk pemanggil di thread)."""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Versi asinkron. Perhitungan leader dijalankan sebagai task tersendiri,
+        jadi bila klien leader memutus koneksi, peserta lain tetap mendapat hasil.
+        """
+        future, is_leader = self._join(key)
+        if is_leader:
+            task = asyncio.ensure_future(self._lead(key, future, fn, args))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        # shield: pembatalan satu peserta tidak ikut membatalkan future bersama
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def _lead(self, key: str, future: Future, fn, args) -> None:
+        try:
+            result = await fn(*args)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            return
+        self._finish(key, future, result=result)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self._leaders, "coalesced": self._coalesced}
+
+
+calculation_flights = SingleFlight()
@@ -0,0 +1,40 @@
+# Di dalam file: test_admission.py
+
+"""Tes kontrol penerimaan payload perhitungan (admission.py)."""
+
+import pytest
+
+import admission
+from schemas import CalculationInput, GharqaInput, HamlInput, HeirInput
+
+
+def test_duplikat_dibuang_entri_pertama_dipertahankan():
+    data = CalculationInput(heirs=[HeirInput(id=3), HeirInput(id=21, quantity=2)] * 2000
+                            + [HeirInput(id=3, quantity=7)], tirkah=1000)
+    admitted = admission.admit("calculate", data)
+    assert [(h.id, h.quantity) for h in admitted.payload.heirs] == [(3, 1), (21, 2)]
+    assert admitted.route == admission.ROUTE_INLINE
+
+
+def test_status_berbeda_tidak_dianggap_duplikat():
+    data = HamlInput(heirs=[HeirInput(id=1), HeirInput(id=1, status="haml")], tirkah=1000)
+    assert len(admission.admit("haml", data).payload.heirs) == 2
+
+
+def test_batas_ukuran_ditolak():
+    with pytest.raises(admission.AdmissionRejected) as e:
+        admission.admit("calculate", CalculationInput(heirs=[HeirInput(id=1, quantity=10**9)], tirkah=1))
+    assert e.value.status_code == 422
+    with pytest.raises(admission.AdmissionRejected) as e:
+        admission.admit("calculate", CalculationInput(heirs=[HeirInput(id=i) for i in range(200)], tirkah=1))
+    assert e.value.status_code == 413
+    problems = [{"problem_name": str(i), "heirs": [{"id": 1}], "tirkah": 1} for i in range(1000)]
+    with pytest.raises(admission.AdmissionRejected):
+        admission.admit("gharqa", GharqaInput(problems=problems))
+
+
+def test_perhitungan_mahal_dialihkan_ke_pool_berat():
+    heirs = [HeirInput(id=i, quantity=999) for i in range(1, 60)]
+    admitted = admission.admit("calculate", CalculationInput(heirs=heirs, tirkah=1000))
+    assert admitted.cost > admission.INLINE_COST_MAX
+    assert admitted.route == admission.ROUTE_HEAVY
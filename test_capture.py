@@ -0,0 +1,57 @@
+# Di dalam file: test_capture.py
+
+"""
+Tes perekam request (capture.py): hanya rute /calculate* yang direkam,
+header & teks bebas disanitasi, dan respons terekam bisa dibandingkan ulang.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import capture
+import database
+import main
+
+
+@pytest.fixture
+def rekaman(tmp_path, monkeypatch):
+    # URL sudah dibaca saat `database` di-import; env var di sini tidak berpengaruh lagi
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "")
+    capture.start(str(tmp_path))
+    yield tmp_path
+    capture.stop()
+
+
+def _baris(directory):
+    return [json.loads(line) for f in directory.glob("capture-*.ndjson") for line in f.read_text().splitlines()]
+
+
+def test_rekam_dan_sanitasi(rekaman):
+    with TestClient(main.app) as client:
+        client.post("/calculate/", json={"heirs": [{"id": 3}, {"id": 1}], "tirkah": 1200},
+                    headers={"Idempotency-Key": "rahasia", "X-Admin-Token": "rahasia"})
+        client.post("/calculate/gharqa/", json={"problems": [
+            {"problem_name": "Pak Budi", "heirs": [{"id": 3}], "tirkah": 100}]})
+        client.get("/heirs/")
+    capture.stop()
+    text = "".join(f.read_text() for f in rekaman.glob("capture-*.ndjson"))
+    assert "rahasia" not in text and "Pak Budi" not in text
+    calc, gharqa = _baris(rekaman)
+    assert calc["path"] == "/calculate/" and calc["status"] == 200
+    assert calc["body"] == {"heirs": [{"id": 3}, {"id": 1}], "tirkah": 1200}
+    assert set(calc["headers"]) <= set(capture.CAPTURED_HEADERS)
+    assert calc["response"]["shares"] and calc["elapsed_ms"] > 0
+    name = capture.pseudonym("Pak Budi")
+    assert gharqa["body"]["problems"][0]["problem_name"] == name
+    assert gharqa["response"][0]["problem_name"] == name
+    assert capture.pseudonym(name) == name
+
+
+def test_nonaktif_tanpa_direktori(tmp_path):
+    capture.start("")
+    assert not capture.enabled()
+    with TestClient(main.app) as client:
+        assert client.post("/calculate/", json={"heirs": [{"id": 3}], "tirkah": 10}).status_code == 200
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,41 @@
+# test_compact.py
+
+"""Tes format respons ringkas (compact.py): negosiasi media type & notes."""
+
+import compact
+from calculator import calculate_inheritance
+from schemas import CalculationInput, HeirInput
+
+
+def test_q_nol_berarti_tidak_diterima():
+    assert compact.negotiate(None, "application/x-msgpack;q=0, application/json") is None
+    assert compact.negotiate(None, "application/vnd.faraidh.compact+json; q=0.0") is None
+    assert compact.negotiate(None, "application/msgpack;q=0.5") == compact.MEDIA_MSGPACK
+    assert compact.negotiate("compact", "application/msgpack;q=0") == compact.MEDIA_COMPACT_JSON
+
+
+
+def test_format_eksplisit_menang_atas_accept():
+    assert compact.negotiate("compact", "application/x-msgpack") == compact.MEDIA_COMPACT_JSON
+    assert compact.negotiate("compact", "application/json") == compact.MEDIA_COMPACT_JSON
+
+
+def test_accept_dipilih_menurut_q():
+    assert compact.negotiate(None, "application/json, application/x-msgpack;q=0.5") is None
+    assert compact.negotiate(None, "application/msgpack;q=0.5, */*;q=0.8") is None
+    assert compact.negotiate(None, "application/json;q=0.5, application/x-msgpack") == compact.MEDIA_MSGPACK
+    assert compact.negotiate(None, "application/msgpack, application/json") == compact.MEDIA_MSGPACK
+    assert (compact.negotiate(None, "application/msgpack;q=0.4, application/vnd.faraidh.compact+json;q=0.9")
+            == compact.MEDIA_COMPACT_JSON)
+    assert compact.negotiate(None, "text/html, */*;q=0.8") is None
+
+def test_notes_hanya_bila_diminta():
+    assert compact.negotiate("compact", None) == compact.MEDIA_COMPACT_JSON
+    with_notes = compact.negotiate("compact", None, notes=True)
+    assert compact.wants_notes(with_notes) and not compact.wants_notes(compact.MEDIA_COMPACT_JSON)
+    assert compact.negotiate(None, "application/vnd.faraidh.compact+json;notes=1") == with_notes
+
+    result = calculate_inheritance(None, CalculationInput(heirs=[HeirInput(id=3), HeirInput(id=18)], tirkah=1200))
+    assert result.notes
+    assert "notes" not in compact.convert("calculate", result)
+    assert compact.convert("calculate", result, notes=True)["notes"] == result.notes
@@ -0,0 +1,51 @@
+# test_executor.py
+
+"""Tes pool eksekusi (executor.py): tenggat & recycle pool proses."""
+
+import asyncio
+import time
+
+import pytest
+
+import executor
+
+
+def _lambat(seconds: float, value):
+    time.sleep(seconds)
+    return value
+
+
+def test_recycle_karena_tugas_macet_tidak_menggagalkan_tugas_lain():
+    pool = executor.WorkPool("uji", "process", 2)
+
+    async def skenario():
+        macet = asyncio.ensure_future(pool.run(_lambat, 30, "macet", timeout=0.5))
+        lain = asyncio.ensure_future(pool.run(_lambat, 1.0, "selesai", timeout=20))
+        with pytest.raises(executor.DeadlineExceeded):
+            await macet
+        return await lain
+
+    try:
+        assert asyncio.run(skenario()) == "selesai"
+        stats = pool.stats()
+        assert stats["retried"] == 1
+        assert stats["in_flight"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_worker_hilang_dua_kali_jadi_worker_lost():
+    pool = executor.WorkPool("uji", "process", 1)
+
+    async def skenario():
+        task = asyncio.ensure_future(pool.run(_lambat, 5, "x", timeout=20))
+        for _ in range(2):
+            await asyncio.sleep(0.5)
+            pool.recycle()
+        await task
+
+    try:
+        with pytest.raises(executor.WorkerLost):
+            asyncio.run(skenario())
+    finally:
+        pool.shutdown()
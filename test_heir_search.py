@@ -0,0 +1,39 @@
+# Di dalam file: test_heir_search.py
+
+"""Tes indeks pencarian ahli waris (heir_search.py)."""
+
+import catalog
+import heir_search
+
+ROWS = [{"id": hid, "name_id": name_id, "name_ar": name_ar} for hid, name_id, name_ar in catalog.DEFAULT_HEIRS]
+
+
+def _ids(query):
+    return [row["id"] for row, _ in heir_search.SearchIndex(ROWS).search(query)]
+
+
+def test_normalisasi_arab_dan_latin():
+    assert heir_search.normalize("أُخْتٌ لِأُمّ") == "اخت لام"
+    assert heir_search.normalize("Jadd ma‘al-Ikhwah") == "jadd maal ikhwah"
+    assert heir_search.normalize("Mu‘tiqah") == "mutiqah"
+
+
+def test_cari_nama_indonesia_arab_dan_transliterasi():
+    assert _ids("saudari")[:3] == [21, 22, 23]
+    assert _ids("ukht") == [21, 22, 23]
+    assert _ids("أخت") == [21, 22, 23]
+    assert _ids("إبن") == _ids("ابن")
+    assert _ids("nenek ayah") == [20]
+
+
+def test_awalan_dan_salah_ketik():
+    assert _ids("pam") == [12, 13, 14, 15]
+    assert 7 in _ids("saudra kandung")
+    assert _ids("xyz") == []
+
+
+def test_indeks_dibangun_ulang_saat_generasi_berganti():
+    first = heir_search.index_for(1, ROWS)
+    assert heir_search.index_for(1, ROWS) is first
+    renamed = [dict(row, name_id="Mertua") if row["id"] == 1 else row for row in ROWS]
+    assert [row["id"] for row, _ in heir_search.index_for(2, renamed).search("mertua")] == [1]
@@ -0,0 +1,93 @@
+# test_heirs_bulk.py
+
+"""
+Tes POST /heirs/bulk (upsert ON CONFLICT) dengan database SQLite sementara:
+perubahan tersimpan & terlihat, dan dua jalur 409 membatalkan seluruh perubahan.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import catalog
+import crud
+import database
+import http_cache
+import main
+import models
+from database import Base
+
+
+@pytest.fixture
+def db_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'heirs.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all(models.Heir(id=hid, name_id=name_id, name_ar=name_ar)
+                   for hid, name_id, name_ar in catalog.DEFAULT_HEIRS)
+        db.commit()
+    engine.dispose()
+    # URL sudah dibaca saat `database` di-import; patch atributnya, bukan env var
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", url)
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", None)
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_async_engine", None)
+    monkeypatch.setattr(main.warm_start, "WARM_START_PATH", str(tmp_path / "tidak-ada.snap"))
+    http_cache.heirs_snapshot.invalidate()
+    yield url
+    if database._engine is not None:
+        database._engine.dispose()
+    http_cache.heirs_snapshot.invalidate()
+    catalog.load_defaults()
+
+
+def _rows(url):
+    engine = create_engine(url)
+    try:
+        with sessionmaker(bind=engine)() as db:
+            return {row.id: (row.name_id, row.name_ar) for row in crud.get_heir_rows(db, limit=None)}
+    finally:
+        engine.dispose()
+
+
+def test_upsert_tersimpan_dan_terlihat(db_url):
+    with TestClient(main.app) as client:
+        client.get("/heirs/")   # snapshot terisi dulu; harus dibuang setelah penulisan
+        response = client.post("/heirs/bulk", json=[
+            {"id": 3, "name_id": "Suami", "name_ar": "الزوج"},                       # ON CONFLICT → update
+            {"id": 26, "name_id": "Dzawil Arham", "name_ar": "ذوو الأرحام"},        # baris baru
+        ])
+        assert response.status_code == 200, response.text
+        assert [h["id"] for h in response.json()] == [3, 26]
+        listed = {h["id"]: h for h in client.get("/heirs/?limit=100").json()}
+    assert listed[3]["name_ar"] == "الزوج" and 26 in listed
+    assert catalog.get_heir(3).name_ar == "الزوج"
+    rows = _rows(db_url)
+    assert rows[3] == ("Suami", "الزوج") and rows[26][0] == "Dzawil Arham" and len(rows) == 26
+
+
+def test_409_pemetaan_id_engine_dibatalkan(db_url):
+    before = _rows(db_url)
+    with TestClient(main.app) as client:
+        response = client.post("/heirs/bulk", json=[
+            {"id": 5, "name_id": "Cucu (baru)", "name_ar": "ابن الابن"},
+            {"id": 26, "name_id": "Dzawil Arham", "name_ar": "ذوو الأرحام"},
+        ])
+    assert response.status_code == 409
+    assert any("ID 5" in problem for problem in response.json()["detail"])
+    assert _rows(db_url) == before
+    assert catalog.get_heir(5).name_id == "Cucu Laki-laki"
+
+
+def test_409_nama_bentrok_dibatalkan(db_url):
+    before = _rows(db_url)
+    with TestClient(main.app) as client:
+        response = client.post("/heirs/bulk", json=[
+            {"id": 27, "name_id": "Baris Baru", "name_ar": "جديد"},
+            {"id": 26, "name_id": "Suami", "name_ar": "زوج آخر"},   # name_id unik milik id 3
+        ])
+    assert response.status_code == 409
+    assert "bentrok" in response.json()["detail"]
+    assert _rows(db_url) == before
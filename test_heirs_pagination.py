@@ -0,0 +1,87 @@
+# test_heirs_pagination.py
+
+"""
+Tes paginasi keyset `after=` (http_cache.HeirsSnapshot.page_after, crud.heir_rows_query):
+halaman berurutan menyusun ulang daftar lengkap tanpa celah maupun duplikat.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import database
+import http_cache
+import main
+import models
+from database import Base
+
+# ID sengaja jarang & dimasukkan tidak berurutan
+IDS = [40, 2, 7, 3, 19, 100, 8, 55, 1, 21, 22, 99]
+ROWS = [{"name_id": f"Ahli {hid}", "name_ar": f"وارث {hid}", "id": hid} for hid in IDS]
+EXPECTED = sorted(ROWS, key=lambda row: row["id"])
+
+
+def _pages_from_snapshot(snapshot, limit: int):
+    rows, after, seen = [], 0, 0
+    while True:
+        body, _, next_cursor = snapshot.page_after(after, limit)
+        rows.extend(json.loads(body))
+        seen += 1
+        if next_cursor is None:
+            return rows, seen
+        after = next_cursor
+
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 11, 12, 50])
+def test_snapshot_page_after_lengkap_tanpa_celah(limit):
+    snapshot = http_cache.HeirsSnapshot()
+    snapshot.set_rows(EXPECTED)
+    rows, pages = _pages_from_snapshot(snapshot, limit)
+    assert rows == EXPECTED
+    assert pages == max(1, -(-len(EXPECTED) // limit))
+    # Kursor di antara dua id (id yang sudah dihapus) tetap melanjutkan dengan benar
+    body, _, _ = snapshot.page_after(9, 3)
+    assert [row["id"] for row in json.loads(body)] == [19, 21, 22]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 12])
+def test_heir_rows_query_keyset_di_database(tmp_path, limit):
+    engine = create_engine(f"sqlite:///{tmp_path / 'heirs.db'}")
+    Base.metadata.create_all(engine)
+    try:
+        with sessionmaker(bind=engine)() as db:
+            db.add_all(models.Heir(**row) for row in ROWS)
+            db.commit()
+            rows, after = [], None
+            while True:
+                page = crud.get_heir_rows(db, after_id=after, limit=limit)
+                if not page:
+                    break
+                rows.extend({"name_id": r.name_id, "name_ar": r.name_ar, "id": r.id} for r in page)
+                after = page[-1].id
+            assert rows == EXPECTED
+    finally:
+        engine.dispose()
+
+
+def test_heirs_after_lewat_http(monkeypatch):
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "")
+    http_cache.heirs_snapshot.invalidate()
+    try:
+        with TestClient(main.app) as client:
+            full = client.get("/heirs/?limit=1000").json()
+            rows, after = [], 0
+            while True:
+                response = client.get(f"/heirs/?after={after}&limit=4")
+                rows.extend(response.json())
+                if "x-next-cursor" not in response.headers:
+                    break
+                after = int(response.headers["x-next-cursor"])
+        assert rows == full
+        assert [row["id"] for row in rows] == sorted({row["id"] for row in rows})
+    finally:
+        http_cache.heirs_snapshot.invalidate()
@@ -0,0 +1,81 @@
+# test_http_cache.py
+
+"""
+Tes cache HTTP (http_cache.py): ETag/If-None-Match → 304, Cache-Control,
+redirect 301 ke kunci kanonik, dan snapshot /heirs/ yang dibuang saat ada penulisan.
+Dijalankan dalam mode tanpa database.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import http_cache
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # URL sudah dibaca saat `database` di-import; env var di sini tidak berpengaruh lagi
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "")
+    http_cache.heirs_snapshot.invalidate()
+    with TestClient(main.app) as client:
+        yield client
+    http_cache.heirs_snapshot.invalidate()
+
+
+def test_heirs_etag_304_dan_cache_control(client):
+    first = client.get("/heirs/")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == http_cache.HEIRS_CACHE_CONTROL == "public, no-cache"
+    etag = first.headers["etag"]
+
+    again = client.get("/heirs/", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+    assert client.get("/heirs/", headers={"If-None-Match": '"lain", ' + etag}).status_code == 304
+    assert client.get("/heirs/", headers={"If-None-Match": '"lain"'}).status_code == 200
+    # Halaman lain → body & ETag lain
+    assert client.get("/heirs/?skip=5&limit=5").headers["etag"] != etag
+
+
+def test_snapshot_dibuang_setelah_penulisan(client):
+    first = client.get("/heirs/")
+    etag = first.headers["etag"]
+    rows = first.json()
+
+    # Seperti setelah POST /heirs/ atau /heirs/bulk: snapshot berisi baris baru
+    renamed = [dict(row, name_id="Suami (baru)") if row["id"] == 3 else row for row in rows]
+    http_cache.heirs_snapshot.set_rows(renamed)
+    changed = client.get("/heirs/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert next(r for r in changed.json() if r["id"] == 3)["name_id"] == "Suami (baru)"
+
+    # invalidate() → dimuat ulang dari sumbernya pada request berikutnya
+    http_cache.heirs_snapshot.invalidate()
+    assert not http_cache.heirs_snapshot.is_fresh()
+    reloaded = client.get("/heirs/", headers={"If-None-Match": etag})
+    assert reloaded.status_code == 304
+    assert http_cache.heirs_snapshot.is_fresh()
+
+
+def test_calculate_get_etag_dan_cache_control(client):
+    response = client.get("/calculate/k/3-18-21x2?tirkah=1200")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == http_cache.CALCULATION_CACHE_CONTROL
+    assert response.headers["vary"] == "Accept"
+    etag = response.headers["etag"]
+    assert response.json()["ashlul_masalah_awal"] > 0
+
+    cached = client.get("/calculate/k/3-18-21x2?tirkah=1200", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    # Tirkah lain → hasil lain → ETag lain
+    assert client.get("/calculate/k/3-18-21x2?tirkah=600").headers["etag"] != etag
+
+
+def test_calculate_get_kunci_tidak_kanonik_dialihkan(client):
+    response = client.get("/calculate/k/21x2-18-3?tirkah=1200&detail=ringkas", follow_redirects=False)
+    assert response.status_code == 301
+    assert response.headers["location"].endswith("/calculate/k/3-18-21x2?tirkah=1200&detail=ringkas")
+    assert client.get("/calculate/k/zzz?tirkah=1").status_code == 422
@@ -0,0 +1,52 @@
+# Di dalam file: test_memtrack.py
+
+"""
+Tes pelacak memori (memtrack.py): pengukuran bersarang tetap melihat puncak
+tahap di dalamnya, dan pelacak nonaktif tidak mencatat apa pun.
+"""
+
+import pytest
+
+import memtrack
+
+
+@pytest.fixture
+def aktif():
+    memtrack.start()
+    memtrack.rolling.reset()
+    yield memtrack.rolling
+    memtrack.stop()
+    memtrack.rolling.reset()
+
+
+def test_puncak_tahap_terlipat_ke_pengukuran_luar(aktif):
+    with memtrack.measure("endpoint:luar"):
+        with memtrack.stage("dalam"):
+            buffer = bytearray(1_000_000)
+            del buffer
+        kecil = bytearray(1000)
+    stats = aktif.stats()
+    assert stats["stage:dalam"]["peak_bytes"]["max"] >= 1_000_000
+    assert stats["stage:dalam"]["net_bytes"]["max"] < 100_000
+    # reset_peak oleh tahap dalam tidak menghapus puncak milik pengukuran luar
+    assert stats["endpoint:luar"]["peak_bytes"]["max"] >= 1_000_000
+    assert stats["endpoint:luar"]["count"] == 1
+    del kecil
+
+
+def test_jendela_bergulir_dan_merge(aktif):
+    rolling = memtrack.RollingStats(window=3)
+    for peak in (10, 20, 30, 40):
+        rolling.add("stage:x", (peak, 0, 1))
+    stats = rolling.stats()["stage:x"]
+    assert stats["count"] == 4 and stats["window"] == 3
+    assert stats["peak_bytes"] == {"last": 40, "p50": 30, "p95": 40, "max": 40}
+    memtrack.merge([("job:haml", (5, 1, 2))])
+    assert memtrack.snapshot()["jobs"]["haml"]["count"] == 1
+
+
+def test_nonaktif_tidak_mencatat():
+    memtrack.rolling.reset()
+    with memtrack.stage("apa.saja"), memtrack.measure("endpoint:x"):
+        pass
+    assert memtrack.rolling.stats() == {}
@@ -0,0 +1,64 @@
+# Di dalam file: test_preview.py
+
+"""
+Tes pratinjau hajb/furudh (preview.py): hasil mask penghalang harus sama
+dengan determine_furudh + kasus khusus bila kandidat benar-benar ditambahkan.
+"""
+
+import random
+
+import pytest
+
+import catalog
+import preview
+from app.rules.engine import determine_furudh
+from app.special.router import apply_special_cases
+from schemas import HeirInput
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _katalog():
+    catalog.load_defaults()
+
+
+def _expected(heirs, hid):
+    """Pecahan `hid` menurut engine (None = mahjūb)."""
+    if all(h.id != hid for h in heirs):
+        heirs = heirs + [HeirInput(id=hid)]
+    items, _, _ = apply_special_cases(None, heirs, determine_furudh(None, heirs))
+    fractions = [f.fraction for f in items if f.heir.id == hid]
+    assert len(fractions) <= 1
+    return fractions[0] if fractions else None
+
+
+def _by_id(heirs):
+    return {p.heir.id: p for p in preview.preview(heirs)}
+
+
+def test_pratinjau_sama_dengan_engine():
+    rnd = random.Random(42)
+    for _ in range(2000):
+        ids = rnd.sample(range(1, 26), rnd.randint(0, 6))
+        heirs = [HeirInput(id=i, quantity=rnd.choice([1, 1, 2, 3])) for i in ids]
+        result = preview.preview(heirs)
+        assert [p.heir.id for p in result] == list(range(1, 26))
+        for p in result:
+            expected = _expected(heirs, p.heir.id)
+            assert p.fraction == expected, (ids, p.heir.id)
+            assert p.mahjub == (expected is None)
+            assert p.present == (p.heir.id in ids)
+
+
+def test_penghalang_disebutkan():
+    result = _by_id([HeirInput(id=1), HeirInput(id=2)])   # Anak Laki-laki, Ayah
+    assert result[5].mahjub and result[5].blocked_by == [1]
+    assert result[7].mahjub and result[7].blocked_by == [1, 2]
+    assert result[20].blocked_by == [2]
+    assert not result[18].mahjub and result[18].fraction == "1/6"
+
+
+def test_pratinjau_akdariyyah():
+    # Suami, Ibu, Kakek: Saudari Kandung tidak terhalang Kakek karena Akdariyyah
+    result = _by_id([HeirInput(id=3), HeirInput(id=18), HeirInput(id=6)])
+    assert result[21].fraction == "Ashobah" and not result[21].mahjub
+    assert result[22].mahjub and result[22].blocked_by == [6]
@@ -0,0 +1,42 @@
+# Di dalam file: test_profiler.py
+
+"""
+Tes profiler on-demand (profiler.py): stack terlipat dipangkas di bawah
+loop profiler dan kedua mode menghasilkan profil solver yang diminta.
+"""
+
+import pytest
+
+import catalog
+import database
+import profiler
+import schemas
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _katalog():
+    catalog.load_defaults()
+
+
+def test_stack_dipangkas_di_loop_profiler():
+    agg = profiler.Aggregate()
+    agg.add(("x.py:main", profiler._LOOP_FRAME, "a.py:f", "a.py:g"), 3)
+    agg.add(("x.py:main", profiler._LOOP_FRAME, "a.py:f"), 1)
+    agg.add(("x.py:main",), 5)            # di luar loop solver: dibuang
+    assert agg.collapsed().splitlines() == ["a.py:f 1", "a.py:f;a.py:g 3"]
+    top = {t["function"]: t for t in agg.top(10)}
+    assert top["a.py:f"]["cumulative"] == 4 and top["a.py:f"]["self"] == 1
+    assert top["a.py:g"]["cumulative_pct"] == 75.0
+
+
+@pytest.mark.parametrize("mode", [profiler.MODE_SAMPLING, profiler.MODE_DETERMINISTIC])
+def test_profil_solver(monkeypatch, mode):
+    # URL sudah dibaca saat `database` di-import; env var di sini tidak berpengaruh lagi
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "")
+    payload = schemas.CalculationInput(heirs=[schemas.HeirInput(id=3), schemas.HeirInput(id=1, quantity=2)],
+                                       tirkah=1200)
+    report = profiler.run_job("calculate", payload.model_dump_json(), mode, 0.2, 0.001, 10)
+    assert report["iterations"] > 0 and not report["truncated"]
+    assert len(report["top"]) <= 10
+    names = [t["function"] for t in report["top"]]
+    assert "calculator.py:calculate_inheritance" in names
@@ -0,0 +1,74 @@
+# test_rational.py
+
+import random
+from fractions import Fraction
+
+import pytest
+
+from app.math.rational import Rational, lcm_denominators
+from jadd_wal_ikhwah import calculate_tashih_multiplier
+
+
+def test_normalisasi_dan_format_sama_dengan_fraction():
+    for n, d in [(2, 4), (-3, 9), (3, -9), (0, 5), (12, 4), (7, 1)]:
+        r, f = Rational(n, d), Fraction(n, d)
+        assert (r.numerator, r.denominator) == (f.numerator, f.denominator)
+        assert str(r) == str(f)
+    with pytest.raises(ZeroDivisionError):
+        Rational(1, 0)
+
+
+def test_aritmetika_dan_perbandingan_sama_dengan_fraction():
+    rng = random.Random(50)
+    for _ in range(500):
+        a = (rng.randint(-40, 40), rng.randint(1, 30))
+        b = (rng.randint(-40, 40), rng.randint(1, 30))
+        k = rng.randint(-10, 10)
+        ra, rb, fa, fb = Rational(*a), Rational(*b), Fraction(*a), Fraction(*b)
+        for r, f in [(ra + rb, fa + fb), (ra - rb, fa - fb), (ra * rb, fa * fb),
+                     (ra + k, fa + k), (k - ra, k - fa), (ra * k, fa * k)]:
+            assert (r.numerator, r.denominator) == (f.numerator, f.denominator)
+        if b[0]:
+            q = ra / rb
+            assert (q.numerator, q.denominator) == ((fa / fb).numerator, (fa / fb).denominator)
+        assert (ra < rb, ra <= rb, ra == rb, ra > rb) == (fa < fb, fa <= fb, fa == fb, fa > fb)
+        assert (ra < k, ra == k) == (fa < k, fa == k)
+        assert int(ra) == int(fa)
+
+
+def test_hash_konsisten_dengan_int():
+    assert Rational(6, 2) == 3
+    assert hash(Rational(6, 2)) == hash(3)
+    assert {Rational(1, 3): "a"}[Rational(2, 6)] == "a"
+
+
+def test_max_memilih_porsi_terbesar():
+    # Perbandingan opsi Jadd di calculator.py
+    options = [("muqasamah", Rational(2, 5)), ("one_third_resid", Rational(1, 3)), ("one_sixth_total", Rational(1, 6))]
+    assert max(options, key=lambda x: x[1])[0] == "muqasamah"
+
+
+def test_from_float_setara_limit_denominator():
+    rng = random.Random(1000)
+    values = [0.1, 1 / 3, 2 / 3, 4.5, 22 / 7, 3.14159265, -0.3333, 1e-4, 123456.789]
+    values += [rng.uniform(-100, 100) for _ in range(300)]
+    for value in values:
+        for max_den in (1, 7, 1000):
+            r, f = Rational.from_float(value, max_den), Fraction(value).limit_denominator(max_den)
+            assert (r.numerator, r.denominator) == (f.numerator, f.denominator)
+
+
+def test_of_dan_lcm_denominators():
+    assert Rational.of(Fraction(3, 6)) == Rational(1, 2)
+    assert Rational.of(0.75) == Rational(3, 4)
+    assert Rational.of(4).is_integer()
+    assert lcm_denominators([Rational(1, 4), Rational(5, 6), Rational(2)]) == 12
+    assert lcm_denominators([]) == 1
+
+
+def test_tashih_multiplier_jadd_wal_ikhwah():
+    assert calculate_tashih_multiplier(Rational(9, 5), Rational(12, 5)) == 5
+    assert calculate_tashih_multiplier(Rational(3, 2), Rational(4, 3)) == 6
+    assert calculate_tashih_multiplier(2, 4) == 1
+    # Pemanggil lama dengan float tetap didukung
+    assert calculate_tashih_multiplier(1.5, 2.0) == 2
@@ -0,0 +1,82 @@
+# test_result_store.py
+
+"""Tes penyimpanan hasil berdasarkan hash input (crud.save_result & result_store)."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import models
+import result_store
+from database import Base
+
+NOT_BEFORE_DAYS = result_store.RESULT_RETENTION_DAYS
+
+
+def _not_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=NOT_BEFORE_DAYS)
+
+
+def _age(db, digest: str, key: str) -> None:
+    """Mundurkan created_at melewati masa simpan tanpa menghapus barisnya (belum di-purge)."""
+    old = datetime.now(timezone.utc) - timedelta(days=NOT_BEFORE_DAYS + 1)
+    db.get(models.StoredResult, digest).created_at = old
+    db.get(models.IdempotencyKey, key).created_at = old
+    db.commit()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "hasil.db"
+
+
+@pytest.fixture
+def db(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_hasil_kedaluwarsa_disimpan_ulang(db):
+    crud.save_result(db, "d1", "haml", "{}", '{"v": 1}', "kunci-1", not_before=_not_before())
+    assert crud.get_stored_result(db, "d1", _not_before()).result_json == '{"v": 1}'
+
+    _age(db, "d1", "kunci-1")
+    assert crud.get_stored_result(db, "d1", _not_before()) is None
+    assert crud.get_idempotency_key(db, "kunci-1", _not_before()) is None
+
+    crud.save_result(db, "d1", "haml", "{}", '{"v": 2}', "kunci-1", not_before=_not_before())
+    assert crud.get_stored_result(db, "d1", _not_before()).result_json == '{"v": 2}'
+    assert crud.get_idempotency_key(db, "kunci-1", _not_before()).digest == "d1"
+
+
+def test_hasil_yang_masih_berlaku_tidak_ditimpa(db):
+    crud.save_result(db, "d1", "haml", "{}", '{"v": 1}', not_before=_not_before())
+    crud.save_result(db, "d1", "haml", "{}", '{"v": 2}', not_before=_not_before())
+    assert crud.get_stored_result(db, "d1", _not_before()).result_json == '{"v": 1}'
+
+
+def test_hasil_kedaluwarsa_disimpan_ulang_lewat_jalur_async(db, db_path):
+    # Jalur yang dipakai route: result_store → crud_async (AsyncSession)
+    async def skenario(result_json: str):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await result_store.store(session, "d2", "haml", "{}", result_json, "kunci-2")
+                stored = await result_store.lookup(session, "d2")
+                by_key = await result_store.lookup_idempotent(session, "kunci-2")
+                return stored and stored.result_json, by_key and by_key.result_json
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(skenario('{"v": 1}')) == ('{"v": 1}', '{"v": 1}')
+    _age(db, "d2", "kunci-2")
+    assert asyncio.run(skenario('{"v": 2}')) == ('{"v": 2}', '{"v": 2}')
@@ -0,0 +1,134 @@
+# test_sessions.py
+
+"""
+Tes sesi perhitungan inkremental (sessions.py): setiap delta harus memberi hasil
+yang sama dengan calculate_inheritance dari awal, dengan tahap hitung ulang
+(`recomputed`) yang sesuai jenis perubahannya.
+"""
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import calculator
+import catalog
+import database
+import main
+import sessions
+from schemas import CalculationInput, HeirInput, SessionDelta
+
+
+@pytest.fixture(autouse=True)
+def _katalog():
+    catalog.load_defaults()
+    sessions.store.clear()
+    yield
+    sessions.store.clear()
+
+
+def _heirs(counts):
+    return [HeirInput(id=hid, quantity=q) for hid, q in sorted(counts.items()) if q > 0]
+
+
+def _fresh(counts, tirkah):
+    return calculator.calculate_inheritance(None, CalculationInput(heirs=_heirs(counts), tirkah=tirkah))
+
+
+def _expected_level(before, after):
+    if before == after:
+        return sessions.RECOMPUTE_NOMINAL
+    if calculator.furudh_signature(_heirs(before)) == calculator.furudh_signature(_heirs(after)):
+        return sessions.RECOMPUTE_SAHAM
+    return sessions.RECOMPUTE_LENGKAP
+
+
+def test_delta_sama_dengan_hitung_ulang_penuh():
+    rnd = random.Random(41)
+    seen = set()
+    for _ in range(200):
+        counts = {i: rnd.choice([1, 1, 2, 3]) for i in rnd.sample(range(1, 26), rnd.randint(1, 5))}
+        tirkah = 1200000.0
+        state = sessions.create(None, _heirs(counts), tirkah)
+        assert state.render("lengkap") == _fresh(counts, tirkah)
+        for _ in range(6):
+            before = dict(counts)
+            kind = rnd.choice(["add", "remove", "update", "tirkah"])
+            hid = rnd.choice(list(counts) if kind != "add" else range(1, 26))
+            if kind == "add":
+                qty = rnd.randint(1, 2)
+                delta = SessionDelta(add=[HeirInput(id=hid, quantity=qty)])
+                counts[hid] = counts.get(hid, 0) + qty
+            elif kind == "remove":
+                delta = SessionDelta(remove=[hid])
+                counts.pop(hid)
+            elif kind == "update":
+                qty = rnd.randint(0, 4)
+                delta = SessionDelta(update=[HeirInput(id=hid, quantity=qty)])
+                counts[hid] = qty
+                if not qty:
+                    counts.pop(hid)
+            else:
+                tirkah = float(rnd.randint(1, 10 ** 8))
+                delta = SessionDelta(tirkah=tirkah)
+            if not counts:
+                with pytest.raises(ValueError):
+                    sessions.apply_delta(None, state, delta)
+                break
+            state, level = sessions.apply_delta(None, state, delta)
+            assert level == _expected_level(before, counts), (kind, before, counts)
+            assert state.render("lengkap") == _fresh(counts, tirkah), (kind, before, counts)
+            assert state.render("ringkas").notes == []
+            seen.add((kind, level))
+    # Setiap jenis delta sempat melewati tahap yang diharapkan
+    assert {("tirkah", "nominal"), ("add", "lengkap"), ("remove", "lengkap"), ("update", "lengkap")} <= seen
+    assert {kind for kind, level in seen if level == "saham"} >= {"add", "update"}
+
+
+@pytest.mark.parametrize("delta, level", [
+    (SessionDelta(tirkah=5000), sessions.RECOMPUTE_NOMINAL),
+    (SessionDelta(update=[HeirInput(id=4, quantity=3)]), sessions.RECOMPUTE_SAHAM),     # jumlah Istri
+    (SessionDelta(add=[HeirInput(id=16, quantity=1)]), sessions.RECOMPUTE_SAHAM),       # 3 → 4 anak perempuan
+    (SessionDelta(add=[HeirInput(id=1)]), sessions.RECOMPUTE_LENGKAP),                  # Anak Laki-laki baru
+    (SessionDelta(remove=[18]), sessions.RECOMPUTE_LENGKAP),
+])
+def test_tahap_hitung_ulang_per_jenis_delta(delta, level):
+    state = sessions.create(None, [HeirInput(id=4), HeirInput(id=16, quantity=3), HeirInput(id=18)], 1200)
+    new_state, recomputed = sessions.apply_delta(None, state, delta)
+    assert recomputed == level
+    counts = new_state.counts()
+    assert new_state.render("lengkap") == _fresh(counts, new_state.tirkah)
+
+
+def test_sesi_dibangun_ulang_dari_id():
+    state = sessions.create(None, [HeirInput(id=3), HeirInput(id=18), HeirInput(id=21, quantity=2)], 1200)
+    sessions.store.clear()
+    rebuilt = sessions.load(None, state.key)
+    assert rebuilt.key == state.key
+    assert rebuilt.render("lengkap") == state.render("lengkap")
+    with pytest.raises(ValueError):
+        sessions.load(None, "bukan-id-sesi")
+
+
+def test_route_sesi(monkeypatch):
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", "")
+    body = {"heirs": [{"id": 4}, {"id": 16, "quantity": 3}, {"id": 18}], "tirkah": 1200}
+    with TestClient(main.app) as client:
+        created = client.post("/calculate/sessions", json=body).json()
+        assert created["recomputed"] == "lengkap"
+        assert created["result"] == client.post("/calculate/", json=body).json()
+
+        patched = client.patch(f"/calculate/sessions/{created['session']}",
+                               json={"add": [{"id": 16}], "tirkah": 2400}).json()
+        assert patched["recomputed"] == "saham"
+        body = {"heirs": [{"id": 4}, {"id": 16, "quantity": 4}, {"id": 18}], "tirkah": 2400}
+        assert patched["result"] == client.post("/calculate/", json=body).json()
+
+        sessions.store.clear()
+        read = client.get(f"/calculate/sessions/{patched['session']}?detail=ringkas").json()
+        assert read["recomputed"] == "" and read["result"]["notes"] == []
+        assert read["result"]["shares"] == patched["result"]["shares"]
+
+        assert client.get("/calculate/sessions/abc").status_code == 422
+        assert client.patch(f"/calculate/sessions/{patched['session']}",
+                            json={"remove": [4, 16, 18]}).status_code == 422
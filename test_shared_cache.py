@@ -0,0 +1,102 @@
+# test_shared_cache.py
+
+"""
+Tes cache kerangka bersama (shared_cache.py): put/get, seqlock, penggusuran,
+dan hasil yang dibangun ulang dari kerangka (nominal & nama dari katalog).
+"""
+
+import struct
+
+import pytest
+
+import catalog
+import shared_cache
+from calculator import calculate_inheritance
+from schemas import CalculationInput, HeirInput
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = shared_cache.SharedSkeletonCache(tmp_path / "kerangka.bin", slots=16)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def katalog():
+    catalog.load_defaults()
+    yield
+    catalog.load_defaults()
+
+
+def _key(start: int, tag: int) -> bytes:
+    """Kunci 16 byte yang probe-nya dimulai dari slot `start`."""
+    return start.to_bytes(8, "little") + tag.to_bytes(8, "little")
+
+
+def _offset(cache, key: bytes) -> int:
+    return next(off for off in cache._offsets(key) if shared_cache.SLOT_HEADER.unpack_from(cache._mm, off)[1] == key)
+
+
+def test_put_get_dan_dibuka_ulang(cache, tmp_path):
+    key = _key(3, 1)
+    assert cache.get(key) is None
+    assert cache.put(key, b"kerangka-1")
+    assert cache.get(key) == b"kerangka-1"
+    # Kunci yang sudah ada tidak ditulis ulang
+    assert cache.put(key, b"lain") and cache.get(key) == b"kerangka-1"
+    assert not cache.put(_key(4, 1), b"x" * (shared_cache.SLOT_PAYLOAD + 1))
+
+    # Proses lain (atau restart) dengan file yang sama langsung hangat
+    other = shared_cache.SharedSkeletonCache(tmp_path / "kerangka.bin", slots=16)
+    try:
+        assert other.get(key) == b"kerangka-1"
+    finally:
+        other.close()
+
+
+def test_slot_yang_sedang_ditulis_tidak_dibaca(cache):
+    key = _key(5, 1)
+    cache.put(key, b"kerangka")
+    off = _offset(cache, key)
+    seq = struct.unpack_from("<I", cache._mm, off)[0]
+    struct.pack_into("<I", cache._mm, off, seq + 1)   # seq ganjil: penulis sedang di tengah jalan
+    assert cache.get(key) is None
+    struct.pack_into("<I", cache._mm, off, seq + 2)   # genap lagi: tulisan selesai
+    assert cache.get(key) == b"kerangka"
+
+
+def test_penggusuran_slot_paling_jarang_dipakai(cache):
+    keys = [_key(0, tag) for tag in range(shared_cache.PROBE_LIMIT)]
+    for i, key in enumerate(keys):
+        cache.put(key, b"k%d" % i)
+    for key in keys:
+        if key != keys[2]:
+            cache.get(key)                 # semua kecuali keys[2] pernah dipakai
+    baru = _key(0, 99)
+    assert cache.put(baru, b"baru")
+    assert cache.get(baru) == b"baru"
+    assert cache.get(keys[2]) is None
+    assert all(cache.get(k) is not None for k in keys if k != keys[2])
+    assert sum(1 for _ in cache.entries()) == shared_cache.PROBE_LIMIT
+
+
+def test_hasil_dari_kerangka_sama_dengan_hitung_ulang(katalog):
+    heirs = [HeirInput(id=3), HeirInput(id=18), HeirInput(id=21, quantity=2), HeirInput(id=12)]
+    skeleton = shared_cache.skeleton_from_result(calculate_inheritance(None, CalculationInput(heirs=heirs, tirkah=1000)))
+    for tirkah in (1000, 777.77, 0):
+        expected = calculate_inheritance(None, CalculationInput(heirs=heirs, tirkah=tirkah), False)
+        rebuilt = shared_cache.result_from_skeleton(skeleton, tirkah)
+        assert rebuilt.model_dump() == expected.model_dump()
+
+
+def test_nama_diambil_dari_katalog_terkini(katalog):
+    heirs = [HeirInput(id=1), HeirInput(id=5)]
+    skeleton = shared_cache.skeleton_from_result(calculate_inheritance(None, CalculationInput(heirs=heirs, tirkah=100)))
+    catalog.load_rows([(5, "Cucu (baru)", "ابن الابن") if row[0] == 5 else row for row in catalog.DEFAULT_HEIRS])
+    rebuilt = shared_cache.result_from_skeleton(skeleton, 100)
+    assert next(s.heir.name_id for s in rebuilt.shares if s.heir.id == 5) == "Cucu (baru)"
+
+    # Ahli waris yang tidak ada di katalog → kerangka tidak dipakai
+    catalog.load_rows([row for row in catalog.DEFAULT_HEIRS if row[0] != 5])
+    assert shared_cache.result_from_skeleton(skeleton, 100) is None
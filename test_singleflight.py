@@ -0,0 +1,107 @@
+# test_singleflight.py
+
+"""Tes penggabungan request identik (singleflight.py): leader sekali, hasil & error dibagi."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+PESERTA = 8
+
+
+def test_do_leader_sekali_hasil_dibagi():
+    flights, calls = SingleFlight(), []
+    barrier = threading.Barrier(PESERTA)
+
+    def hitung():
+        calls.append(1)
+        time.sleep(0.3)   # cukup lama agar semua peserta sempat bergabung
+        return {"hasil": 42}
+
+    def peserta(_):
+        barrier.wait()
+        return flights.do("k", hitung)
+
+    with ThreadPoolExecutor(PESERTA) as pool:
+        results = list(pool.map(peserta, range(PESERTA)))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": PESERTA - 1}
+
+
+def test_do_error_leader_sampai_ke_semua_peserta():
+    flights = SingleFlight()
+    barrier = threading.Barrier(PESERTA)
+
+    def gagal():
+        time.sleep(0.3)
+        raise ValueError("solver gagal")
+
+    def peserta(_):
+        barrier.wait()
+        try:
+            flights.do("k", gagal)
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(PESERTA) as pool:
+        assert list(pool.map(peserta, range(PESERTA))) == ["solver gagal"] * PESERTA
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_do_async_leader_sekali_hasil_dibagi():
+    flights, calls = SingleFlight(), []
+
+    async def hitung(x):
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return {"hasil": x}
+
+    async def skenario():
+        return await asyncio.gather(*(flights.do_async("k", hitung, 7) for _ in range(PESERTA)))
+
+    results = asyncio.run(skenario())
+    assert calls == [7]
+    assert all(r is results[0] for r in results) and results[0] == {"hasil": 7}
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": PESERTA - 1}
+    assert not flights._tasks   # task leader dilepas setelah selesai
+
+
+def test_do_async_error_leader_sampai_ke_semua_peserta():
+    flights = SingleFlight()
+
+    async def gagal():
+        await asyncio.sleep(0.05)
+        raise ValueError("solver gagal")
+
+    async def skenario():
+        return await asyncio.gather(*(flights.do_async("k", gagal) for _ in range(PESERTA)),
+                                    return_exceptions=True)
+
+    errors = asyncio.run(skenario())
+    assert all(isinstance(e, ValueError) and str(e) == "solver gagal" for e in errors)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_do_async_pembatalan_peserta_tidak_membatalkan_leader():
+    flights = SingleFlight()
+
+    async def hitung():
+        await asyncio.sleep(0.1)
+        return "selesai"
+
+    async def skenario():
+        pertama = asyncio.ensure_future(flights.do_async("k", hitung))
+        kedua = asyncio.ensure_future(flights.do_async("k", hitung))
+        await asyncio.sleep(0.01)
+        pertama.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pertama
+        return await kedua
+
+    assert asyncio.run(skenario()) == "selesai"
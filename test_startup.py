@@ -0,0 +1,63 @@
+# Di dalam file: test_startup.py
+
+"""
+Tes waktu startup: meng-import kalkulator (atau aplikasi) tidak boleh lambat
+dan tidak boleh menyentuh database. Tiap tes memakai interpreter baru supaya
+modul yang sudah dimuat tes lain tidak ikut terhitung.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Anggaran waktu import kalkulator (detik); bisa dilonggarkan untuk mesin CI yang lambat
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "0.5"))
+
+ROOT = Path(__file__).resolve().parent
+
+
+def _run_fresh(code):
+    """Jalankan `code` di interpreter baru tanpa DATABASE_URL; hasilnya JSON dari stdout."""
+    env = dict(os.environ, DATABASE_URL="")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def test_import_kalkulator_dalam_anggaran_waktu():
+    result = _run_fresh(
+        "import json, sys, time\n"
+        "t = time.perf_counter()\n"
+        "import calculator\n"
+        "print(json.dumps({'seconds': time.perf_counter() - t,\n"
+        "                  'sqlalchemy': 'sqlalchemy' in sys.modules}))\n"
+    )
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS, \
+        f"Import calculator {result['seconds']:.3f} dtk, anggaran {IMPORT_BUDGET_SECONDS} dtk"
+    assert not result["sqlalchemy"], "calculator tidak boleh meng-import sqlalchemy saat import"
+
+
+def test_import_aplikasi_tanpa_database():
+    result = _run_fresh(
+        "import json, sys\n"
+        "import main, database\n"
+        "print(json.dumps({'engine': database._engine is not None,\n"
+        "                  'solvers': [m for m in ('calculator', 'munasakhot', 'mauquf', 'gharqa')\n"
+        "                              if m in sys.modules]}))\n"
+    )
+    assert not result["engine"], "Engine database tidak boleh dibuat saat import"
+    assert result["solvers"] == []
+
+
+def test_kalkulator_tanpa_database():
+    result = _run_fresh(
+        "import json\n"
+        "from calculator import calculate_inheritance\n"
+        "from schemas import CalculationInput, HeirInput\n"
+        "data = CalculationInput(heirs=[HeirInput(id=1), HeirInput(id=7)], tirkah=1000)\n"
+        "r = calculate_inheritance(None, data)\n"
+        "print(json.dumps({s.heir.name_id: s.share_amount for s in r.shares}))\n"
+    )
+    assert result == {"Anak Laki-laki": 1000.0, "Saudara Laki-laki Kandung": 0.0}
@@ -0,0 +1,121 @@
+# test_tracing.py
+
+"""
+Tes jejak terstruktur (tracing.py): catatan yang dirender dari jejak sama
+dengan teks lama, dan GET /results/{digest}/trace?step= memfilter per langkah.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import calculator
+import catalog
+import database
+import http_cache
+import main
+import models
+from database import Base
+from schemas import CalculationInput, HeirInput
+
+# Teks `notes` seperti ditulis langsung oleh kalkulator sebelum ada tracing.py
+LEGACY_NOTES = {
+    # Radd: Ibu + Saudari Seayah
+    ((18, 1), (22, 1)): [
+        "Menentukan furudh ahli waris sesuai ketentuan syar’i",
+        "Menentukan Ashlul Mas’alah: 6",
+        "Penyebut 3 & 2 = Mubayanah",
+        "Ibu: 2 saham karena 1/3 dari 6",
+        "Saudari Seayah: 3 saham karena 1/2 dari 6",
+        "Terjadi Radd: total saham 5 < AM awal 6. AM akhir: 5",
+        "Ibu = 2 × 1,200 ÷ 5 = Rp 480",
+        "Saudari Seayah = 3 × 1,200 ÷ 5 = Rp 720",
+    ],
+    # Tashīḥ karena inkisār Ashobah campur (2:1)
+    ((18, 1), (7, 3), (21, 2)): [
+        "Menentukan furudh ahli waris sesuai ketentuan syar’i",
+        "Menentukan Ashlul Mas’alah: 6",
+        "Ibu: 1 saham karena 1/6 dari 6",
+        "Inkisār Ashobah: sisa = 5, total bobot = 8 → tashīḥ ×8. AM akhir: 6 × 8 = 48",
+        "Saudara Laki-laki Kandung (3 orang) mendapat 30 saham dari sisa (Ashobah 2:1).",
+        "Saudari Kandung (2 orang) mendapat 10 saham dari sisa (Ashobah 2:1).",
+        "Ibu = 8 × 1,200 ÷ 48 = Rp 200",
+        "Saudara Laki-laki Kandung (3 orang) = 30 × 1,200 ÷ 48 = Rp 750 → masing-masing Rp 250",
+        "Saudari Kandung (2 orang) = 10 × 1,200 ÷ 48 = Rp 250 → masing-masing Rp 125",
+    ],
+    # Masalah al-‘Add + Jadd ma‘al-Ikhwah + mahjūb
+    ((6, 1), (7, 3), (8, 3)): [
+        "Menentukan furudh ahli waris sesuai ketentuan syar’i",
+        "Masalah al-‘Add: saudara seayah disertakan dalam perbandingan untuk mengecilkan bagian Jadd.",
+        "Kasus Jadd ma‘al-Ikhwah: membandingkan 3 opsi (muqāsamah, 1/3 sisa, 1/6 total).",
+        "Tidak ada saudara; Jadd menjadi Ashobah penuh. AM = 2.",
+        "Kakek = 2 × 1,200 ÷ 2 = Rp 1,200",
+        "Saudara Laki-laki Kandung mahjūb (terhalang).",
+        "Saudara Laki-laki Seayah mahjūb (terhalang).",
+    ],
+}
+
+
+def _input(heirs, tirkah=1200):
+    return CalculationInput(heirs=[HeirInput(id=hid, quantity=qty) for hid, qty in heirs], tirkah=tirkah)
+
+
+@pytest.mark.parametrize("heirs", list(LEGACY_NOTES))
+def test_render_notes_sama_dengan_teks_lama(heirs):
+    result, trace = calculator.calculate_traced(None, _input(heirs))
+    assert trace.render_notes() == LEGACY_NOTES[heirs]
+    assert calculator.calculate_inheritance(None, _input(heirs)).notes == LEGACY_NOTES[heirs]
+    assert calculator.calculate_inheritance(None, _input(heirs), render_notes=False).notes == []
+
+
+@pytest.mark.parametrize("heirs", list(LEGACY_NOTES))
+def test_to_models_membawa_teks_dan_data(heirs):
+    _, trace = calculator.calculate_traced(None, _input(heirs))
+    traced = trace.to_models()
+    assert [(m.step, m.data) for m in traced] == trace.records
+    # Langkah `saham` tanpa teks → description kosong; sisanya = catatan, berurutan
+    assert all(m.description == "" for m in traced if m.step == "saham")
+    assert [m.description for m in traced if m.description] == LEGACY_NOTES[heirs]
+
+
+@pytest.fixture
+def db_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'trace.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add_all(models.Heir(id=hid, name_id=name_id, name_ar=name_ar)
+                   for hid, name_id, name_ar in catalog.DEFAULT_HEIRS)
+        db.commit()
+    engine.dispose()
+    monkeypatch.setattr(database, "SQLALCHEMY_DATABASE_URL", url)
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", None)
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "_async_engine", None)
+    monkeypatch.setattr(main.warm_start, "WARM_START_PATH", str(tmp_path / "tidak-ada.snap"))
+    http_cache.heirs_snapshot.invalidate()
+    yield url
+    if database._engine is not None:
+        database._engine.dispose()
+    http_cache.heirs_snapshot.invalidate()
+    catalog.load_defaults()
+
+
+def test_trace_tersimpan_difilter_per_langkah(db_url):
+    body = {"heirs": [{"id": 18}, {"id": 7, "quantity": 3}, {"id": 21, "quantity": 2}], "tirkah": 1200}
+    with TestClient(main.app) as client:
+        response = client.post("/calculate/trace", json=body)
+        assert response.status_code == 200
+        digest = response.headers["x-result-digest"]
+        full = response.json()["trace"]
+
+        stored = client.get(f"/results/{digest}/trace").json()
+        assert stored["digest"] == digest and stored["trace"] == full
+
+        filtered = client.get(f"/results/{digest}/trace?step=tashih&step=amount").json()["trace"]
+        assert filtered == [record for record in full if record["step"] in ("tashih", "amount")]
+        assert {record["step"] for record in filtered} == {"tashih", "amount"}
+
+        assert client.get(f"/results/{digest}/trace?step=radd").json()["trace"] == []
+        assert client.get(f"/results/{'0' * 64}/trace").status_code == 404
@@ -0,0 +1,79 @@
+# test_warm_start.py
+
+"""Tes snapshot warm-start (warm_start.py): dimuat, ditolak bila basi atau terpotong."""
+
+import struct
+
+import pytest
+
+import catalog
+import shared_cache
+import warm_start
+
+ROWS = [[hid, name_id, name_ar] for hid, name_id, name_ar in catalog.DEFAULT_HEIRS]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Cache kerangka bersama sementara, milik tes ini saja."""
+    cache = shared_cache.SharedSkeletonCache(tmp_path / "kerangka.bin", slots=16)
+    monkeypatch.setattr(shared_cache, "get_cache", lambda: cache)
+    yield cache
+    cache.close()
+    catalog.load_defaults()
+
+
+def _write(path, rows=ROWS, records=((b"k" * 16, b"kerangka-1"),), fingerprint=None):
+    import json
+    catalog_bytes = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+    fingerprint = (fingerprint or shared_cache.code_fingerprint()).encode("ascii")
+    with open(path, "wb") as f:
+        f.write(warm_start.HEADER.pack(warm_start.MAGIC, warm_start.SNAPSHOT_VERSION, fingerprint,
+                                       len(catalog_bytes), len(records)))
+        f.write(catalog_bytes)
+        for key, payload in records:
+            f.write(warm_start.RECORD.pack(key, len(payload)) + payload)
+
+
+def test_snapshot_terpotong_ditolak_tanpa_memuat_apa_pun(tmp_path, cache):
+    path = tmp_path / "warm.snap"
+    _write(path)
+    full = path.read_bytes()
+    catalog_end = warm_start.HEADER.size + struct.unpack_from("<I", full, 28)[0]
+    for cut in (warm_start.HEADER.size + 10, catalog_end + 5, len(full) - 3):
+        path.write_bytes(full[:cut])
+        catalog.load_rows([])
+        assert warm_start.load(str(path)) is False
+        assert not catalog.is_loaded()
+        assert cache.get(b"k" * 16) is None
+    path.write_bytes(b"")
+    assert warm_start.load(str(path)) is False
+    assert warm_start.load(str(tmp_path / "tidak-ada.snap")) is False
+
+
+def test_snapshot_dimuat(tmp_path, cache):
+    path = tmp_path / "warm.snap"
+    renamed = [[hid, "Suami (snapshot)" if hid == 3 else name_id, name_ar] for hid, name_id, name_ar in ROWS]
+    _write(path, rows=renamed)
+    assert warm_start.load(str(path)) is True
+    assert catalog.get_heir(3).name_id == "Suami (snapshot)"
+    assert cache.get(b"k" * 16) == b"kerangka-1"
+
+
+def test_katalog_database_tidak_ditimpa_snapshot(tmp_path, cache):
+    # Dengan database, katalog sudah dimuat dari tabel `heirs`; snapshot hanya mengisi kerangka
+    path = tmp_path / "warm.snap"
+    _write(path, rows=[[3, "Suami (lama)", "زوج"]])
+    catalog.load_defaults()
+    assert warm_start.load(str(path), with_catalog=False) is True
+    assert catalog.get_heir(3).name_id == "Suami"
+    assert cache.get(b"k" * 16) == b"kerangka-1"
+
+
+def test_snapshot_basi_ditolak(tmp_path, cache):
+    path = tmp_path / "warm.snap"
+    _write(path, fingerprint="0" * 16)
+    catalog.load_rows([])
+    assert warm_start.load(str(path)) is False
+    assert not catalog.is_loaded()
+    assert cache.get(b"k" * 16) is None
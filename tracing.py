@@ -0,0 +1,129 @@
+# tracing.py
+
+"""
+Jejak perhitungan terstruktur.
+
+Kalkulator mencatat setiap langkah sebagai record ringkas `(step, data)`
+(data = dict berisi angka/teks pendek) ke objek Trace yang hanya bisa
+ditambah. Teks `notes` yang dulu ditulis langsung kini dirender dari jejak
+ini, dan hanya bila diminta; jejaknya sendiri bisa disimpan & difilter per
+langkah tanpa mengurai ulang teks.
+
+Kode langkah:
+    furudh          furudh awal dari tabel (items: [[heir_id, pecahan, jumlah], ...])
+    special         catatan kasus khusus (Akdariyyah, al-‘Add)
+    jadd_ikhwah     kasus Jadd ma‘al-Ikhwah (kepala Jadd & saudara)
+    jadd_option     opsi Jadd yang dipilih (muqasamah / one_third_resid / one_sixth_total / ashobah_penuh)
+    all_ashobah     semua ahli waris Ashobah, AM = total bobot
+    ashl            Ashlul Mas'alah awal
+    comparison      perbandingan dua penyebut
+    saham_furudh    saham ahli waris ber-furudh dari AM awal
+    sisa            sisa diambil satu Ashobah
+    tashih          tashīḥ karena inkisār Ashobah (pengali k)
+    inkisar         inkisār di dalam pembagian Ashobah campur
+    ashobah_share   saham Ashobah campur (2:1)
+    aul             'Aul (AM akhir = total saham)
+    aul_invalid     total saham tidak ada di daftar 'Aul → dianggap Adil
+    radd            Radd (AM akhir = total saham)
+    amount          nominal per ahli waris
+    mahjub          ahli waris mahjūb
+    saham           saham per ahli waris sebelum & sesudah tashīḥ (tanpa catatan teks)
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import schemas
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+class Trace:
+    """Daftar record langkah yang hanya bisa ditambah, plus nama ahli waris untuk render."""
+    __slots__ = ("records", "names")
+
+    def __init__(self):
+        self.records: List[Record] = []
+        self.names: Dict[int, str] = {}
+
+    def add(self, step: str, **data: Any) -> None:
+        self.records.append((step, data))
+
+    def name(self, heir_id: int, name_id: str) -> None:
+        self.names.setdefault(heir_id, name_id)
+
+    def render_notes(self) -> List[str]:
+        notes = []
+        for step, data in self.records:
+            text = render(step, data, self.names)
+            if text is not None:
+                notes.append(text)
+        return notes
+
+    def to_models(self) -> List[schemas.CalculationTrace]:
+        """Jejak sebagai CalculationTrace (description = teks catatan, "" bila tanpa teks)."""
+        return [schemas.CalculationTrace.model_construct(
+                    step=step, description=render(step, data, self.names) or "", data=data)
+                for step, data in self.records]
+
+
+# =========================
+# Render catatan
+# =========================
+def _name(names: Dict[int, str], heir_id: int) -> str:
+    return names.get(heir_id, f"ID {heir_id}")
+
+def _amount(d, names):
+    name = _name(names, d["heir_id"])
+    if d["quantity"] == 1:
+        return f"{name} = {d['saham']} × {d['tirkah']:,.0f} ÷ {d['am']} = Rp {d['amount']:,.0f}"
+    per_orang = (d["amount"] / d["quantity"]) if d["quantity"] else 0.0
+    return (f"{name} ({d['quantity']} orang) = {d['saham']} × {d['tirkah']:,.0f} ÷ {d['am']} = "
+            f"Rp {d['amount']:,.0f} → masing-masing Rp {per_orang:,.0f}")
+
+def _saham_furudh(d, names):
+    name = _name(names, d["heir_id"])
+    if d["quantity"] == 1:
+        return f"{name}: {d['per_orang']} saham karena {d['fraction']} dari {d['am']}"
+    return f"{name}: {d['total']} saham karena {d['fraction']} (kelompok) dari {d['am']}"
+
+def _ashobah_share(d, names):
+    name = _name(names, d["heir_id"])
+    if d["quantity"] > 1:
+        return f"{name} ({d['quantity']} orang) mendapat {d['saham']} saham dari sisa (Ashobah 2:1)."
+    return f"{name} mendapat {d['saham']} saham dari sisa (Ashobah 2:1)."
+
+_JADD_OPTIONS = {
+    "ashobah_penuh": "Tidak ada saudara; Jadd menjadi Ashobah penuh. AM = {am}.",
+    "muqasamah": "Memilih muqāsamah: Jadd {portion} (> 1/3, > 1/6). AM = {am} (jumlah kepala).",
+    "one_third_resid": "Memilih 1/3 sisa: AM ditashīḥ menjadi {am} agar bulat.",
+    "one_sixth_total": "Memilih 1/6 total: AM ditashīḥ menjadi {am} agar bulat.",
+}
+
+_RENDERERS: Dict[str, Callable[[Dict[str, Any], Dict[int, str]], Optional[str]]] = {
+    "furudh": lambda d, n: "Menentukan furudh ahli waris sesuai ketentuan syar’i",
+    "special": lambda d, n: d["text"],
+    "jadd_ikhwah": lambda d, n: "Kasus Jadd ma‘al-Ikhwah: membandingkan 3 opsi (muqāsamah, 1/3 sisa, 1/6 total).",
+    "jadd_option": lambda d, n: _JADD_OPTIONS[d["option"]].format(**d),
+    "all_ashobah": lambda d, n: f"Semua ahli waris adalah Ashobah → Ashlul Mas'alah = total bobot = {d['am']}",
+    "ashl": lambda d, n: f"Menentukan Ashlul Mas’alah: {d['am']}",
+    "comparison": lambda d, n: f"Penyebut {d['a']} & {d['b']} = {d['relation']}",
+    "saham_furudh": _saham_furudh,
+    "sisa": lambda d, n: f"{_name(n, d['heir_id'])} mendapat sisa {d['sisa']} saham sebagai Ashobah",
+    "tashih": lambda d, n: (f"Inkisār Ashobah: sisa = {d['sisa']}, total bobot = {d['bobot']} → tashīḥ ×{d['k']}. "
+                            f"AM akhir: {d['am']} × {d['k']} = {d['am'] * d['k']}"),
+    "inkisar": lambda d, n: f"Inkisār Ashobah: sisa = {d['sisa']}, total bobot = {d['bobot']} → tashīḥ ×{d['k']}.",
+    "ashobah_share": _ashobah_share,
+    "aul": lambda d, n: f"Terjadi Aul: total saham {d['total_saham']} > AM awal {d['am']}. AM akhir = {d['total_saham']}.",
+    "aul_invalid": lambda d, n: (f"⚠️ Total saham {d['total_saham']} tidak sesuai daftar Aul untuk AM {d['am']} "
+                                 f"→ dianggap Adil (AM tetap)."),
+    "radd": lambda d, n: (f"Terjadi Radd: total saham {d['total_saham']} < AM awal {d['am_awal']}. "
+                          f"AM akhir: {d['am_akhir']}"),
+    "amount": _amount,
+    "mahjub": lambda d, n: f"{_name(n, d['heir_id'])} mahjūb (terhalang).",
+    "saham": lambda d, n: None,
+}
+
+
+def render(step: str, data: Dict[str, Any], names: Dict[int, str]) -> Optional[str]:
+    """Teks catatan untuk satu record (None = langkah tanpa catatan teks)."""
+    return _RENDERERS[step](data, names)
@@ -0,0 +1,135 @@
+# warm_start.py
+
+"""
+Snapshot warm-start: katalog ahli waris + kerangka hasil yang paling sering
+dihitung, dalam satu file berversi yang dibaca lewat mmap saat startup.
+
+Build (misal saat membuat image deploy, setelah server sempat melayani trafik):
+    python warm_start.py build [--top 500] [--output warm_start.snap]
+
+Tata letak file (little-endian):
+  header   : magic | versi | sidik jari kode aturan (16 byte) | panjang katalog | jumlah kerangka
+  katalog  : JSON [[id, name_id, name_ar], ...]
+  kerangka : berulang (key 16 byte | panjang u32 | payload)
+
+Snapshot dianggap basi bila versinya beda atau sidik jari kode aturannya tidak
+cocok dengan kode yang sedang berjalan; startup lalu kembali ke jalur biasa
+(katalog dibaca dari database, cache kerangka mulai kosong).
+
+Katalog di snapshot hanya dipakai dalam mode tanpa database. Bila database
+tersedia katalog selalu dibaca dari tabel `heirs`, supaya perubahan lewat
+/heirs/bulk setelah snapshot dibuat tidak tertimpa saat restart; kerangka
+tetap bisa dipakai karena tidak menyimpan nama ahli waris.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+import catalog
+import crud
+import shared_cache
+
+MAGIC = b"FRDHSNP1"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sI16sII")
+RECORD = struct.Struct("<16sI")
+
+WARM_START_PATH = os.getenv("WARM_START_PATH", str(Path(__file__).resolve().parent / "warm_start.snap"))
+
+
+def build(db: Session, path: str = WARM_START_PATH, top: int = 500) -> int:
+    """Tulis snapshot baru. Mengembalikan jumlah kerangka yang ikut disimpan."""
+    rows = [[h.id, h.name_id, h.name_ar] for h in crud.get_heir_rows(db, limit=None)]
+    catalog_bytes = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    hottest = sorted(shared_cache.get_cache().entries(), key=lambda e: e[0], reverse=True)[:top]
+    records: List[bytes] = [RECORD.pack(key, len(payload)) + payload for _, key, payload in hottest]
+
+    fingerprint = shared_cache.code_fingerprint().encode("ascii")
+    tmp = Path(path).with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, fingerprint, len(catalog_bytes), len(records)))
+        f.write(catalog_bytes)
+        for record in records:
+            f.write(record)
+    os.replace(tmp, path)   # atomik: worker yang sedang start tidak membaca file setengah jadi
+    return len(records)
+
+
+def load(path: str = WARM_START_PATH, with_catalog: bool = True) -> bool:
+    """
+    Muat snapshot ke cache kerangka bersama, dan ke katalog bila `with_catalog`.
+    False bila file tidak ada, rusak, atau basi (pemanggil memakai jalur biasa).
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return False
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return False   # file kosong
+    with mm:
+        if len(mm) < HEADER.size:
+            return False
+        magic, version, fingerprint, catalog_len, n_records = HEADER.unpack_from(mm, 0)
+        if (magic, version) != (MAGIC, SNAPSHOT_VERSION):
+            return False
+        if fingerprint.decode("ascii") != shared_cache.code_fingerprint():
+            return False
+
+        # Seluruh isi divalidasi dulu; file terpotong/rusak tidak boleh memuat setengah isinya
+        try:
+            rows, records = _parse(mm, catalog_len, n_records)
+        except (ValueError, TypeError, struct.error):
+            return False
+        if with_catalog:
+            catalog.load_rows(rows)
+        skeletons = shared_cache.get_cache()
+        for key, payload in records:
+            skeletons.put(key, payload)
+    return True
+
+
+def _parse(mm, catalog_len: int, n_records: int) -> Tuple[list, List[Tuple[bytes, bytes]]]:
+    """Katalog & kerangka dari isi snapshot; ValueError bila panjangnya tidak sesuai header."""
+    offset = HEADER.size
+    if len(mm) < offset + catalog_len:
+        raise ValueError("snapshot terpotong di bagian katalog")
+    rows = [(int(hid), str(name_id), str(name_ar))
+            for hid, name_id, name_ar in json.loads(mm[offset:offset + catalog_len])]
+    offset += catalog_len
+    records = []
+    for _ in range(n_records):
+        key, length = RECORD.unpack_from(mm, offset)
+        offset += RECORD.size
+        if len(mm) < offset + length:
+            raise ValueError("snapshot terpotong di bagian kerangka")
+        records.append((key, mm[offset:offset + length]))
+        offset += length
+    return rows, records
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bangun snapshot warm-start.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--top", type=int, default=500, help="jumlah kerangka terpopuler yang disimpan")
+    parser.add_argument("--output", default=WARM_START_PATH)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        n = build(db, path=args.output, top=args.top)
+    finally:
+        db.close()
+    print(f"Snapshot ditulis ke {args.output}: katalog + {n} kerangka hasil.")